@@ -0,0 +1,96 @@
+"""
+Benchmark the local college-football pre-classifier.
+
+Runs k-fold cross-validation over a labelled corpus (same format as
+config/cfb_training_tweets.json) and reports, for the tweets the local model
+settled on its own, precision and recall, plus the fraction of Gemini calls
+avoided. The keyword veto from the tweet watcher runs first, as in production.
+
+Usage:
+    python benchmarks/cfb_classifier_benchmark.py [corpus.json] [--folds N]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from toaster.tweet_classifier import NaiveBayesClassifier, examples_from_records  # noqa: E402
+from toaster.tweet_watcher import _NON_FOOTBALL_MATCHER  # noqa: E402
+
+DEFAULT_CORPUS = Path(__file__).resolve().parents[1] / "tests" / "fixtures" / "cfb_tweets.json"
+
+
+def run(corpus_path: Path, folds: int, seed: int) -> dict:
+    examples = examples_from_records(json.loads(corpus_path.read_text(encoding="utf-8")))
+    random.Random(seed).shuffle(examples)
+
+    true_pos = false_pos = false_neg = true_neg = 0
+    keyword_settled = local_settled = escalated = 0
+    elapsed = 0.0
+    for fold in range(folds):
+        held_out = examples[fold::folds]
+        training = [example for i, example in enumerate(examples) if i % folds != fold]
+        model = NaiveBayesClassifier(training)
+        for text, label in held_out:
+            start = time.perf_counter()
+            if _NON_FOOTBALL_MATCHER.labels(text.lower()):
+                verdict = False
+                keyword_settled += 1
+            else:
+                verdict = model.decide(text)
+                if verdict is None:
+                    escalated += 1
+                else:
+                    local_settled += 1
+            elapsed += time.perf_counter() - start
+            if verdict is None:
+                continue
+            if verdict and label:
+                true_pos += 1
+            elif verdict:
+                false_pos += 1
+            elif label:
+                false_neg += 1
+            else:
+                true_neg += 1
+
+    total = len(examples)
+    return {
+        "tweets": total,
+        "keyword_settled": keyword_settled,
+        "local_settled": local_settled,
+        "escalated": escalated,
+        "precision": true_pos / (true_pos + false_pos) if true_pos + false_pos else 0.0,
+        "recall": true_pos / (true_pos + false_neg) if true_pos + false_neg else 0.0,
+        "accuracy": (true_pos + true_neg) / (total - escalated) if total - escalated else 0.0,
+        "llm_calls_avoided": (total - escalated) / total if total else 0.0,
+        "us_per_tweet": elapsed / total * 1e6 if total else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report = run(args.corpus, args.folds, args.seed)
+    print(f"Corpus: {args.corpus} ({report['tweets']} tweets, {args.folds}-fold)")
+    print(f"  Settled by keyword veto: {report['keyword_settled']}")
+    print(f"  Settled by local model:  {report['local_settled']}")
+    print(f"  Escalated to LLM:        {report['escalated']}")
+    print(f"  Precision (settled):     {report['precision']:.3f}")
+    print(f"  Recall (settled):        {report['recall']:.3f}")
+    print(f"  Accuracy (settled):      {report['accuracy']:.3f}")
+    print(f"  LLM calls avoided:       {report['llm_calls_avoided']:.1%}")
+    print(f"  Local cost per tweet:    {report['us_per_tweet']:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark the image preprocessing stage that runs before multimodal uploads.
+
+Generates phone-sized synthetic photos (plus a re-compressed repost of one of
+them), runs them through `prepare_images` cold and warm, and reports upload
+size, preprocessing time and estimated upload time before and after.
+
+Requires Pillow. Usage:
+    python benchmarks/image_pipeline_benchmark.py [--photos N] [--uplink-mbps 20]
+"""
+
+import argparse
+import asyncio
+import io
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from toaster.llm_agents import image_processing  # noqa: E402
+from toaster.llm_agents.image_processing import prepare_images  # noqa: E402
+
+
+def synthetic_photo(seed: int, size=(4032, 3024), quality: int = 92) -> bytes:
+    """A noisy, smoothly varying JPEG that compresses roughly like a real phone photo."""
+    from PIL import Image, ImageFilter
+
+    rng = random.Random(seed)
+    small = Image.new("RGB", (64, 48))
+    small.putdata([
+        (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        for _ in range(64 * 48)
+    ])
+    image = small.resize(size, Image.BICUBIC).filter(ImageFilter.DETAIL)
+    noise = Image.effect_noise(size, 24).convert("RGB")
+    image = Image.blend(image, noise, 0.15)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def repost(data: bytes) -> bytes:
+    """The same photo after a messaging app resized and re-compressed it."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.resize((image.width // 2, image.height // 2))
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=75)
+    return buffer.getvalue()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--photos", type=int, default=4)
+    parser.add_argument("--uplink-mbps", type=float, default=20.0, help="assumed upload bandwidth to the LLM API")
+    args = parser.parse_args()
+
+    if image_processing.Image is None:
+        print("Pillow is not installed; preprocessing is a pass-through. pip install Pillow to benchmark it.")
+        return
+
+    photos = [synthetic_photo(seed) for seed in range(args.photos)]
+    payloads = [{"filename": f"IMG_{i}.jpg", "mime_type": "image/jpeg", "data": data} for i, data in enumerate(photos)]
+    payloads.append({"filename": "repost.jpg", "mime_type": "image/jpeg", "data": repost(photos[0])})
+
+    def upload_seconds(total_bytes: int) -> float:
+        return total_bytes * 8 / (args.uplink_mbps * 1_000_000)
+
+    before = sum(len(p["data"]) for p in payloads)
+
+    start = time.perf_counter()
+    prepared = asyncio.run(prepare_images(payloads))
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    asyncio.run(prepare_images(payloads))
+    warm = time.perf_counter() - start
+
+    after = sum(len(p["data"]) for p in prepared)
+    print(f"Images: {len(payloads)} in, {len(prepared)} out (duplicates dropped: {len(payloads) - len(prepared)})")
+    print(f"  Upload size:          {before / 1e6:8.2f} MB -> {after / 1e6:8.2f} MB ({after / before:.1%})")
+    print(f"  Preprocessing:        cold {cold * 1000:7.1f} ms, cached {warm * 1000:7.1f} ms")
+    print(f"  Est. upload @ {args.uplink_mbps:g} Mbps: {upload_seconds(before):6.2f} s -> {upload_seconds(after):6.2f} s")
+    print(f"  Est. total latency:   {upload_seconds(before):6.2f} s -> {upload_seconds(after) + cold:6.2f} s cold, "
+          f"{upload_seconds(after) + warm:6.2f} s cached")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Micro-benchmark message intent classification against the old per-helper checks.
+
+The old path lowercased the message and ran each helper's own substring
+checks (shut up, unmute, real-life plans, Kalshi keywords, mentions). The
+new path is one `IntentRouter.classify` call. Both are timed on messages of
+typical to maximum Discord length, with and without phrases present.
+
+Usage:
+    python benchmarks/intent_matching_benchmark.py [--repeat 2000]
+"""
+
+import argparse
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from toast import (  # noqa: E402
+    REAL_LIFE_ACTIVITY_WORDS,
+    REAL_LIFE_VENUES,
+    SHUTUP_PHRASES,
+    UNMUTE_PHRASES,
+    message_intents,
+)
+
+WORDS = "the game was great last night did you see that touchdown pass from the quarterback lol no way braves win again".split()
+LENGTHS = (30, 120, 500, 2000)
+
+
+def old_checks(text: str) -> None:
+    """The substring checks on_message used to run, one helper at a time."""
+    lower = text.lower().strip()
+    "$shutup" in lower or ("toast" in lower and any(phrase in lower for phrase in SHUTUP_PHRASES))
+    any(phrase in lower for phrase in UNMUTE_PHRASES)
+    lower.startswith("$kalshi")
+    "kalshi balance" in lower or "pretend kalshi account" in lower or "how much money" in lower
+    "betting history" in lower or "history" in lower and "bet" in lower
+    re.search(r"transfer\s+\$?(\d+(?:\.\d+)?)\s+to\s+([a-zA-Z0-9_\-]+)", text, flags=re.IGNORECASE)
+    re.search(r"reset\s+kalshi\s+balance(?:\s+for\s+(.+))?", text, flags=re.IGNORECASE)
+    re.search(r"clear\s+my\s+bets|clear\s+(.+)\s+bets", text, flags=re.IGNORECASE)
+    any(phrase in lower for phrase in REAL_LIFE_ACTIVITY_WORDS) or any(place in lower for place in REAL_LIFE_VENUES)
+    "toast" in lower
+
+
+def message(length: int, rng: random.Random, tail: str = "") -> str:
+    text = ""
+    while len(text) < length - len(tail):
+        text += rng.choice(WORDS) + " "
+    return text[: length - len(tail)] + tail
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'chars':>6} {'case':>10} {'old checks':>12} {'router':>10} {'speedup':>8}")
+    for length in LENGTHS:
+        for case, tail in (("no phrase", ""), ("phrases", " toast bet history")):
+            text = message(length, rng, tail)
+            old = min(timeit.repeat(lambda: old_checks(text), number=args.repeat, repeat=3)) / args.repeat
+            new = min(timeit.repeat(lambda: message_intents.classify(text), number=args.repeat, repeat=3)) / args.repeat
+            print(f"{length:6d} {case:>10} {old * 1e6:10.1f}us {new * 1e6:8.1f}us {old / new:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Micro-benchmark the token-budget prompt assembler against the old character trimming.
+
+Builds reply prompts from a synthetic channel history (with multi-line
+messages and personal memory context) and reports, for each builder, time
+per prompt, estimated tokens, history turns included, history lines cut
+mid-way, and how often the current message is repeated.
+
+Usage:
+    python benchmarks/prompt_assembler_benchmark.py [--turns 200] [--budget 3000]
+"""
+
+import argparse
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from toaster.llm_agents.agent_utils import (  # noqa: E402
+    assemble_prompt,
+    estimate_tokens,
+    get_default_system_prompt,
+    prune_history,
+    split_turns,
+)
+
+WORDS = "the game was great last night did you see that touchdown pass from the quarterback lol no way braves win again".split()
+
+
+def synthetic_history(turns: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    start = datetime(2026, 7, 13, 18, 0, 0)
+    lines = []
+    for i in range(turns):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 60)))
+        if rng.random() < 0.15:
+            text += "\n" + " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 20)))
+        stamp = (start + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S UTC")
+        lines.append(f"[{stamp}] User{rng.randint(1, 6)}: {text}")
+    return "\n".join(lines)
+
+
+def old_build_prompt(history: str, message: str, memory_context: str, max_total_chars: int = 3000) -> str:
+    """The previous character-count builder, kept here for comparison."""
+    budget_for_history = max_total_chars - max(21, int(len(message) * 0.2))
+    reply_to = f"Reply to the following message: {message.strip()}"
+    conversation = f"{prune_history(history, budget_for_history)}\n{reply_to}".strip()
+    if len(conversation) > max_total_chars:
+        conversation = conversation[-max_total_chars:]
+    parts = [get_default_system_prompt(), "Personal context about the person you are replying to:", memory_context, conversation, reply_to]
+    return "\n\n".join(part for part in parts if part)
+
+
+def new_build_prompt(history: str, message: str, memory_context: str, max_tokens: int) -> str:
+    return assemble_prompt(get_default_system_prompt(), message, history=history, memory_context=memory_context, max_tokens=max_tokens).text
+
+
+def describe(name: str, build, history: str, message: str, memory: str, repeat: int) -> None:
+    prompt = build()
+    seconds = min(timeit.repeat(build, number=repeat, repeat=3)) / repeat
+    turns = split_turns(history)
+    included = sum(1 for turn in turns if turn in prompt)
+    # A turn is cut if only its start or its end made it into the prompt
+    cut = sum(1 for turn in turns if turn not in prompt and (turn[:30] in prompt or turn[-30:] in prompt))
+    print(f"{name}:")
+    print(f"  Time per prompt:        {seconds * 1e6:8.1f} us")
+    print(f"  Estimated tokens:       {estimate_tokens(prompt):8d} ({len(prompt)} chars)")
+    print(f"  History turns included: {included:8d} of {len(turns)}")
+    print(f"  Turns cut mid-line:     {cut:8d}")
+    print(f"  Message repeated:       {prompt.count(message):8d}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=3000, help="token budget for the assembler")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    history = synthetic_history(args.turns)
+    message = "toast who do you think wins the game tonight and why"
+    memory = "\n".join(f"- fact {i}: likes the braves and college football" for i in range(12))
+
+    describe("Old (3000 chars)", lambda: old_build_prompt(history, message, memory), history, message, memory, args.repeat)
+    describe(f"Assembler ({args.budget} tokens)", lambda: new_build_prompt(history, message, memory, args.budget), history, message, memory, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
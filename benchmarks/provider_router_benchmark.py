@@ -0,0 +1,131 @@
+"""
+Simulate reply latency with and without the provider router.
+
+Two simulated providers with heavy-tailed latencies answer a stream of
+requests. Reports p50/p90/p99 reply latency for:
+
+- the old single-provider path (Gemini only, six attempts with 2-32 s backoff)
+- the router with failover only
+- the router with failover and hedging
+
+in a normal period and during a Gemini outage. Simulated seconds are
+scaled down by --time-scale, and --concurrency requests run at once, so the
+run takes well under a minute.
+
+Usage:
+    python benchmarks/provider_router_benchmark.py [--requests 400] [--concurrency 20] [--time-scale 0.01]
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from toaster.llm_agents import router as router_module  # noqa: E402
+from toaster.llm_agents.router import AllProvidersFailed, Provider, ProviderRouter, ReplyRequest  # noqa: E402
+
+REQUEST = ReplyRequest("", "who wins tonight?")
+
+
+class SimulatedProvider:
+    """Lognormal latency with an occasional slow tail; optionally down."""
+
+    def __init__(self, name: str, median: float, tail_chance: float, tail_factor: float, scale: float, seed: int):
+        self.name = name
+        self.median = median
+        self.tail_chance = tail_chance
+        self.tail_factor = tail_factor
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.down = False
+
+    def latency(self) -> float:
+        seconds = self.median * self.rng.lognormvariate(0, 0.35)
+        if self.rng.random() < self.tail_chance:
+            seconds *= self.tail_factor
+        return seconds
+
+    async def complete(self, request: ReplyRequest) -> str:
+        if self.down:
+            # Overloaded APIs tend to fail after a while rather than instantly
+            await asyncio.sleep(1.0 * self.scale)
+            raise RuntimeError("503 model overloaded")
+        await asyncio.sleep(self.latency() * self.scale)
+        return f"{self.name} reply"
+
+
+async def old_path(gemini: SimulatedProvider, scale: float) -> None:
+    """The previous get_gemini_response_async loop: six attempts, sleeping 2, 4, 8, 16, 32 s between them."""
+    for attempt in range(6):
+        try:
+            await gemini.complete(REQUEST)
+            return
+        except RuntimeError:
+            if attempt == 5:
+                raise
+            await asyncio.sleep(2 ** (attempt + 1) * scale)
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return [ordered[min(len(ordered) - 1, int(p * len(ordered)))] for p in (0.5, 0.9, 0.99)]
+
+
+async def measure(call, requests: int, concurrency: int, scale: float):
+    latencies, failures = [], 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        nonlocal failures
+        async with slots:
+            started = time.perf_counter()
+            try:
+                await call()
+            except (RuntimeError, AllProvidersFailed):
+                failures += 1
+            latencies.append((time.perf_counter() - started) / scale)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return percentiles(latencies), failures
+
+
+async def run(args) -> None:
+    scale = args.time_scale
+    # Keep the router's hedge floor in simulated seconds too
+    router_module.MIN_HEDGE_DELAY_SECONDS = 1.0 * scale
+    router_module.DEFAULT_HEDGE_DELAY_SECONDS = {kind: delay * scale for kind, delay in router_module.DEFAULT_HEDGE_DELAY_SECONDS.items()}
+    router_module.CIRCUIT_BREAK_SECONDS = 60.0 * scale
+
+    for scenario in ("normal", "gemini outage"):
+        print(f"{scenario} ({args.requests} requests, simulated seconds):")
+        for label in ("single provider (old)", "router, failover only", "router, failover + hedging"):
+            gemini = SimulatedProvider("gemini", median=4.0, tail_chance=0.08, tail_factor=5.0, scale=scale, seed=1)
+            grok = SimulatedProvider("grok", median=5.0, tail_chance=0.08, tail_factor=5.0, scale=scale, seed=2)
+            gemini.down = scenario == "gemini outage"
+            if label.startswith("single"):
+                call = lambda: old_path(gemini, scale)  # noqa: E731
+            else:
+                router = ProviderRouter(
+                    [Provider("gemini", gemini.complete), Provider("grok", grok.complete)],
+                    hedge="hedging" in label,
+                )
+                call = lambda: router.complete(REQUEST)  # noqa: E731
+            (p50, p90, p99), failures = await measure(call, args.requests, args.concurrency, scale)
+            print(f"  {label:28s} p50 {p50:5.1f}s  p90 {p90:5.1f}s  p99 {p99:5.1f}s  failed {failures}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--time-scale", type=float, default=0.01, help="real seconds per simulated second")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pytest
+
+import toast
+
+
+class DummyChannel:
+    def __init__(self, channel_id, backlog):
+        self.id = channel_id
+        self.backlog = backlog
+        self.history_calls = 0
+
+    def history(self, limit, before):
+        self.history_calls += 1
+        earlier = [msg for msg in self.backlog if msg.id < before.id][-limit:]
+
+        async def iterate():
+            for msg in reversed(earlier):
+                yield msg
+
+        return iterate()
+
+
+def make_message(message_id, channel):
+    return SimpleNamespace(id=message_id, channel=channel, content=f"message {message_id}")
+
+
+@pytest.mark.asyncio
+async def test_recent_channel_messages_backfill_once_then_serve_from_cache(monkeypatch):
+    monkeypatch.setattr(toast, "recent_channel_messages", {})
+
+    channel = DummyChannel(5, [])
+    channel.backlog = [make_message(i, channel) for i in range(1, 21)]
+
+    current = make_message(21, channel)
+    toast.record_channel_message(current)
+    first = await toast.get_recent_channel_messages(current, limit=15)
+
+    assert [msg.id for msg in first] == list(range(6, 21))
+    assert channel.history_calls == 1
+
+    newer = make_message(22, channel)
+    toast.record_channel_message(newer)
+    second = await toast.get_recent_channel_messages(newer, limit=15)
+
+    assert [msg.id for msg in second] == list(range(7, 22))
+    assert channel.history_calls == 1
@@ -0,0 +1,42 @@
+import json
+import os
+
+from toaster import config
+
+
+def test_config_files_are_cached_until_they_change(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "_file_cache", {})
+    monkeypatch.setattr(config, "CONFIG_RECHECK_SECONDS", 0.0)
+    blacklist = tmp_path / "channel_blacklist.json"
+    blacklist.write_text(json.dumps({"channels": [{"id": 1, "nickname": "general"}]}))
+
+    reads = []
+    real_open = open
+
+    def counting_open(path, *args, **kwargs):
+        reads.append(str(path))
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", counting_open)
+
+    assert config.get_channel_blacklist_ids(str(tmp_path)) == {1}
+    assert config.get_channel_blacklist_ids(str(tmp_path)) == {1}
+    assert reads == [str(blacklist)]
+
+    blacklist.write_text(json.dumps({"channels": [1, {"id": 2}, 3]}))
+    stat = blacklist.stat()
+    os.utime(blacklist, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert config.get_channel_blacklist_ids(str(tmp_path)) == {1, 2, 3}
+    assert len(reads) == 2
+
+
+def test_owner_user_id_accessor_handles_missing_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "_file_cache", {})
+
+    assert config.get_owner_user_id(str(tmp_path)) is None
+
+    (tmp_path / "bot_config.json").write_text(json.dumps({"owner_user_id": "42"}))
+    config.invalidate_config_cache()
+
+    assert config.get_owner_user_id(str(tmp_path)) == 42
@@ -0,0 +1,37 @@
+import random
+from datetime import datetime
+
+from toaster.llm_agents.agent_utils import ConversationWindow, prune_history
+
+
+def _old_prune_history(history: str, max_chars: int) -> str:
+    lines = history.strip().split("\n")
+    while lines and len("\n".join(lines)) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+def test_prune_history_matches_previous_behaviour():
+    rng = random.Random(3)
+    for _ in range(200):
+        lines = ["x" * rng.randint(0, 40) for _ in range(rng.randint(1, 25))]
+        history = "\n".join(lines)
+        budget = rng.randint(0, 400)
+        assert prune_history(history, budget) == _old_prune_history(history, budget)
+
+
+def test_window_is_bounded_and_renders_newest_turns_within_budget():
+    window = ConversationWindow(max_turns=4, max_turn_chars=20)
+    stamp = datetime(2026, 1, 1)
+    for idx in range(6):
+        window.add("User", f"message {idx}", stamp)
+    window.add("AI", "y" * 100, stamp)
+
+    assert len(window) == 4
+    assert window.total_chars == sum(len(turn.render()) for turn in window)
+    assert [turn.content for turn in window][:3] == ["message 3", "message 4", "message 5"]
+    assert list(window)[-1].content == "y" * 17 + "..."
+
+    rendered = window.render()
+    assert prune_history(window, 60) == _old_prune_history(rendered, 60)
+    assert prune_history(ConversationWindow(), 60) == ""
@@ -0,0 +1,53 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import toast
+from toaster.expiring import ExpiringDict
+from toaster.llm_agents.agent_utils import ConversationWindow
+
+
+class DummyChannel:
+    id = 4242
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content):
+        self.sent.append(content)
+
+
+def make_message(channel, content):
+    return SimpleNamespace(author=SimpleNamespace(id=7, name="Sam"), channel=channel, content=content, attachments=[], embeds=[])
+
+
+@pytest.mark.asyncio
+async def test_queued_dm_reply_reads_history_when_it_runs(monkeypatch):
+    monkeypatch.setattr(toast, "conversation_history", ExpiringDict(max_keys=10))
+    monkeypatch.setattr(toast, "build_person_memory_context", lambda message, config_dir="config": "")
+    release_first = asyncio.Event()
+    seen_histories = []
+
+    async def fake_request_ai_response(channel, history, message, memory_context="", message_attachments=None):
+        # The window keeps growing after the call, so record what the prompt would see now
+        seen_histories.append((type(history), [turn.content for turn in history or []]))
+        if message == "first":
+            await release_first.wait()
+        return f"reply to {message}", False
+
+    monkeypatch.setattr(toast, "request_ai_response", fake_request_ai_response)
+    channel = DummyChannel()
+
+    first = asyncio.create_task(toast.handle_dm_response(make_message(channel, "first")))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(toast.handle_dm_response(make_message(channel, "second")))
+    await asyncio.sleep(0)
+    release_first.set()
+    await asyncio.gather(first, second)
+
+    assert seen_histories[0] == (type(None), [])
+    # The second reply was queued before the first exchange finished, but still sees it,
+    # and gets the window itself so providers can reuse its per-turn token counts
+    assert seen_histories[1] == (ConversationWindow, ["first", "reply to first"])
+    assert channel.sent == ["reply to first", "reply to second"]
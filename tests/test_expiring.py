@@ -0,0 +1,62 @@
+from toaster.expiring import ExpiringDict
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_expiring_dict_caps_keys_and_evicts_least_recently_used():
+    cache = ExpiringDict(max_keys=2, clock=FakeClock())
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache["a"] == 1  # touch "a" so "b" is now the oldest
+    cache["c"] = 3
+
+    assert set(cache) == {"a", "c"}
+    assert cache.evictions == 1
+
+
+def test_expiring_dict_idle_timeout_and_per_entry_ttl():
+    clock = FakeClock()
+    cache = ExpiringDict(max_keys=10, idle_seconds=60, clock=clock)
+    cache["busy"] = "x"
+    cache["quiet"] = "y"
+    cache.set("muted", True, ttl=10)
+
+    clock.now = 9
+    assert "muted" in cache
+    clock.now = 30
+    assert "muted" not in cache
+    assert len(cache) == 2  # the expired mute is not counted before the sweep
+    assert cache.get("busy") == "x"
+
+    clock.now = 75
+    assert cache.sweep() == 2  # "quiet" idle, "muted" past its ttl
+    assert list(cache) == ["busy"]
+    assert len(cache) == 1
+
+
+def test_uncapped_expiring_dict_only_drops_entries_by_ttl():
+    clock = FakeClock()
+    mutes = ExpiringDict(max_keys=None, clock=clock)
+    for channel_id in range(5000):
+        mutes.set(channel_id, True, ttl=60)
+
+    assert len(mutes) == 5000 and mutes.evictions == 0
+    clock.now = 61
+    assert 0 not in mutes and len(mutes) == 0
+
+
+def test_snapshot_items_report_time_left_before_idle_or_ttl_expiry():
+    clock = FakeClock()
+    cache = ExpiringDict(max_keys=10, idle_seconds=60, clock=clock)
+    cache["chat"] = "x"
+    cache.set("mute", True, ttl=100)
+    clock.now = 50
+
+    assert dict((key, ttl) for key, _, ttl in cache.snapshot_items()) == {"chat": 10, "mute": 10}
+    assert ExpiringDict(max_keys=1).snapshot_items() == []
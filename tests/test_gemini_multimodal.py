@@ -51,15 +51,13 @@ def test_build_gemini_prompt_enforces_consistent_discord_format_for_news_request
 
 
 def test_collect_message_attachments_reads_embedded_images(monkeypatch):
-    class DummyResponse:
-        def __init__(self):
-            self.content = b"embedded-image-bytes"
-            self.headers = {"content-type": "image/png"}
+    from toaster.http_client import HttpResponse
 
-        def raise_for_status(self):
-            return None
+    class DummyClient:
+        async def get(self, url, **kwargs):
+            return HttpResponse(200, url, {"content-type": "image/png"}, b"embedded-image-bytes")
 
-    monkeypatch.setattr("toaster.llm_agents.gemini.requests.get", lambda *args, **kwargs: DummyResponse())
+    monkeypatch.setattr("toaster.llm_agents.gemini.get_http_client", lambda: DummyClient())
 
     message = DummyMessage(
         content="Look at this",
@@ -72,3 +70,109 @@ def test_collect_message_attachments_reads_embedded_images(monkeypatch):
     assert payloads[0]["mime_type"] == "image/png"
     assert payloads[0]["data"] == b"embedded-image-bytes"
     assert payloads[0]["filename"].endswith("embed.png")
+
+
+def test_async_gemini_response_reuses_client_and_backs_off_without_blocking(monkeypatch):
+    from types import SimpleNamespace
+
+    from toaster.llm_agents import gemini
+
+    created = []
+    calls = {"count": 0}
+
+    class FakeAsyncModels:
+        async def generate_content(self, **kwargs):
+            calls["count"] += 1
+            if calls["count"] == 1:
+                raise RuntimeError("transient")
+            return SimpleNamespace(text="hello from gemini")
+
+    class FakeClient:
+        def __init__(self, api_key):
+            created.append(api_key)
+            self.aio = SimpleNamespace(models=FakeAsyncModels())
+
+    fake_types = SimpleNamespace(
+        Part=SimpleNamespace(from_bytes=lambda data, mime_type: (data, mime_type)),
+        GenerateContentConfig=lambda **kwargs: kwargs,
+        Tool=lambda **kwargs: kwargs,
+        GoogleSearch=lambda: {},
+    )
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(gemini, "genai", SimpleNamespace(Client=FakeClient))
+    monkeypatch.setattr(gemini, "types", fake_types)
+    monkeypatch.setattr(gemini, "_clients", {})
+    monkeypatch.setattr(gemini.asyncio, "sleep", fake_sleep)
+
+    async def run_twice():
+        first = await gemini.get_gemini_response_async("", "hi", "key-1")
+        second = await gemini.get_gemini_response_async("", "hi again", "key-1")
+        return first, second
+
+    first, second = asyncio.run(run_twice())
+
+    assert first == ("hello from gemini", None)
+    assert second == ("hello from gemini", None)
+    assert created == ["key-1"]
+    assert sleeps == [2]
+
+
+def test_collect_message_attachments_fetches_concurrently_within_budget_and_caches(monkeypatch):
+    from toaster.llm_agents import gemini
+    from toaster.llm_agents.image_cache import ImageBlobCache
+
+    cache = ImageBlobCache()
+    monkeypatch.setattr(gemini, "get_image_cache", lambda: cache)
+    reads = []
+    in_flight = 0
+    peak = 0
+
+    class SizedAttachment(DummyAttachment):
+        def __init__(self, attachment_id, data):
+            super().__init__(f"{attachment_id}.png", data, "image/png")
+            self.id = attachment_id
+            self.size = len(data)
+
+        async def read(self):
+            nonlocal in_flight, peak
+            reads.append(self.id)
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return self._data
+
+    newest = DummyMessage(attachments=[SizedAttachment(1, b"a" * 40), SizedAttachment(2, b"b" * 90)])
+    older = DummyMessage(attachments=[SizedAttachment(3, b"c" * 40), SizedAttachment(4, b"d" * 10), SizedAttachment(1, b"a" * 40)])
+
+    payloads = asyncio.run(collect_message_attachments([newest, older], max_images=2, max_total_bytes=100))
+
+    # #2 would blow the byte budget, the repeat of #1 is deduplicated, and #4 is past the image cap
+    assert [p["filename"] for p in payloads] == ["1.png", "3.png"]
+    assert sorted(reads) == [1, 3]
+    assert peak == 2
+
+    again = asyncio.run(collect_message_attachments([newest], max_images=1))
+    assert again[0]["data"] == b"a" * 40
+    assert sorted(reads) == [1, 3]
+
+
+def test_image_cache_shares_identical_blobs_and_evicts_least_recently_used():
+    from toaster.llm_agents.image_cache import ImageBlobCache
+
+    cache = ImageBlobCache(max_bytes=100)
+    cache.put("attachment:1", "image/png", b"x" * 60)
+    cache.put("url:https://cdn.example/x.png", "image/png", b"x" * 60)
+    assert cache.total_bytes == 60
+
+    cache.get("attachment:1")
+    cache.put("attachment:2", "image/png", b"y" * 50)
+
+    assert cache.get("url:https://cdn.example/x.png") is None
+    assert cache.get("attachment:1") is None  # evicted too: both keys share the blob, which had to go
+    assert cache.get("attachment:2") == ("image/png", b"y" * 50)
+    assert cache.total_bytes == 50
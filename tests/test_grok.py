@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from aiohttp import web
+
+from toaster.http_client import HttpClient
+from toaster.llm_agents import grok
+
+
+async def _serve(handler):
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v1/chat/completions"
+
+
+@pytest.mark.asyncio
+async def test_grok_retries_rate_limits_and_returns_the_reply(monkeypatch):
+    calls = []
+
+    async def handler(request):
+        calls.append(await request.json())
+        if len(calls) == 1:
+            return web.Response(status=429, headers={"Retry-After": "0"})
+        return web.json_response({"choices": [{"message": {"content": "Braves in 5"}}]})
+
+    runner, url = await _serve(handler)
+    monkeypatch.setattr(grok, "GROK_API_URL", url)
+    client = HttpClient()
+    try:
+        response, error = await grok.get_grok_response_async(
+            "", "who wins?", "key", memory_context="- likes the Braves", client=client
+        )
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+    assert (response, error) == ("Braves in 5", None)
+    assert len(calls) == 2
+    assert "likes the Braves" in json.dumps(calls[-1]["messages"])
+
+
+@pytest.mark.asyncio
+async def test_grok_reports_client_errors_without_retrying(monkeypatch):
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        return web.Response(status=401, text="bad key")
+
+    runner, url = await _serve(handler)
+    monkeypatch.setattr(grok, "GROK_API_URL", url)
+    client = HttpClient()
+    try:
+        response, error = await grok.get_grok_response_async("", "hi", "key", client=client)
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+    assert response is None
+    assert "401" in error and "bad key" in error
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_grok_streams_server_sent_event_deltas(monkeypatch):
+    async def handler(request):
+        assert (await request.json())["stream"] is True
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        for event in (
+            ": keep-alive",
+            "data: " + json.dumps({"choices": [{"delta": {"role": "assistant"}}]}),
+            "data: " + json.dumps({"choices": [{"delta": {"content": "Hello"}}]}),
+            "data: " + json.dumps({"choices": [{"delta": {"content": " there"}}]}),
+            "data: [DONE]",
+        ):
+            await resp.write(f"{event}\n\n".encode())
+        await resp.write_eof()
+        return resp
+
+    runner, url = await _serve(handler)
+    monkeypatch.setattr(grok, "GROK_API_URL", url)
+    client = HttpClient()
+    try:
+        chunks = [chunk async for chunk in grok.stream_grok_response("", "hi", "key", client=client)]
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+    assert chunks == ["Hello", " there"]
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from toaster import http_client, state
+from toaster.http_client import HttpClient, HttpStatusError, ResponseTooLarge, parse_retry_after
+
+
+async def _serve(handler):
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+@pytest.mark.asyncio
+async def test_client_retries_retryable_statuses_and_caps_per_host_concurrency():
+    calls = {"flaky": 0}
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        if request.path == "/flaky":
+            calls["flaky"] += 1
+            if calls["flaky"] == 1:
+                return web.Response(status=503, headers={"Retry-After": "0"})
+            return web.json_response({"ok": True})
+        if request.path == "/missing":
+            return web.Response(status=404)
+        if request.path == "/big":
+            return web.Response(body=b"x" * 2048)
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        return web.Response(text="slow")
+
+    runner, base = await _serve(handler)
+    client = HttpClient(max_per_host=2)
+    try:
+        assert await client.get_json(f"{base}/flaky") == {"ok": True}
+        assert calls["flaky"] == 2
+
+        with pytest.raises(HttpStatusError) as excinfo:
+            await client.get(f"{base}/missing")
+        assert excinfo.value.status == 404
+
+        with pytest.raises(ResponseTooLarge):
+            await client.get(f"{base}/big", max_bytes=1024)
+
+        texts = await asyncio.gather(*(client.get_text(f"{base}/slow") for _ in range(6)))
+        assert texts == ["slow"] * 6
+        assert peak == 2
+
+        (host, stats), = client.stats()
+        assert stats["retries"] == 1
+        assert stats["requests"] == 10
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+def test_parse_retry_after_accepts_seconds_and_http_dates():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+
+def test_session_from_a_previous_loop_is_closed():
+    client = HttpClient()
+
+    async def open_session():
+        return await client._get_session()
+
+    first = asyncio.run(open_session())
+    second = asyncio.run(open_session())
+    assert first.closed and first is not second
+    asyncio.run(client.close())
+
+
+@pytest.mark.asyncio
+async def test_shared_client_is_closed_by_async_shutdown_hooks(monkeypatch):
+    monkeypatch.setattr(http_client, "_client", None)
+    monkeypatch.setattr(state, "_async_shutdown_hooks", [])
+
+    session = await http_client.get_http_client()._get_session()
+    await state.run_async_shutdown_hooks()
+
+    assert session.closed
+
+
+@pytest.mark.asyncio
+async def test_scrape_returns_error_pages_instead_of_raising(monkeypatch):
+    from toaster.modules import pollen, webscraper
+
+    async def handler(request):
+        return web.Response(status=404, text="<html>no counts today</html>")
+
+    runner, base = await _serve(handler)
+    client = HttpClient()
+    monkeypatch.setattr(webscraper, "get_http_client", lambda: client)
+    try:
+        assert await webscraper.scrape(f"{base}/pollen_counts") == "<html>no counts today</html>"
+
+        # $pollen reports the upstream failure instead of raising
+        scrape = webscraper.scrape
+        monkeypatch.setattr(webscraper, "scrape", lambda url: scrape(url.replace("https://www.atlantaallergy.com", base)))
+        assert await pollen.result_handler() == "HTML Parsing Error"
+    finally:
+        await client.close()
+        await runner.cleanup()
@@ -0,0 +1,69 @@
+import asyncio
+import io
+import random
+
+import pytest
+
+from toaster.llm_agents import image_processing
+from toaster.llm_agents.image_cache import ImageBlobCache
+from toaster.llm_agents.image_processing import prepare_images
+
+
+@pytest.fixture
+def fresh_caches(monkeypatch):
+    cache = ImageBlobCache()
+    monkeypatch.setattr(image_processing, "get_image_cache", lambda: cache)
+    monkeypatch.setattr(image_processing, "_dhashes", image_processing.ExpiringDict(max_keys=64))
+    return cache
+
+
+def _photo(seed, size, quality=95):
+    from PIL import Image
+
+    rng = random.Random(seed)
+    small = Image.new("RGB", (16, 12))
+    small.putdata([(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(16 * 12)])
+    buffer = io.BytesIO()
+    small.resize(size, Image.BICUBIC).save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def test_large_images_are_downscaled_and_resized_reposts_dropped(fresh_caches, monkeypatch):
+    pytest.importorskip("PIL")
+    from PIL import Image
+
+    big = _photo(1, (3000, 2000))
+    repost = _photo(1, (600, 400), quality=70)
+    other = _photo(2, (600, 400))
+    payloads = [
+        {"filename": "big.jpg", "mime_type": "image/jpeg", "data": big},
+        {"filename": "repost.jpg", "mime_type": "image/jpeg", "data": repost},
+        {"filename": "other.jpg", "mime_type": "image/jpeg", "data": other},
+    ]
+
+    prepared = asyncio.run(prepare_images(payloads))
+
+    assert [p["filename"] for p in prepared] == ["big.jpg", "other.jpg"]
+    with Image.open(io.BytesIO(prepared[0]["data"])) as image:
+        assert max(image.size) == image_processing.MAX_IMAGE_DIMENSION
+    # Small images are uploaded untouched
+    assert prepared[1]["data"] == other
+
+    def fail(*args):
+        raise AssertionError("processed images should come from the cache")
+
+    monkeypatch.setattr(image_processing, "process_image", fail)
+    assert asyncio.run(prepare_images(payloads)) == prepared
+
+
+def test_without_pillow_only_identical_images_are_dropped(fresh_caches, monkeypatch):
+    monkeypatch.setattr(image_processing, "Image", None)
+    payloads = [
+        {"filename": "a.png", "mime_type": "image/png", "data": b"same"},
+        {"filename": "b.png", "mime_type": "image/png", "data": b"same"},
+        {"filename": "c.png", "mime_type": "image/png", "data": b"different"},
+    ]
+
+    prepared = asyncio.run(prepare_images(payloads))
+
+    assert [(p["filename"], p["data"]) for p in prepared] == [("a.png", b"same"), ("c.png", b"different")]
@@ -0,0 +1,43 @@
+import random
+
+from toaster.intents import IntentRouter, PhraseMatcher
+from toast import REAL_LIFE_ACTIVITY_WORDS, REAL_LIFE_VENUES, is_real_life_plan, is_shutup_command, is_unmute_command, message_intents
+
+
+def test_phrase_matcher_agrees_with_substring_search():
+    phrases = {"he": "a", "she": "b", "his": "c", "hers": "d", "toast": "e", "a toast": "e", "toast you can talk": "f", "st": "g"}
+    matcher = PhraseMatcher()
+    for phrase, label in phrases.items():
+        matcher.add(phrase, label)
+
+    rng = random.Random(7)
+    alphabet = "hesirtoa yuckln"
+    for _ in range(500):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        expected = {label for phrase, label in phrases.items() if phrase in text}
+        assert matcher.labels(text) == expected, text
+
+
+def test_pattern_intents_only_run_when_anchored():
+    router = IntentRouter()
+    router.add_phrases("greeting", ["hello"])
+    router.add_pattern("transfer", r"transfer\s+(\d+)", anchors=["transfer"])
+
+    intents = router.classify("Hello, please TRANSFER 20 now")
+    assert "greeting" in intents and "transfer" in intents
+    assert intents.match("transfer").group(1) == "20"
+    assert router.classify("transfers are great").names == frozenset()
+
+
+def test_message_intents_keep_existing_command_semantics():
+    assert is_shutup_command("Toast, shut up")
+    assert is_shutup_command("$shutup")
+    assert not is_shutup_command("shut up everyone")
+    assert is_unmute_command("okay toast you can talk again")
+    assert not is_unmute_command("toast talk to me")
+    for phrase in REAL_LIFE_ACTIVITY_WORDS + REAL_LIFE_VENUES:
+        assert is_real_life_plan(f"so {phrase} later?")
+
+    intents = message_intents.classify("can I see my betting history")
+    assert "betting_history" in intents
+    assert intents.match("kalshi_transfer") is None
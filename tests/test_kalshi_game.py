@@ -1,11 +1,17 @@
+import asyncio
 import json
 from pathlib import Path
 
+import pytest
+
 from toaster.kalshi_game import (
     DEFAULT_STARTING_BALANCE,
+    fetch_markets,
+    format_history,
     parse_kalshi_bet_message,
     place_bet,
     transfer_funds,
+    pending_tickers,
     resolve_pending_bets,
 )
 
@@ -54,20 +60,55 @@ def test_place_bet_and_transfer_update_balance(tmp_path):
     assert state["users"]["user_u2"]["balance"] == DEFAULT_STARTING_BALANCE + 15.0 - 5.0
 
 
-def test_resolve_pending_bet_updates_state_and_notifies(tmp_path, monkeypatch):
+@pytest.mark.asyncio
+async def test_resolve_pending_bet_updates_state_and_notifies(tmp_path):
     state = {"users": {}}
     place_bet(state, "u1", "Alice", 123, "https://kalshi.com/markets/x/y", 10.0, "france")
 
-    class FakeMarket:
-        def __init__(self):
-            self.data = {"status": "resolved", "result": "france"}
-
-    monkeypatch.setattr("toaster.kalshi_game.fetch_market_data", lambda *args, **kwargs: FakeMarket().data)
-
     bot = DummyBot()
-    resolved = resolve_pending_bets(state, bot=bot)
+    resolved = resolve_pending_bets(state, markets={"y": {"status": "resolved", "result": "france"}}, bot=bot)
+    # Let the scheduled DM go out
+    await asyncio.sleep(0)
 
     assert resolved[0]["won"] is True
     assert state["users"]["user_u1"]["balance"] == DEFAULT_STARTING_BALANCE
     assert state["users"]["user_u1"]["pending_bets"] == []
     assert bot.sent
+    assert "- y resolved france: won $10.00" in format_history(state["users"]["user_u1"])
+
+
+def test_format_history_header_counts_only_rendered_entries():
+    user = {"bet_history": [{"type": "unknown"}] + [
+        {"type": "bet_result", "ticker": f"t{idx}", "outcome": "yes", "won": False, "payout": 0} for idx in range(3)
+    ]}
+
+    text = format_history(user, limit=3)
+
+    assert text.splitlines()[0] == "Betting history (most recent 3):"
+    assert text.count("resolved yes: lost") == 3
+    assert format_history({"bet_history": [{"type": "unknown"}]}) == "No betting history yet."
+
+
+@pytest.mark.asyncio
+async def test_fetch_markets_fetches_each_ticker_once(monkeypatch):
+    state = {"users": {}}
+    for idx in range(5):
+        place_bet(state, f"u{idx}", f"User {idx}", 123, "https://kalshi.com/markets/x/shared-ticker", 10.0, "yes")
+    place_bet(state, "u0", "User 0", 123, "https://kalshi.com/markets/x/other-ticker", 10.0, "no")
+
+    calls = []
+
+    async def fake_fetch(ticker):
+        calls.append(ticker)
+        return {"status": "open", "close_time": "2999-01-01T00:00:00Z"}
+
+    monkeypatch.setattr("toaster.kalshi_game.fetch_market_data", fake_fetch)
+    monkeypatch.setattr("toaster.kalshi_game._market_cache", {})
+
+    markets = await fetch_markets(pending_tickers(state))
+    assert resolve_pending_bets(state, markets=markets) == []
+    assert sorted(calls) == ["other-ticker", "shared-ticker"]
+
+    # Far-future markets are served from the cache on the next cycle
+    await fetch_markets(pending_tickers(state))
+    assert len(calls) == 2
@@ -0,0 +1,150 @@
+import json
+
+import pytest
+
+from toaster.kalshi_game import DEFAULT_STARTING_BALANCE, format_history, place_bet, reset_user_balance, resolve_pending_bets, transfer_funds
+from toaster.kalshi_store import KalshiStore
+
+
+def test_store_round_trip_and_stale_copies_do_not_clobber(tmp_path):
+    store = KalshiStore(tmp_path / "kalshi.db")
+
+    state = store.load_state()
+    place_bet(state, "u1", "Alice", 1, "https://kalshi.com/markets/x/ticker-a", 10.0, "yes")
+    store.save_state(state)
+
+    # The resolution loop holds an older view while a handler places another bet
+    stale = store.load_state()
+    stale["users"]["user_u1"]
+    handler = store.load_state()
+    place_bet(handler, "u2", "Bob", 1, "https://kalshi.com/markets/x/ticker-b", 5.0, "no")
+    store.save_state(handler)
+    store.save_state(stale)
+
+    fresh = store.load_state()
+    assert fresh["users"]["user_u1"]["balance"] == DEFAULT_STARTING_BALANCE - 10.0
+    assert fresh["users"]["user_u2"]["pending_bets"][0]["ticker"] == "ticker-b"
+    assert fresh["users"]["user_u2"]["bet_history"][0]["type"] == "bet"
+    assert fresh.get("users").pending_tickers() == {"ticker-a", "ticker-b"}
+
+    transfer_funds(fresh, "u1", "u2", 3.0)
+    store.save_state(fresh)
+    store.save_state(fresh)  # saving again must not duplicate history
+    again = store.load_state()
+    assert len(again["users"]["user_u1"]["bet_history"]) == 2
+    assert again["users"]["user_u2"]["balance"] == DEFAULT_STARTING_BALANCE - 5.0 + 3.0
+
+    reset_user_balance(again, "u1", "Alice")
+    store.save_state(again)
+    assert store.load_state()["users"]["user_u1"]["bet_history"] == []
+
+
+def test_resolution_only_loads_users_with_matching_bets(tmp_path):
+    store = KalshiStore(tmp_path / "kalshi.db")
+    state = store.load_state()
+    place_bet(state, "u1", "Alice", 1, "https://kalshi.com/markets/x/done", 10.0, "yes")
+    place_bet(state, "u2", "Bob", 1, "https://kalshi.com/markets/x/open", 10.0, "yes")
+    store.save_state(state)
+
+    state = store.load_state()
+    resolved = resolve_pending_bets(state, markets={"done": {"status": "resolved", "result": "yes"}})
+    assert [item["user_id"] for item in resolved] == ["u1"]
+    assert list(state["users"]._loaded) == ["user_u1"]
+    store.save_state(state)
+
+    assert store.load_state()["users"].pending_tickers() == {"open"}
+
+
+def test_legacy_json_state_is_migrated_once(tmp_path):
+    legacy = tmp_path / "kalshi_game_state.json"
+    legacy.write_text(json.dumps({"users": {"user_u1": {
+        "user_id": "u1",
+        "display_name": "Alice",
+        "balance": 42.0,
+        "pending_bets": [{"ticker": "abc", "amount": 1.0}],
+        "bet_history": [{"type": "bet", "amount": 1.0}],
+        "transfers": [],
+    }}}), encoding="utf-8")
+
+    store = KalshiStore(tmp_path / "kalshi.db", legacy_json=legacy)
+
+    user = store.load_state()["users"]["user_u1"]
+    assert user["balance"] == 42.0
+    assert user["bet_history"] == [{"type": "bet", "amount": 1.0}]
+    assert not legacy.exists()
+    assert (tmp_path / "kalshi_game_state.json.migrated").exists()
+
+
+def test_history_is_paginated_and_survives_resets_as_ledger(tmp_path, monkeypatch):
+    monkeypatch.setattr("toaster.kalshi_store.SNAPSHOT_EVERY_ENTRIES", 3)
+    store = KalshiStore(tmp_path / "kalshi.db")
+    state = store.load_state()
+    for idx in range(7):
+        place_bet(state, "u1", "Alice", 1, f"https://kalshi.com/markets/x/t{idx}", 1.0, "yes")
+    store.save_state(state)
+
+    user = store.load_state()["users"]["user_u1"]
+    page, cursor = user.history(limit=3)
+    assert [entry["ticker"] for entry in page] == ["t4", "t5", "t6"]
+    older, cursor = user.history(limit=3, before=cursor)
+    assert [entry["ticker"] for entry in older] == ["t1", "t2", "t3"]
+    oldest, cursor = user.history(limit=3, before=cursor)
+    assert [entry["ticker"] for entry in oldest] == ["t0"] and cursor is None
+    assert user.history(since=page[0]["ts"] + 3600)[0] == []
+
+    text = format_history(user, limit=3)
+    assert text.startswith("Betting history (most recent 3):")
+    assert "t6" in text and "t3" not in text
+    assert store.balance_snapshots("user_u1")[-1]["balance"] == DEFAULT_STARTING_BALANCE - 7.0
+
+    state = store.load_state()
+    reset_user_balance(state, "u1", "Alice")
+    store.save_state(state)
+    user = store.load_state()["users"]["user_u1"]
+    assert user.history() == ([], None)
+    assert store.balance_snapshots("user_u1")[-1]["balance"] == DEFAULT_STARTING_BALANCE
+    # Old entries remain in the ledger, hidden behind the reset marker
+    assert store._conn.execute("SELECT COUNT(*) FROM history WHERE user_key = 'user_u1'").fetchone()[0] == 8
+
+
+def test_bets_and_transfers_append_without_reading_history(tmp_path, monkeypatch):
+    store = KalshiStore(tmp_path / "kalshi.db")
+    state = store.load_state()
+    for idx in range(3):
+        place_bet(state, "u1", "Alice", 1, f"https://kalshi.com/markets/x/t{idx}", 1.0, "yes")
+    transfer_funds(state, "u1", "u2", 5.0)
+    store.save_state(state)
+
+    reads = []
+    read_history = store._read_history
+    monkeypatch.setattr(store, "_read_history", lambda *args: reads.append(args) or read_history(*args))
+
+    state = store.load_state()
+    place_bet(state, "u1", "Alice", 1, "https://kalshi.com/markets/x/t3", 1.0, "yes")
+    transfer_funds(state, "u1", "u2", 2.0)
+    store.save_state(state)
+    assert reads == []
+
+    user = store.load_state()["users"]["user_u1"]
+    assert [entry.get("ticker") for entry in user["bet_history"]][-2:] == ["t3", None]
+    assert len(user["transfers"]) == 2
+    assert reads == [("user_u1", "bet_history"), ("user_u1", "transfers")]
+
+
+def test_resolution_appends_through_the_store_and_keeps_hot_state_small(tmp_path, monkeypatch):
+    store = KalshiStore(tmp_path / "kalshi.db")
+    state = store.load_state()
+    for idx in range(20):
+        place_bet(state, "u1", "Alice", 1, f"https://kalshi.com/markets/x/t{idx}", 1.0, "yes")
+    store.save_state(state)
+    monkeypatch.setattr(store, "_read_history", lambda *args: pytest.fail(f"history read: {args}"))
+
+    state = store.load_state()
+    resolve_pending_bets(state, markets={"t0": {"status": "resolved", "result": "yes"}})
+    store.save_state(state)
+
+    user = state["users"]["user_u1"]
+    assert user["bet_history"].pending == []
+    assert user["bet_history"]._saved is None
+    page, _ = user.history(limit=1)
+    assert page[0]["type"] == "bet_result" and page[0]["ticker"] == "t0"
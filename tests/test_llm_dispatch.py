@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from toaster.llm_agents.dispatch import COALESCED, LLMDispatcher
+
+
+@pytest.mark.asyncio
+async def test_burst_in_one_conversation_collapses_into_single_request():
+    dispatcher = LLMDispatcher(max_concurrent=1)
+    release = asyncio.Event()
+    batches = []
+
+    async def runner(batch):
+        batches.append(list(batch))
+        await release.wait()
+        return f"reply to {batch[-1]}"
+
+    first = asyncio.create_task(dispatcher.submit("channel_1", "m1", runner))
+    await asyncio.sleep(0)
+    # m2..m4 arrive while m1 is in flight and collapse into one follow-up request
+    later = [asyncio.create_task(dispatcher.submit("channel_1", f"m{i}", runner)) for i in range(2, 5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(first, *later)
+
+    assert batches == [["m1"], ["m2", "m3", "m4"]]
+    assert results == ["reply to m1", COALESCED, COALESCED, "reply to m4"]
+    assert dispatcher.stats()["messages_coalesced"] == 2
+
+
+@pytest.mark.asyncio
+async def test_global_concurrency_cap_is_respected():
+    dispatcher = LLMDispatcher(max_concurrent=2)
+    running = 0
+    peak = 0
+
+    async def runner(batch):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return batch[-1]
+
+    results = await asyncio.gather(*(dispatcher.submit(f"user_{i}", i, runner) for i in range(6)))
+
+    assert results == list(range(6))
+    assert peak == 2
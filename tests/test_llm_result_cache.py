@@ -0,0 +1,53 @@
+from toaster import tweet_watcher
+from toaster.llm_agents.result_cache import MISS, LLMResultCache
+
+
+def test_result_cache_normalizes_inputs_and_persists(tmp_path):
+    path = tmp_path / "cache.tsv"
+    cache = LLMResultCache("test_persist", max_entries=2, path=path)
+    key = LLMResultCache.make_key("model", "Big  Win for   Georgia https://t.co/abc")
+
+    assert cache.get(key) is MISS
+    cache.set(key, True)
+    assert cache.get(LLMResultCache.make_key("model", "big win for georgia https://t.co/xyz")) is True
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    cache.set("b", False)
+    cache.set("c", None)
+    assert cache.get(key) is MISS  # evicted as least recently used
+
+    cache.save()
+    reloaded = LLMResultCache("test_reload", path=path)
+    assert reloaded.get("b") is False
+    assert reloaded.get("c") is None
+
+
+def test_college_football_classification_is_cached_by_tweet_text(monkeypatch):
+    calls = []
+
+    def fake_gemini(history, message, config_path):
+        calls.append(message)
+        return "yes", None
+
+    monkeypatch.setattr("toaster.llm_agents.gemini.get_gemini_response_with_key", fake_gemini)
+    monkeypatch.setattr(tweet_watcher, "CFB_CLASSIFICATION_CACHE", LLMResultCache("test_cfb"))
+
+    assert tweet_watcher._is_college_football_related("Five-star QB commits to Georgia") is True
+    assert tweet_watcher._is_college_football_related("five-star QB  commits to Georgia ") is True
+    assert len(calls) == 1
+
+
+def test_failed_save_leaves_no_temp_file_and_retries(tmp_path, monkeypatch):
+    cache = LLMResultCache("atomic", path=tmp_path / "cache.tsv")
+    cache.set("key", {"verdict": True})
+
+    def broken_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("toaster.state.os.replace", broken_replace)
+    cache.save()
+    assert list(tmp_path.iterdir()) == []
+
+    monkeypatch.undo()
+    cache.save()
+    assert [path.name for path in tmp_path.iterdir()] == ["cache.tsv"]
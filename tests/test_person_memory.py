@@ -97,3 +97,52 @@ def test_person_memory_context_only_includes_relevant_people(tmp_path):
     assert "Ava" in context
     assert "Ben" in context
     assert "Charlie" not in context
+
+
+def test_person_memory_store_defers_writes_inside_event_loop(tmp_path):
+    import asyncio
+    import json
+
+    from toaster.person_memory import PersonMemoryStore
+
+    config_dir = tmp_path / "config"
+    store = PersonMemoryStore(config_dir, flush_delay=60)
+    memory_path = config_dir / "person_memory.json"
+
+    async def burst():
+        for idx in range(5):
+            store.set(f"user_{idx}", {"display_name": f"Person {idx}", "facts": []})
+        return memory_path.exists()
+
+    written_during_burst = asyncio.run(burst())
+    assert written_during_burst is False
+
+    store.flush()
+    saved = json.loads(memory_path.read_text(encoding="utf-8"))
+    assert sorted(saved) == [f"user_{idx}" for idx in range(5)]
+    assert not list(config_dir.glob("*.tmp"))
+
+
+def test_person_memory_context_matches_aliases_through_name_index(tmp_path):
+    import json
+
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    memory = {
+        "user_7": {
+            "user_id": 7,
+            "display_name": "Miles",
+            "aliases": ["Milo"],
+            "channels": [],
+            "facts": ["plays bass"],
+            "message_count": 3,
+            "last_seen": None,
+        },
+    }
+    (config_dir / "person_memory.json").write_text(json.dumps(memory), encoding="utf-8")
+
+    message = DummyMessage(DummyAuthor(42, "Drew"), DummyChannel(99, "general"), "Has anyone heard from Milo lately")
+    context = build_person_memory_context(message, config_dir=config_dir)
+
+    assert "Known about Miles" in context
+    assert "plays bass" in context
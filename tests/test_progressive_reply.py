@@ -0,0 +1,141 @@
+import discord
+import pytest
+
+from toaster.progressive_reply import ProgressiveReply
+
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+        self.edits = 0
+
+    async def edit(self, content):
+        self.content = content
+        self.edits += 1
+
+
+class FakeChannel:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content):
+        message = FakeMessage(content)
+        self.sent.append(message)
+        return message
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_progressive_reply_posts_first_chunk_then_rate_limits_edits():
+    channel = FakeChannel()
+    clock = FakeClock()
+    reply = ProgressiveReply(channel, edit_interval=1.0, clock=clock)
+
+    await reply.append("Hello")
+    assert [msg.content for msg in channel.sent] == ["Hello"]
+
+    clock.now = 0.5
+    await reply.append(" there")
+    assert channel.sent[0].content == "Hello"  # within the edit budget
+
+    clock.now = 1.6
+    await reply.append(", friend")
+    assert channel.sent[0].content == "Hello there, friend"
+
+    await reply.append("!")
+    assert await reply.finish() == "Hello there, friend!"
+    assert channel.sent[0].content == "Hello there, friend!"
+    assert channel.sent[0].edits == 2
+
+
+@pytest.mark.asyncio
+async def test_progressive_reply_rolls_over_at_the_message_limit():
+    channel = FakeChannel()
+    reply = ProgressiveReply(channel, limit=50, edit_interval=0.0)
+    words = [f"word{idx:02d} " for idx in range(30)]
+    for word in words:
+        await reply.append(word)
+    full = await reply.finish()
+
+    assert full == "".join(words)
+    assert len(channel.sent) > 1
+    assert all(len(msg.content) <= 50 for msg in channel.sent)
+    assert "".join(msg.content for msg in channel.sent) == full
+
+
+class FakeResponse:
+    status = 404
+    reason = "Not Found"
+
+
+class FlakyChannel(FakeChannel):
+    def __init__(self, fail_sends=0):
+        super().__init__()
+        self.fail_sends = fail_sends
+
+    async def send(self, content):
+        if self.fail_sends:
+            self.fail_sends -= 1
+            raise discord.HTTPException(FakeResponse(), "Cannot send messages")
+        return await super().send(content)
+
+
+@pytest.mark.asyncio
+async def test_deleted_message_continues_in_a_new_message():
+    channel = FakeChannel()
+    reply = ProgressiveReply(channel, edit_interval=0.0)
+    await reply.append("Hello")
+
+    async def deleted(content):
+        raise discord.NotFound(FakeResponse(), "Unknown Message")
+
+    channel.sent[0].edit = deleted
+    await reply.append(" there")
+
+    assert await reply.finish() == "Hello there"
+    assert [msg.content for msg in channel.sent] == ["Hello", "Hello there"]
+
+
+@pytest.mark.asyncio
+async def test_failed_send_is_retried_and_finish_does_not_raise():
+    channel = FlakyChannel(fail_sends=1)
+    reply = ProgressiveReply(channel, edit_interval=0.0)
+
+    await reply.append("Hello")
+    assert channel.sent == []
+    await reply.append(" there")
+    assert [msg.content for msg in channel.sent] == ["Hello there"]
+
+    async def broken(content):
+        raise RuntimeError("connection reset")
+
+    channel.sent[0].edit = broken
+    with pytest.raises(RuntimeError):
+        await reply.append("!")
+    # finish() runs in a finally block after such errors and must not raise a second one
+    assert await reply.finish() == "Hello there!"
+
+
+@pytest.mark.asyncio
+async def test_part_that_failed_to_post_at_rollover_is_sent_before_the_rest():
+    channel = FlakyChannel()
+    reply = ProgressiveReply(channel, limit=20, edit_interval=0.0)
+    await reply.append("aaaa bbbb ")
+
+    async def deleted(content):
+        raise discord.NotFound(FakeResponse(), "Unknown Message")
+
+    channel.sent[0].edit = deleted
+    channel.fail_sends = 1
+    # Rolls over: the full part can't be edited in or re-sent this time
+    await reply.append("cccc dddd eeee ")
+
+    assert await reply.finish() == "aaaa bbbb cccc dddd eeee "
+    assert [msg.content for msg in channel.sent] == ["aaaa bbbb ", "aaaa bbbb cccc dddd ", "eeee "]
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+from toaster.llm_agents.agent_utils import (
+    ConversationWindow,
+    assemble_prompt,
+    estimate_tokens,
+    pack_history,
+    split_turns,
+)
+from toaster.llm_agents.gemini import build_gemini_prompt
+
+
+def _history(turns):
+    start = datetime(2026, 7, 13, 18, 0, 0)
+    return "\n".join(
+        f"[{(start + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S')} UTC] User{i}: {text}"
+        for i, text in enumerate(turns)
+    )
+
+
+def test_history_is_packed_as_whole_turns_newest_first():
+    history = _history(["old " * 50, "first line\ncontinued line", "newest"])
+    assert len(split_turns(history)) == 3
+
+    packed, used, kept, dropped = pack_history(history, 60)
+
+    assert (kept, dropped) == (2, 1)
+    assert packed.endswith("User2: newest")
+    assert "first line\ncontinued line" in packed
+    assert used <= 60
+
+    window = ConversationWindow()
+    window.add("User", "old " * 50)
+    window.add("Toast", "newest")
+    assert pack_history(window, 30)[2:] == (1, 1)
+
+
+def test_assembler_respects_budget_and_priorities():
+    history = _history([f"message number {i} with some words" for i in range(50)])
+    memory = "\n".join(f"- fact {i} about this person" for i in range(40))
+
+    prompt = assemble_prompt("System prompt.", "What now?", history=history, memory_context=memory, max_tokens=400)
+
+    assert prompt.tokens <= 400
+    assert prompt.text.startswith("System prompt.")
+    assert prompt.text.endswith("Reply to the following message: What now?")
+    assert "- fact 0 about this person" in prompt.text
+    assert "- fact 39 about this person" not in prompt.text  # memory is capped at its share
+    assert "message number 49" in prompt.text and "message number 0 " not in prompt.text
+    assert prompt.history_turns + prompt.dropped_turns == 50
+    for line in prompt.text.split("\n"):
+        if "message number" in line:
+            assert line.endswith("with some words")
+
+
+def test_overlong_message_is_cut_at_a_word_break():
+    prompt = assemble_prompt("System prompt.", "word " * 500, max_tokens=100)
+
+    assert prompt.tokens <= 100
+    assert prompt.text.endswith("word…")
+    assert prompt.history_turns == 0
+
+
+def test_gemini_prompt_states_the_message_once():
+    prompt = build_gemini_prompt(history=_history(["hey"]), message="What do you think?")
+
+    assert prompt.count("What do you think?") == 1
+
+
+def test_windows_and_token_pairs_are_packed_from_cached_counts(monkeypatch):
+    window = ConversationWindow()
+    for idx in range(10):
+        window.add("User", f"message {idx} with a few words")
+    pairs = list(zip(window.turn_texts(), window.turn_tokens()))
+    expected = pack_history(window.render(), 40)
+
+    def no_estimates(text):
+        raise AssertionError("turn tokens should come from the cache")
+
+    monkeypatch.setattr("toaster.llm_agents.agent_utils.estimate_tokens", no_estimates)
+    monkeypatch.setattr("toaster.llm_agents.agent_utils.split_turns", no_estimates)
+
+    assert pack_history(window, 40) == expected
+    assert pack_history(pairs, 40) == expected
+
+
+def test_provider_prompts_take_the_window_without_re_splitting(monkeypatch):
+    from toaster.llm_agents.agent_utils import build_grok_messages
+
+    window = ConversationWindow()
+    window.add("User", "who pitches tonight?")
+    window.add("AI", "Sale, probably")
+
+    def no_split(history):
+        raise AssertionError("a window should not be rendered and split again")
+
+    monkeypatch.setattr("toaster.llm_agents.agent_utils.split_turns", no_split)
+
+    assert "User: who pitches tonight?\n" in build_gemini_prompt(window, "and tomorrow?")
+    assert "AI: Sale, probably" in build_grok_messages(window, "and tomorrow?")[1]["content"]
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+from toaster.llm_agents import router as router_module
+from toaster.llm_agents.router import (
+    MIN_LATENCY_SAMPLES,
+    AllProvidersFailed,
+    Provider,
+    ProviderRouter,
+    ReplyRequest,
+)
+
+REQUEST = ReplyRequest("", "who wins tonight?")
+
+
+def _provider(name, delay=0.0, error=None, reply=None, calls=None, cancelled=None):
+    async def complete(request):
+        if calls is not None:
+            calls.append(name)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            if cancelled is not None:
+                cancelled.append(name)
+            raise
+        if error:
+            raise RuntimeError(error)
+        return reply if reply is not None else f"{name} says hi"
+
+    return Provider(name, complete)
+
+
+def _warm(provider, kind, latency):
+    for _ in range(MIN_LATENCY_SAMPLES):
+        provider.health.record_success(kind, latency)
+
+
+@pytest.mark.asyncio
+async def test_failed_provider_fails_over_and_moves_to_the_back():
+    calls = []
+    router = ProviderRouter([_provider("gemini", error="503 overloaded", calls=calls), _provider("grok", calls=calls)], hedge=False)
+
+    for _ in range(3):
+        assert await router.complete(REQUEST) == "grok says hi"
+
+    # After three straight failures gemini's circuit opens and grok is asked first
+    assert await router.complete(REQUEST) == "grok says hi"
+    assert calls == ["gemini", "grok"] * 3 + ["grok"]
+    stats = dict(router.stats())
+    assert stats["gemini"]["available"] is False
+    assert stats["grok"]["wins"] == 4
+
+
+@pytest.mark.asyncio
+async def test_slow_provider_is_hedged_and_the_loser_cancelled(monkeypatch):
+    monkeypatch.setattr(router_module, "MIN_HEDGE_DELAY_SECONDS", 0.05)
+    cancelled = []
+    slow = _provider("gemini", delay=5.0, cancelled=cancelled)
+    fast = _provider("grok", delay=0.01)
+    _warm(slow, "reply", 0.02)
+    router = ProviderRouter([slow, fast])
+
+    started = asyncio.get_running_loop().time()
+    assert await router.complete(REQUEST) == "grok says hi"
+
+    assert asyncio.get_running_loop().time() - started < 1.0
+    assert cancelled == ["gemini"]
+    assert dict(router.stats())["grok"]["hedges"] == 1
+
+
+@pytest.mark.asyncio
+async def test_every_provider_failing_reports_each_error():
+    router = ProviderRouter([_provider("gemini", error="quota"), _provider("grok", error="401")])
+
+    with pytest.raises(AllProvidersFailed) as excinfo:
+        await router.complete(REQUEST)
+
+    assert "gemini: RuntimeError: quota" in str(excinfo.value)
+    assert "grok: RuntimeError: 401" in str(excinfo.value)
+
+
+@pytest.mark.asyncio
+async def test_stream_follows_the_provider_that_produces_text_first(monkeypatch):
+    monkeypatch.setattr(router_module, "MIN_HEDGE_DELAY_SECONDS", 0.05)
+
+    async def stalled(request):
+        await asyncio.sleep(5.0)
+        yield "too late"
+
+    async def quick(request):
+        for chunk in ("Braves", " in 5"):
+            await asyncio.sleep(0.01)
+            yield chunk
+
+    async def unused(request):
+        raise AssertionError("streaming providers are not asked for full replies")
+
+    slow = Provider("gemini", unused, stalled)
+    _warm(slow, "first_chunk", 0.02)
+    router = ProviderRouter([slow, Provider("grok", unused, quick)])
+
+    chunks = [chunk async for chunk in router.stream(REQUEST)]
+
+    assert chunks == ["Braves", " in 5"]
+
+
+@pytest.mark.asyncio
+async def test_unconfigured_providers_are_skipped_until_configured():
+    calls = []
+    keys = {}
+    gemini = Provider("gemini", _provider("gemini", calls=calls)._complete, configured=lambda: "gemini" in keys)
+    router = ProviderRouter([gemini, _provider("grok", calls=calls)])
+
+    assert await router.complete(REQUEST) == "grok says hi"
+    keys["gemini"] = "secret"
+    assert await router.complete(REQUEST) == "gemini says hi"
+
+    assert calls == ["grok", "gemini"]
+    assert dict(router.stats())["gemini"]["requests"] == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_router_picks_up_a_key_added_after_startup(tmp_path, monkeypatch):
+    from toaster import config
+    from toaster.llm_agents import gemini, grok
+
+    monkeypatch.setattr(config, "CONFIG_RECHECK_SECONDS", 0.0)
+    monkeypatch.setattr(router_module, "_router", None)
+    monkeypatch.setattr(gemini, "genai", None)
+    keys_seen = []
+
+    async def fake_grok(history, message, api_key, memory_context=None, retries=None):
+        keys_seen.append(api_key)
+        return "grok says hi", None
+
+    monkeypatch.setattr(grok, "get_grok_response_async", fake_grok)
+    router = router_module.get_provider_router(str(tmp_path))
+
+    with pytest.raises(AllProvidersFailed, match="no AI providers configured"):
+        await router.complete(REQUEST)
+
+    (tmp_path / "grok_key.json").write_text('{"token": "xai-123"}')
+    assert await router.complete(REQUEST) == "grok says hi"
+    assert keys_seen == ["xai-123"]
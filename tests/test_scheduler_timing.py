@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from toaster.scheduler import ScheduleRegistry
+
+
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+def test_next_fire_time_weekly_in_schedule_timezone():
+    registry = ScheduleRegistry()
+    registry.register("standup", "hi", 1, "weekly", "09:30", weekdays=[1, 3], timezone="America/New_York")
+    schedule = registry.get_schedule("standup")
+
+    # Tuesday 2026-10-13 10:00 New York -> Wednesday 09:30
+    now = datetime(2026, 10, 13, 10, 0, tzinfo=NEW_YORK)
+    assert registry.next_fire_time(schedule, now) == datetime(2026, 10, 14, 9, 30, tzinfo=NEW_YORK)
+
+    # Same minute still fires until it has been sent
+    now = datetime(2026, 10, 14, 9, 30, 40, tzinfo=NEW_YORK)
+    assert registry.next_fire_time(schedule, now) == datetime(2026, 10, 14, 9, 30, tzinfo=NEW_YORK)
+    schedule["last_sent"] = registry._minute_key(datetime(2026, 10, 14, 9, 30, tzinfo=NEW_YORK))
+    assert registry.next_fire_time(schedule, now) == datetime(2026, 10, 19, 9, 30, tzinfo=NEW_YORK)
+
+
+def test_next_fire_time_applies_month_and_alternating_day_filters():
+    registry = ScheduleRegistry()
+    registry.register(
+        "pollen", "$pollen", 1, "weekly", "08:00",
+        weekdays=[1, 2, 3, 4, 5, 6, 7], months=[3, 4], every_other_day=True, timezone="America/New_York",
+    )
+    schedule = registry.get_schedule("pollen")
+
+    now = datetime(2026, 10, 17, 12, 0, tzinfo=NEW_YORK)
+    assert registry.next_fire_time(schedule, now) == datetime(2027, 3, 1, 8, 0, tzinfo=NEW_YORK)
+
+    now = datetime(2027, 3, 1, 9, 0, tzinfo=NEW_YORK)
+    assert registry.next_fire_time(schedule, now) == datetime(2027, 3, 3, 8, 0, tzinfo=NEW_YORK)
+
+
+def test_next_fire_time_for_date_and_annual_schedules():
+    registry = ScheduleRegistry()
+    registry.register("launch", "go", 1, "date", "12:00", date="2026-11-01", timezone="America/New_York")
+    registry.register("bday", "hbd", 1, "annual", "07:00", date="2000-02-29", timezone="America/New_York")
+
+    now = datetime(2026, 10, 17, 12, 0, tzinfo=NEW_YORK)
+    assert registry.next_fire_time(registry.get_schedule("launch"), now) == datetime(2026, 11, 1, 12, 0, tzinfo=NEW_YORK)
+    assert registry.next_fire_time(registry.get_schedule("bday"), now) == datetime(2028, 2, 29, 7, 0, tzinfo=NEW_YORK)
+
+    later = datetime(2026, 11, 2, 0, 0, tzinfo=NEW_YORK)
+    assert registry.next_fire_time(registry.get_schedule("launch"), later) is None
+
+
+@pytest.mark.asyncio
+async def test_registering_a_due_schedule_wakes_the_scheduler():
+    class Channel:
+        def __init__(self):
+            self.sent = []
+
+        async def send(self, message):
+            self.sent.append(message)
+
+    class Bot:
+        def __init__(self):
+            self.channel = Channel()
+
+        def get_channel(self, channel_id):
+            return self.channel
+
+    registry = ScheduleRegistry()
+    bot = Bot()
+    runner = asyncio.create_task(registry.start_scheduler(bot))
+    await asyncio.sleep(0.01)
+
+    now = datetime.now()
+    registry.register("now", "ping", 1, "weekly", now.strftime("%H:%M"), weekdays=[now.isoweekday()])
+    for _ in range(50):
+        if bot.channel.sent:
+            break
+        await asyncio.sleep(0.01)
+
+    registry.stop_scheduler()
+    await asyncio.wait_for(runner, timeout=1)
+    assert bot.channel.sent == ["ping"]
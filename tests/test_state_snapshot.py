@@ -0,0 +1,69 @@
+from datetime import datetime
+
+from toaster.expiring import ExpiringDict
+from toaster.llm_agents.agent_utils import ConversationWindow
+from toaster.snapshot import StateSnapshot
+
+
+def _register(snapshot):
+    mutes = ExpiringDict(max_keys=10)
+    conversations = ExpiringDict(max_keys=10, idle_seconds=3600)
+    snapshot.register("mute", mutes, lambda value, ttl: (value, ttl) if ttl is not None else None, lambda payload, remaining: (payload, remaining))
+    snapshot.register(
+        "conversation",
+        conversations,
+        lambda window, ttl: (window.to_list(), ttl),
+        lambda payload, remaining: (ConversationWindow.from_list(payload), None),
+    )
+    return mutes, conversations
+
+
+def test_snapshot_restores_entries_lazily_and_carries_over_unread_ones(tmp_path):
+    path = tmp_path / "runtime_state.tsv"
+    first = StateSnapshot(path)
+    mutes, conversations = _register(first)
+    mutes.set(42, "muted", ttl=600)
+    mutes.set(43, "expired", ttl=-1)
+    window = ConversationWindow()
+    window.add("User", "hello\tthere\nfriend", datetime(2026, 1, 1, 12, 0))
+    conversations["user_1"] = window
+    conversations["user_2"] = ConversationWindow()
+    first.save()
+
+    second = StateSnapshot(path)
+    mutes, conversations = _register(second)
+    assert second.load() == 3
+    assert len(mutes) == 0 and len(conversations) == 0
+
+    assert 42 in mutes
+    assert 43 not in mutes
+    restored = conversations.get("user_1")
+    assert [turn.content for turn in restored] == ["hello\tthere\nfriend"]
+    assert len(second._pending) == 1  # user_2 not touched yet
+
+    # Unread entries survive the next snapshot; deleted ones do not come back
+    del mutes[42]
+    second.save()
+    third = StateSnapshot(path)
+    mutes, conversations = _register(third)
+    assert third.load() == 2
+    assert 42 not in mutes
+    assert "user_2" in conversations
+
+
+def test_conversation_snapshot_keeps_only_the_rest_of_its_idle_timeout(tmp_path):
+    import time
+
+    import toast
+
+    now = [1000.0]
+    conversations = ExpiringDict(max_keys=10, idle_seconds=toast.CONVERSATION_IDLE_SECONDS, clock=lambda: now[0])
+    snapshot = StateSnapshot(tmp_path / "runtime_state.tsv")
+    snapshot.register("conversation", conversations, toast._encode_conversation, toast._decode_conversation)
+    conversations["user_1"] = ConversationWindow()
+    now[0] += toast.CONVERSATION_IDLE_SECONDS - 60
+
+    started = time.time()
+    line = snapshot.serialize()
+    expires_at = float(line.split("\t")[2])
+    assert started + 59 <= expires_at <= time.time() + 61
@@ -0,0 +1,36 @@
+import json
+from pathlib import Path
+
+from toaster import tweet_classifier, tweet_watcher
+from toaster.tweet_classifier import NaiveBayesClassifier, examples_from_records
+
+FIXTURE = Path(__file__).parent / "fixtures" / "cfb_tweets.json"
+
+
+def test_local_model_settles_obvious_tweets_and_escalates_untrained():
+    records = json.loads(FIXTURE.read_text(encoding="utf-8"))
+    model = NaiveBayesClassifier(examples_from_records(records + [{"text": "malformed"}]))
+
+    assert model.trained
+    assert model.decide("Four-star quarterback commits to Alabama on National Signing Day") is True
+    assert model.decide("Stock market closes higher as tech shares rally") is False
+
+    untrained = NaiveBayesClassifier(examples_from_records(records[:3]))
+    assert untrained.decide("Four-star quarterback commits to Alabama") is None
+
+
+def test_local_verdict_skips_gemini(tmp_path, monkeypatch):
+    (tmp_path / tweet_classifier.TRAINING_FILE).write_text(FIXTURE.read_text(encoding="utf-8"), encoding="utf-8")
+    monkeypatch.setattr(
+        tweet_watcher,
+        "classify_college_football_locally",
+        lambda text: tweet_classifier.classify_college_football_locally(text, config_path=str(tmp_path)),
+    )
+
+    def fail_gemini(*args, **kwargs):
+        raise AssertionError("Gemini should not be called for a confident local verdict")
+
+    monkeypatch.setattr("toaster.llm_agents.gemini.get_gemini_response_with_key", fail_gemini)
+
+    assert tweet_watcher._is_college_football_related("Four-star quarterback commits to Alabama on National Signing Day") is True
+    assert tweet_watcher._is_college_football_related("Lakers trade for a guard ahead of the deadline") is False
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from toaster import tweet_watcher
+
+
+class DummyBot:
+    async def wait_until_ready(self):
+        return None
+
+    def get_channel(self, channel_id):
+        return None
+
+
+@pytest.mark.asyncio
+async def test_watch_entries_poll_concurrently_under_global_cap(monkeypatch):
+    entries = [{"username": f"account{i}", "channel_id": 1, "enabled": True} for i in range(6)]
+    entries.append({"username": "disabled", "channel_id": 1, "enabled": False})
+    saved = {}
+    polled = []
+    in_flight = 0
+    peak = 0
+
+    async def fake_fetch(username, client):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        polled.append(username)
+        return f"https://x.com/{username}/status/{len(polled)}"
+
+    monkeypatch.setattr(tweet_watcher, "_load_watch_list", lambda: entries)
+    monkeypatch.setattr(tweet_watcher, "_load_state", lambda: {})
+    monkeypatch.setattr(tweet_watcher, "_save_state", lambda state: saved.update(state))
+    monkeypatch.setattr(tweet_watcher, "fetch_latest_tweet_link", fake_fetch)
+    monkeypatch.setattr(tweet_watcher, "MAX_CONCURRENT_POLLS", 2)
+    monkeypatch.setattr(tweet_watcher, "POLL_JITTER_FRACTION", 0.0)
+
+    watcher = asyncio.create_task(tweet_watcher.start_tweet_watcher(DummyBot()))
+    for _ in range(100):
+        if len(polled) == 6:
+            break
+        await asyncio.sleep(0.01)
+    watcher.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await watcher
+
+    assert sorted(polled) == sorted(entry["username"] for entry in entries[:6])
+    assert peak == 2
+    # First observation of each account is recorded, not posted
+    assert set(saved) == set(polled)
+
+
+class FakeClient:
+    def __init__(self, html):
+        self.html = html
+        self.requests = []
+
+    async def get_text(self, url, **kwargs):
+        self.requests.append(url)
+        return self.html
+
+
+@pytest.mark.asyncio
+async def test_tweet_page_answers_all_filters_from_one_cached_fetch(monkeypatch):
+    monkeypatch.setattr(tweet_watcher.TweetPage, "_cache", {})
+    html = (
+        '<html><head><meta property="og:description" content="Georgia lands a five-star QB commit">'
+        '<meta property="og:video" content="https://video.example/clip.mp4"></head></html>'
+    )
+    client = FakeClient(html)
+    url = "https://fxtwitter.com/On3/status/12345"
+
+    page = await tweet_watcher.TweetPage.fetch(url, client)
+    again = await tweet_watcher.TweetPage.fetch("https://fixvx.com/On3/status/12345", client)
+
+    assert again is page
+    assert client.requests == [url]
+    assert page.has_video is True
+    assert page.has_any_word(["basketball", "five-star"]) is True
+    assert page.has_word("basketball") is False
+    assert page.text == "Georgia lands a five-star QB commit"
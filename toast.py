@@ -11,17 +11,26 @@ import json
 import re
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Union
+from typing import Dict, List, Optional, Union
 import random
 import time
 from collections import deque
-import requests
 
-from toaster import CommandRegistry, ScheduleRegistry, load_token, get_gemini_response_with_key, get_grok_response_with_key
+from toaster import CommandRegistry, ScheduleRegistry, load_token
 from toaster.tweet_watcher import start_tweet_watcher, get_watch_list, get_saved_state
 from toaster.modules.tweet_puller import get_fixvx_equivalent
-from toaster.config import load_config, load_channel_blacklist
+from toaster.config import get_bot_config, get_owner_user_id, load_config, load_channel_blacklist
+from toaster.http_client import get_http_client
+from toaster.expiring import ExpiringDict, run_sweeper
+from toaster.intents import IntentRouter, MessageIntents
+from toaster.progressive_reply import ProgressiveReply
+from toaster.snapshot import get_state_snapshot
+from toaster.person_memory import PersonMemoryStore, get_person_memory_store
 from toaster.llm_agents.gemini import collect_message_attachments, infer_if_reply_is_at_toast, load_gemini_key
+from toaster.llm_agents.router import ReplyRequest, get_provider_router
+from toaster.llm_agents.image_processing import prepare_images
+from toaster.llm_agents.agent_utils import ConversationTurn, ConversationWindow, History
+from toaster.llm_agents.dispatch import COALESCED, LLMDispatcher
 from toaster.kalshi_game import (
     DEFAULT_STARTING_BALANCE,
     clear_user_bets,
@@ -37,14 +46,24 @@ from toaster.kalshi_game import (
 )
 
 
+class ToastBot(commands.Bot):
+    async def close(self) -> None:
+        # Close loop-bound resources (shared HTTP session) while the loop is still running
+        await run_async_shutdown_hooks()
+        await super().close()
+
+
 # Create bot instance
-bot = commands.Bot(command_prefix='$', intents=discord.Intents.all())
+bot = ToastBot(command_prefix='$', intents=discord.Intents.all())
 
 # Track bot start time for uptime command in shared state module
-from toaster.state import set_start_time
+from toaster.state import run_async_shutdown_hooks, set_start_time
 
 # Conversation history storage
-conversation_history = {}  # Dict[str, str] - user_id/channel_id -> history string
+CONVERSATION_MAX_TURNS = 20  # last 10 exchanges, to avoid token limits
+CONVERSATION_MAX_KEYS = 500  # conversations kept in memory at once
+CONVERSATION_IDLE_SECONDS = 60 * 60 * 24  # forget conversations idle for a day
+conversation_history = ExpiringDict(max_keys=CONVERSATION_MAX_KEYS, idle_seconds=CONVERSATION_IDLE_SECONDS)  # Dict[str, ConversationWindow] - user_id/channel_id -> recent turns
 
 
 @bot.command(name='latest_tweets')
@@ -90,13 +109,61 @@ async def latest_tweets(ctx: commands.Context):
 # Persistent person memory storage
 PERSON_MEMORY_FILE = "config/person_memory.json"
 
-# Mute state storage for channels/DMs
-muted_threads = {}  # Dict[int, datetime] -> unmute time
+# Mute state storage for channels/DMs; entries only leave when the mute ends (never LRU-evicted,
+# which would silently unmute a channel)
+muted_threads = ExpiringDict(max_keys=None)  # Dict[int, datetime] -> unmute time
 MUTE_DURATION_SECONDS = 60 * 60 * 3  # 3 hours
 
 # Rate limiting for AI responses
-last_ai_response = {}  # Dict[str, float] - user_id/channel_id -> timestamp
 AI_COOLDOWN_SECONDS = 5  # Minimum seconds between AI responses per conversation
+last_ai_response = ExpiringDict(max_keys=CONVERSATION_MAX_KEYS, idle_seconds=60 * 60)  # Dict[str, float] - user_id/channel_id -> timestamp
+
+# Global cap on in-flight LLM requests; bursts per conversation are coalesced
+LLM_MAX_CONCURRENT_REQUESTS = 3
+llm_dispatcher = LLMDispatcher(max_concurrent=LLM_MAX_CONCURRENT_REQUESTS)
+
+# Rolling per-channel message cache fed by on_message, used instead of REST history calls
+CHANNEL_CACHE_SIZE = 30
+CHANNEL_CONTEXT_MESSAGES = 15
+CHANNEL_CACHE_MAX_CHANNELS = 200
+CHANNEL_CACHE_IDLE_SECONDS = 60 * 60 * 6  # quiet channels are backfilled again on next use
+
+
+class ChannelMessageCache(deque):
+    """Rolling message cache for one channel; `seeded` once backfilled from Discord history."""
+
+    seeded = False
+
+
+recent_channel_messages = ExpiringDict(max_keys=CHANNEL_CACHE_MAX_CHANNELS, idle_seconds=CHANNEL_CACHE_IDLE_SECONDS)  # Dict[int, ChannelMessageCache]
+
+# Background task purging idle conversations, caches and ended mutes
+state_sweeper_task = None
+
+
+def _encode_mute(unmute_time: datetime, ttl: Optional[float]):
+    return (unmute_time.timestamp(), ttl) if ttl is not None else None
+
+
+def _decode_mute(payload: float, remaining: float):
+    return datetime.fromtimestamp(payload), remaining
+
+
+def _encode_conversation(window: ConversationWindow, ttl: Optional[float]):
+    # `ttl` is what is left of the idle timeout, so a restart doesn't extend it
+    return (window.to_list(), ttl) if ttl is not None else None
+
+
+def _decode_conversation(payload: list, remaining: float):
+    return ConversationWindow.from_list(payload, max_turns=CONVERSATION_MAX_TURNS), None
+
+
+# Mutes and DM/channel context survive reboots; entries are restored per key on first use
+STATE_SNAPSHOT_FILE = "config/runtime_state.tsv"
+state_snapshot = get_state_snapshot(STATE_SNAPSHOT_FILE)
+state_snapshot.register("mute", muted_threads, _encode_mute, _decode_mute)
+state_snapshot.register("conversation", conversation_history, _encode_conversation, _decode_conversation)
+state_snapshot_task = None
 
 # Initialize registries
 command_registry = CommandRegistry()
@@ -107,38 +174,58 @@ loaded_commands = []  # List of (name, success, error_msg)
 loaded_schedules = []  # List of (name, success, error_msg)
 
 
-# AI Provider Configuration
-# Options: "grok", "gemini"
-AI_PROVIDER = "gemini"
-
-
-async def get_ai_response(history: str, message: str, memory_context: str = "", message_attachments=None) -> str:
+# AI providers, their order of preference, and hedging are configured in toaster/llm_agents/router.py
+async def get_ai_response(history: History, message: str, memory_context: str = "", message_attachments=None) -> str:
     """
-    Get AI response using the configured provider.
-    Can be easily swapped between "grok" and "gemini" by changing AI_PROVIDER.
+    Get AI response from the first healthy provider, failing over (and hedging) as needed.
     
     Args:
-        history: Conversation history
+        history: Conversation history (text or a ConversationWindow, rendered by the provider)
         message: User message
         memory_context: Personal facts collected about the person
         
     Returns:
-        AI response text or None if all providers fail
+        AI response text ("" if the model chose not to answer)
+
+    Raises:
+        AllProvidersFailed: If every provider failed, with each provider's error
     """
-    if AI_PROVIDER == "grok":
-        return get_grok_response_with_key(history, message, "config")
-    elif AI_PROVIDER == "gemini":
-        response, _ = get_gemini_response_with_key(
-            history,
-            message,
-            "config",
-            memory_context=memory_context,
-            message_attachments=message_attachments,
-        )
-        return response
-    else:
-        print(f"Unknown AI provider: {AI_PROVIDER}")
-        return None
+    return await get_provider_router().complete(ReplyRequest(history, message, memory_context, message_attachments))
+
+
+# Post replies progressively instead of after the full generation
+STREAM_AI_RESPONSES = True
+
+
+async def stream_ai_response(channel, history: History, message: str, memory_context: str = "", message_attachments=None) -> str:
+    """
+    Stream a reply straight into `channel`, editing it as text arrives.
+
+    Returns:
+        The full reply text, already delivered ("" if the model produced nothing)
+    """
+    reply = ProgressiveReply(channel)
+    try:
+        async for chunk in get_provider_router().stream(ReplyRequest(history, message, memory_context, message_attachments)):
+            await reply.append(chunk)
+    finally:
+        # Keep whatever arrived visible even if the stream broke off
+        await reply.finish()
+    return reply.text
+
+
+async def request_ai_response(channel, history: History, message: str, memory_context: str = "", message_attachments=None) -> tuple:
+    """
+    Get a reply, streaming it into `channel` when STREAM_AI_RESPONSES is on.
+
+    Returns:
+        Tuple of (response text, whether it was already sent to `channel`)
+    """
+    if STREAM_AI_RESPONSES:
+        response = await stream_ai_response(channel, history, message, memory_context, message_attachments)
+        return response, True
+    response = await get_ai_response(history, message, memory_context, message_attachments)
+    return response, False
 
 
 async def safe_send(channel, content: str) -> None:
@@ -216,50 +303,40 @@ async def safe_send(channel, content: str) -> None:
 
 def is_channel_muted(channel_id: int) -> bool:
     """Return True if channel/DM is currently muted."""
-    unmute_time = muted_threads.get(channel_id)
-    if not unmute_time:
-        return False
-    if datetime.now() >= unmute_time:
-        muted_threads.pop(channel_id, None)
-        return False
-    return True
+    return channel_id in muted_threads
 
 
 def mute_channel(channel_id: int, seconds: int = MUTE_DURATION_SECONDS) -> None:
     """Mute a channel/DM for `seconds`."""
-    muted_threads[channel_id] = datetime.now() + timedelta(seconds=seconds)
+    muted_threads.set(channel_id, datetime.now() + timedelta(seconds=seconds), ttl=seconds)
+
+
+# common forms: "shutup toast", "shut up toast", "toast shut up", "toast, shut up"
+SHUTUP_PHRASES = ["shutup", "shut up", "shut it", "stfu", "be quiet", "shut the fuck up", "shut the hell up"]
+
+# Accept variants of request to resume talking
+UNMUTE_PHRASES = [
+    "ok toast you can talk again",
+    "ok toast you can talk",
+    "toast you can talk again",
+    "toast you can talk",
+    "okay toast you can talk again",
+    "okay toast you can talk",
+    "toast talk again",
+    "toast please talk again",
+]
 
 
-def is_shutup_command(message: str) -> bool:
+def is_shutup_command(message: str, intents: Optional[MessageIntents] = None) -> bool:
     """Detect explicit quiet commands."""
-    text = message.lower().strip()
-    if "$shutup" in text:
-        return True
+    intents = intents or message_intents.classify(message)
+    return "shutup_command" in intents or ("mentions_toast" in intents and "shutup_phrase" in intents)
 
-    # common forms: "shutup toast", "shut up toast", "toast shut up", "toast, shut up"
-    if "toast" in text and ("shutup" in text or "shut up" in text or "shut it" in text or "stfu" in text or "be quiet" in text or "shut the fuck up" in text or "shut the hell up" in text):
-        return True
 
-    return False
-
-
-def is_unmute_command(message: str) -> bool:
+def is_unmute_command(message: str, intents: Optional[MessageIntents] = None) -> bool:
     """Detect the unmute command."""
-    text = message.lower().strip()
-    # Accept variants of request to resume talking
-    return any(
-        phrase in text
-        for phrase in [
-            "ok toast you can talk again",
-            "ok toast you can talk",
-            "toast you can talk again",
-            "toast you can talk",
-            "okay toast you can talk again",
-            "okay toast you can talk",
-            "toast talk again",
-            "toast please talk again"
-        ]
-    )
+    intents = intents or message_intents.classify(message)
+    return "unmute_command" in intents
 
 
 def unmute_channel(channel_id: int) -> None:
@@ -276,37 +353,6 @@ def get_conversation_key(message: discord.Message) -> str:
         return f"channel_{message.channel.id}"
 
 
-def get_person_memory_path(config_dir: Union[str, Path] = "config") -> Path:
-    """Return the path for the persistent person memory JSON file."""
-    config_path = Path(config_dir)
-    config_path.mkdir(parents=True, exist_ok=True)
-    return config_path / "person_memory.json"
-
-
-def load_person_memory(config_dir: Union[str, Path] = "config") -> dict:
-    """Load the persisted memory database from disk."""
-    memory_path = get_person_memory_path(config_dir)
-    if not memory_path.exists():
-        return {}
-    try:
-        with memory_path.open("r", encoding="utf-8") as handle:
-            data = json.load(handle)
-            return data if isinstance(data, dict) else {}
-    except Exception as exc:
-        print(f"Failed to load person memory: {exc}")
-        return {}
-
-
-def save_person_memory(memory: dict, config_dir: Union[str, Path] = "config") -> None:
-    """Persist person memory to disk."""
-    memory_path = get_person_memory_path(config_dir)
-    try:
-        with memory_path.open("w", encoding="utf-8") as handle:
-            json.dump(memory, handle, indent=2, ensure_ascii=False)
-    except Exception as exc:
-        print(f"Failed to save person memory: {exc}")
-
-
 def extract_person_facts(text: str) -> list[str]:
     """Extract a few simple personal facts from a message body."""
     if not text:
@@ -391,8 +437,9 @@ def extract_alias_candidates(text: str) -> list[tuple[str, str]]:
     return pairs
 
 
-def learn_aliases_from_text(message: discord.Message, memory: dict, config_dir: Union[str, Path] = "config") -> None:
+def learn_aliases_from_text(message: discord.Message, store: PersonMemoryStore) -> None:
     """Learn nickname/alias relationships from a message when possible."""
+    memory = store.data
     text = build_message_context(message)
     for left, right in extract_alias_candidates(text):
         left_key = f"user_{left.lower()}"
@@ -405,6 +452,8 @@ def learn_aliases_from_text(message: discord.Message, memory: dict, config_dir:
             memory[right_key] = {"user_id": None, "display_name": right, "channels": [], "facts": [], "message_count": 0, "last_seen": None}
         memory[left_key].setdefault("aliases", []).append(right)
         memory[right_key].setdefault("aliases", []).append(left)
+        store.reindex(left_key)
+        store.reindex(right_key)
 
 
 def update_person_memory(message: discord.Message, config_dir: Union[str, Path] = "config") -> dict:
@@ -412,7 +461,8 @@ def update_person_memory(message: discord.Message, config_dir: Union[str, Path]
     if not getattr(message.author, "id", None):
         return {}
 
-    memory = load_person_memory(config_dir)
+    store = get_person_memory_store(config_dir)
+    memory = store.data
     user_key = f"user_{message.author.id}"
     entry = memory.get(user_key, {
         "user_id": message.author.id,
@@ -462,13 +512,15 @@ def update_person_memory(message: discord.Message, config_dir: Union[str, Path]
             "message_count": 0,
             "last_seen": None,
         }
+        store.reindex(other_user_key)
 
-    learn_aliases_from_text(message, memory, config_dir=config_dir)
+    learn_aliases_from_text(message, store)
 
     entry["message_count"] = entry.get("message_count", 0) + 1
     entry["last_seen"] = datetime.utcnow().isoformat()
     memory[user_key] = entry
-    save_person_memory(memory, config_dir)
+    store.reindex(user_key)
+    store.mark_dirty()
     return memory
 
 
@@ -477,21 +529,22 @@ def build_person_memory_context(message: discord.Message, config_dir: Union[str,
     if not getattr(message.author, "id", None):
         return ""
 
-    memory = load_person_memory(config_dir)
+    store = get_person_memory_store(config_dir)
+    memory = store.data
     user_key = f"user_{message.author.id}"
     entry = memory.get(user_key, {})
     facts = entry.get("facts", [])
 
-    candidate_names = set()
-    if getattr(message.author, "display_name", None):
-        candidate_names.add(getattr(message.author, "display_name"))
-    if getattr(message.author, "name", None):
-        candidate_names.add(getattr(message.author, "name"))
+    # Ordered, case-insensitive de-duplication of names that may refer to people
+    candidate_names = {}
+    for name in (getattr(message.author, "display_name", None), getattr(message.author, "name", None)):
+        if name:
+            candidate_names.setdefault(name.lower(), name)
 
     context_text = "\n".join([build_message_context(message), history_context]).strip()
     if context_text:
         for mention in extract_people_mentions(context_text):
-            candidate_names.add(mention)
+            candidate_names.setdefault(mention.lower(), mention)
 
     lines = []
     if facts:
@@ -503,7 +556,8 @@ def build_person_memory_context(message: discord.Message, config_dir: Union[str,
         if channel_names:
             lines.append(f"Seen in: {', '.join(channel_names[-3:])}")
 
-    for other_key, other_entry in memory.items():
+    for other_key in store.find_by_names(candidate_names):
+        other_entry = memory.get(other_key)
         if other_key == user_key or not isinstance(other_entry, dict):
             continue
         other_facts = other_entry.get("facts", [])
@@ -513,9 +567,6 @@ def build_person_memory_context(message: discord.Message, config_dir: Union[str,
         aliases = other_entry.get("aliases", []) or []
         if display_name.lower() == "toast":
             continue
-        if display_name not in candidate_names and display_name.lower() not in {name.lower() for name in candidate_names}:
-            if not any(alias.lower() in {name.lower() for name in candidate_names} for alias in aliases):
-                continue
         if not any(line.startswith(f"Known about {display_name}") for line in lines):
             lines.append(f"Known about {display_name} from earlier messages:")
             for fact in other_facts[-3:]:
@@ -526,33 +577,73 @@ def build_person_memory_context(message: discord.Message, config_dir: Union[str,
     return "\n".join(lines)
 
 
+def record_channel_message(message: discord.Message) -> None:
+    """Append a guild message to its channel's rolling cache."""
+    channel_id = getattr(message.channel, "id", None)
+    if channel_id is None:
+        return
+    cache = recent_channel_messages.get(channel_id)
+    if cache is None:
+        cache = ChannelMessageCache(maxlen=CHANNEL_CACHE_SIZE)
+        recent_channel_messages[channel_id] = cache
+    cache.append(message)
+
+
+async def get_recent_channel_messages(message: discord.Message, limit: int = CHANNEL_CONTEXT_MESSAGES) -> List[discord.Message]:
+    """Return up to `limit` messages sent before `message` in its channel, oldest first.
+
+    Served from the rolling cache; the first request for a channel after startup
+    backfills the cache with a single Discord history call.
+    """
+    channel_id = message.channel.id
+    cache = recent_channel_messages.get(channel_id)
+    if cache is None:
+        cache = ChannelMessageCache(maxlen=CHANNEL_CACHE_SIZE)
+        recent_channel_messages[channel_id] = cache
+
+    if not cache.seeded:
+        cache.seeded = True
+        fetched = []
+        try:
+            async for msg in message.channel.history(limit=limit, before=message):
+                fetched.append(msg)
+        except Exception:
+            pass
+        if fetched:
+            merged = {msg.id: msg for msg in fetched}
+            merged.update((msg.id, msg) for msg in cache)
+            cache.clear()
+            cache.extend(sorted(merged.values(), key=lambda msg: msg.id))
+
+    earlier = [msg for msg in cache if msg.id < message.id]
+    return earlier[-limit:]
+
+
 def format_history_line(prefix: str, content: str, timestamp=None) -> str:
     """Format a message line with a readable timestamp for LLM context."""
-    if timestamp is None:
-        timestamp = datetime.utcnow()
-    stamp = timestamp.strftime("%Y-%m-%d %H:%M:%S UTC")
-    return f"[{stamp}] {prefix}: {content}".strip()
+    return ConversationTurn(timestamp or datetime.utcnow(), prefix, content).render()
+
+
+def get_conversation_history(key: str) -> Optional[ConversationWindow]:
+    """
+    Return the stored turns for a user/channel, or None if there are none.
+
+    The window itself is handed to the AI providers, which pack its turns
+    using their cached token counts and render only what fits.
+    """
+    return conversation_history.get(key)
 
 
 def update_conversation_history(key: str, user_message: str, ai_response: str) -> None:
     """Update conversation history for a user/channel."""
-    global conversation_history
-    
-    # Initialize if not exists
-    if key not in conversation_history:
-        conversation_history[key] = ""
-    
-    # Add to history (keep last 10 exchanges to avoid token limits)
-    history_lines = conversation_history[key].split('\n')
+    window = conversation_history.get(key)
+    if window is None:
+        window = ConversationWindow(max_turns=CONVERSATION_MAX_TURNS)
+        conversation_history[key] = window
+
     timestamp = datetime.utcnow()
-    new_lines = [format_history_line("User", user_message, timestamp), format_history_line("AI", ai_response, timestamp)]
-    
-    # Keep only last 10 exchanges (20 lines)
-    combined_lines = history_lines + new_lines
-    if len(combined_lines) > 20:
-        combined_lines = combined_lines[-20:]
-    
-    conversation_history[key] = '\n'.join(combined_lines)
+    window.add("User", user_message, timestamp)
+    window.add("AI", ai_response, timestamp)
 
 
 def build_message_context(message: discord.Message) -> str:
@@ -587,7 +678,7 @@ def build_message_context(message: discord.Message) -> str:
     return prefix
 
 
-def _extract_tweet_author_from_url(url: str, timeout: int = 10) -> str:
+async def _extract_tweet_author_from_url(url: str, timeout: int = 10) -> str:
     """Extract the Twitter username of the tweet author from a tweet URL.
     
     Parses the URL structure and attempts to extract the author from the page.
@@ -627,9 +718,7 @@ def _extract_tweet_author_from_url(url: str, timeout: int = 10) -> str:
             
             for attempt_url in x_urls:
                 try:
-                    resp = requests.get(attempt_url, headers=headers, timeout=timeout, allow_redirects=True)
-                    resp.raise_for_status()
-                    html = resp.text
+                    html = await get_http_client().get_text(attempt_url, headers=headers, timeout=timeout, retries=0)
                     
                     # Try to extract author from data-screen-name or href="/username/status"
                     m = re.search(r'data-screen-name="([^"]+)"', html)
@@ -677,8 +766,7 @@ async def check_rayford_tweet_from_malbon(message: discord.Message) -> bool:
         for url_match in re.finditer(pattern, message.content, re.IGNORECASE):
             url = url_match.group(0)
             try:
-                # Extract author in a thread to avoid blocking
-                author = await asyncio.to_thread(_extract_tweet_author_from_url, url)
+                author = await _extract_tweet_author_from_url(url)
                 if author and author.lower() == "rayfordyoung":
                     # Found a tweet by rayfordyoung posted by mal-bon!
                     try:
@@ -692,7 +780,7 @@ async def check_rayford_tweet_from_malbon(message: discord.Message) -> bool:
     return False
 
 
-async def handle_kalshi_game_message(message: discord.Message) -> bool:
+async def handle_kalshi_game_message(message: discord.Message, intents: Optional[MessageIntents] = None) -> bool:
     """Handle pretend Kalshi game interactions in Discord."""
     if not getattr(message, "content", ""):
         return False
@@ -701,45 +789,28 @@ async def handle_kalshi_game_message(message: discord.Message) -> bool:
     if not text:
         return False
 
-    lower_text = text.lower()
-    if lower_text.startswith("$kalshi"):
+    if text.lower().startswith("$kalshi"):
         return False
 
-    if "kalshi balance" in lower_text or "pretend kalshi account" in lower_text or "how much money" in lower_text:
-        state = load_state()
-        user = state.setdefault("users", {}).get(f"user_{message.author.id}")
+    intents = intents or message_intents.classify(message.content)
+
+    if "kalshi_balance" in intents:
+        user = load_state().get("users", {}).get(f"user_{message.author.id}")
         if not user:
-            user = {
-                "user_id": str(message.author.id),
-                "display_name": getattr(message.author, "display_name", None) or getattr(message.author, "name", None) or "you",
-                "balance": DEFAULT_STARTING_BALANCE,
-                "pending_bets": [],
-                "bet_history": [],
-                "transfers": [],
-            }
-            state.setdefault("users", {})[f"user_{message.author.id}"] = user
-            save_state(state)
+            # Read-only query: new players are only written once they bet or transfer
+            user = {"balance": DEFAULT_STARTING_BALANCE, "bet_history": []}
         await message.channel.send(f"💸 Your pretend Kalshi balance is {format_balance(user)}")
         return True
 
-    if "betting history" in lower_text or "history" in lower_text and "bet" in lower_text:
-        state = load_state()
-        user = state.setdefault("users", {}).get(f"user_{message.author.id}")
+    if "betting_history" in intents or "history_word" in intents and "bet_word" in intents:
+        user = load_state().get("users", {}).get(f"user_{message.author.id}")
         if not user:
-            user = {
-                "user_id": str(message.author.id),
-                "display_name": getattr(message.author, "display_name", None) or getattr(message.author, "name", None) or "you",
-                "balance": DEFAULT_STARTING_BALANCE,
-                "pending_bets": [],
-                "bet_history": [],
-                "transfers": [],
-            }
-            state.setdefault("users", {})[f"user_{message.author.id}"] = user
-            save_state(state)
+            # Read-only query: new players are only written once they bet or transfer
+            user = {"balance": DEFAULT_STARTING_BALANCE, "bet_history": []}
         await message.channel.send(format_history(user))
         return True
 
-    parsed = parse_kalshi_bet_message(text)
+    parsed = parse_kalshi_bet_message(text) if "kalshi_link" in intents else None
     if parsed:
         state = load_state()
         result = place_bet(
@@ -758,7 +829,7 @@ async def handle_kalshi_game_message(message: discord.Message) -> bool:
             await message.channel.send(f"⚠️ {result['reason']}")
         return True
 
-    transfer_match = re.search(r"transfer\s+\$?(\d+(?:\.\d+)?)\s+to\s+([a-zA-Z0-9_\-]+)", text, flags=re.IGNORECASE)
+    transfer_match = intents.match("kalshi_transfer")
     if transfer_match:
         amount = float(transfer_match.group(1))
         recipient = transfer_match.group(2)
@@ -771,7 +842,7 @@ async def handle_kalshi_game_message(message: discord.Message) -> bool:
             await message.channel.send(f"⚠️ {result['reason']}")
         return True
 
-    reset_match = re.search(r"reset\s+kalshi\s+balance(?:\s+for\s+(.+))?", text, flags=re.IGNORECASE)
+    reset_match = intents.match("kalshi_reset")
     if reset_match and str(message.author.id) == "326676188057567232":
         target = reset_match.group(1)
         state = load_state()
@@ -792,7 +863,7 @@ async def handle_kalshi_game_message(message: discord.Message) -> bool:
                 await message.channel.send("⚠️ Could not reset your balance.")
         return True
 
-    clear_match = re.search(r"clear\s+my\s+bets|clear\s+(.+)\s+bets", text, flags=re.IGNORECASE)
+    clear_match = intents.match("kalshi_clear")
     if clear_match and str(message.author.id) == "326676188057567232":
         target = clear_match.group(1)
         state = load_state()
@@ -816,7 +887,7 @@ async def handle_kalshi_game_message(message: discord.Message) -> bool:
     return False
 
 
-async def maybe_request_clarification(message: discord.Message, memory_context: str, history: str) -> None:
+async def maybe_request_clarification(message: discord.Message, memory_context: str, history: History) -> None:
     """Post a short clarification prompt when the bot sees likely nickname ambiguity."""
     if not getattr(message, "channel", None):
         return
@@ -844,43 +915,58 @@ async def handle_dm_response(message: discord.Message) -> None:
     if is_channel_muted(message.channel.id):
         return
     
-    # Get conversation history
     key = get_conversation_key(message)
-    history = conversation_history.get(key, "")
-    memory_context = build_person_memory_context(message, config_dir="config")
-    if memory_context:
-        history = f"{memory_context}\n\n{history}" if history else memory_context
-    
+    history: Optional[ConversationWindow] = None
+    memory_context = ""
+
+    async def request_reply(batch: list) -> tuple:
+        nonlocal history, memory_context
+        # Read history when the reply actually runs, so it includes any exchange
+        # that finished while this request was waiting behind it
+        history = get_conversation_history(key)
+        # Memory context gets its own section (and budget) in the prompt
+        memory_context = build_person_memory_context(batch[-1], config_dir="config")
+        # Messages sent while an earlier reply was pending are answered together
+        user_text = "\n".join(msg.content for msg in batch if msg.content)
+        message_attachments = await prepare_images(await collect_message_attachments(batch))
+        reply, delivered = await request_ai_response(
+            message.channel,
+            history,
+            user_text,
+            memory_context=memory_context,
+            message_attachments=message_attachments,
+        )
+        if reply:
+            # Record the exchange before the conversation's next queued reply starts
+            update_conversation_history(key, user_text, reply)
+        return reply, delivered
+
     # Get AI response
     error_details = None
     response = None
+    delivered = False
     try:
-        message_attachments = await collect_message_attachments([message])
-        response = await get_ai_response(
-            history,
-            message.content,
-            memory_context=build_person_memory_context(message, config_dir="config"),
-            message_attachments=message_attachments,
-        )
+        result = await llm_dispatcher.submit(key, message, request_reply)
+        if result is COALESCED:
+            return
+        response, delivered = result
     except Exception as e:
         error_details = f"{type(e).__name__}: {str(e)}"
 
     # If AI fails (None response), DM the owner about the issue instead of sending to user
     if response is None:
-        config = load_config("config")
-        bot_config = config.get("bot_config", {})
-        owner_id = bot_config.get("owner_user_id")
+        owner_id = get_owner_user_id("config")
         
         if owner_id:
             try:
                 owner = await bot.fetch_user(owner_id)
-                error_msg = error_details if error_details else f"{AI_PROVIDER} returned None"
+                error_msg = error_details if error_details else "AI provider returned None"
                 await owner.send(f"⚠️ AI response failed for DM from {message.author} ({message.author.id}):\nMessage: {message.content}")
                 await owner.send(f"**Error Details:**\n```\n{error_msg}\n```")
             except Exception as e:
                 print(f"Failed to notify owner about AI error: {e}")
         
-        error_msg = error_details if error_details else f"{AI_PROVIDER} returned None"
+        error_msg = error_details if error_details else "AI provider returned None"
         print(f"AI response failed for DM from {message.author}: {error_msg}")
         return
     
@@ -888,10 +974,11 @@ async def handle_dm_response(message: discord.Message) -> None:
     if not response:
         return
     
-    # Store conversation history and send response (truncate to Discord limit)
-    update_conversation_history(key, message.content, response)
+    # History was already updated by the runner; send the response (truncated to Discord's limit)
     if memory_context:
         asyncio.create_task(maybe_request_clarification(message, memory_context, history))
+    if delivered:
+        return
     # Ensure response fits within Discord's 2000 character limit
     if len(response) > 2000:
         response = response[:1997] + "..."
@@ -922,29 +1009,46 @@ REAL_LIFE_VENUES = [
     "the mall", "the gym", "the park", "the movies", "the game",
 ]
 
-def is_real_life_plan(message_lower: str) -> bool:
-    has_activity = any(phrase in message_lower for phrase in REAL_LIFE_ACTIVITY_WORDS)
-    has_venue = any(place in message_lower for place in REAL_LIFE_VENUES)
-    return has_activity or has_venue
-
-async def should_respond_to_message(message: discord.Message) -> bool:
-    message_lower = message.content.lower().strip()
+# Every phrase list and command regex checked per message, compiled once and matched together
+message_intents = IntentRouter()
+message_intents.add_phrases("mentions_toast", ["toast"])
+message_intents.add_phrases("shutup_command", ["$shutup"])
+message_intents.add_phrases("shutup_phrase", SHUTUP_PHRASES)
+message_intents.add_phrases("unmute_command", UNMUTE_PHRASES)
+message_intents.add_phrases("real_life_plan", REAL_LIFE_ACTIVITY_WORDS + REAL_LIFE_VENUES)
+message_intents.add_phrases("kalshi_balance", ["kalshi balance", "pretend kalshi account", "how much money"])
+message_intents.add_phrases("betting_history", ["betting history"])
+message_intents.add_phrases("history_word", ["history"])
+message_intents.add_phrases("bet_word", ["bet"])
+message_intents.add_phrases("kalshi_link", ["https://kalshi.com/markets/"])
+message_intents.add_pattern("kalshi_transfer", r"transfer\s+\$?(\d+(?:\.\d+)?)\s+to\s+([a-zA-Z0-9_\-]+)", anchors=["transfer"])
+message_intents.add_pattern("kalshi_reset", r"reset\s+kalshi\s+balance(?:\s+for\s+(.+))?", anchors=["reset"])
+message_intents.add_pattern("kalshi_clear", r"clear\s+my\s+bets|clear\s+(.+)\s+bets", anchors=["clear"])
+
+
+def is_real_life_plan(message_lower: str, intents: Optional[MessageIntents] = None) -> bool:
+    intents = intents or message_intents.classify(message_lower)
+    return "real_life_plan" in intents
+
+async def should_respond_to_message(message: discord.Message, intents: Optional[MessageIntents] = None) -> bool:
+    intents = intents or message_intents.classify(message.content)
+    message_lower = intents.text_lower.strip()
     now = time.time()
 
     # Hard veto — never butt into real life plans
-    if is_real_life_plan(message_lower):
+    if is_real_life_plan(message_lower, intents):
         return False
 
     # --- Rate limiting: don't respond if bot spoke very recently ---
     recent_in_channel = [t for t in recent_bot_posts if t["channel"] == message.channel.id and now - t["time"] < 30]
     if len(recent_in_channel) >= 2:
         # Still allow direct mentions to break through
-        if "toast" not in message_lower:
+        if "mentions_toast" not in intents:
             return False
 
     heuristics = {
         # Original
-        "mentions_bot": "toast" in message_lower,
+        "mentions_bot": "mentions_toast" in intents,
         #"is_question": message_lower.endswith("?"),
         "is_reply_to_bot": False,
 
@@ -983,11 +1087,13 @@ async def should_respond_to_message(message: discord.Message) -> bool:
     return False
 
 
-async def handle_random_channel_response(message: discord.Message) -> None:
+async def handle_random_channel_response(message: discord.Message, intents: Optional[MessageIntents] = None) -> None:
     """Handle intelligent AI responses in whitelisted channels based on message relevance."""
     if message.author == bot.user:
         return
 
+    intents = intents or message_intents.classify(message.content)
+
     if is_channel_muted(message.channel.id):
         return
     
@@ -996,7 +1102,7 @@ async def handle_random_channel_response(message: discord.Message) -> None:
     blacklist_ids = {entry["id"] for entry in blacklist}
     if message.channel.id in blacklist_ids:
         # If blacklisted and mentions toast, inform user
-        if "toast" in message.content.lower():
+        if "mentions_toast" in intents:
             try:
                 await message.channel.send("🤐 I'm currently muted in this channel. Use `$toast` to unmute me!")
             except Exception:
@@ -1010,37 +1116,26 @@ async def handle_random_channel_response(message: discord.Message) -> None:
     else:
         channel_nickname = None
 
-    # Fetch recent message history (last 15 messages before this one)
-    history_messages = []
-    try:
-        async for msg in message.channel.history(limit=15, before=message):
-            history_messages.insert(0, msg)  # Insert at beginning to maintain order
-    except:
-        pass
+    # Recent messages before this one, served from the in-memory channel cache
+    history_messages = await get_recent_channel_messages(message)
 
     # Build context string from recent messages
-    context = ""
-    for msg in history_messages:
-        context += f"{build_message_context(msg)}\n"
+    context = "".join(f"{build_message_context(msg)}\n" for msg in history_messages)
     context += f"{build_message_context(message)}\n"
-
-    memory_context = build_person_memory_context(message, config_dir="config")
-    if memory_context:
-        context = f"{memory_context}\n\n{context}" if context else memory_context
     history = context
 
     # Ask LLM if this message is interesting using Gemini inference helper.
     api_key = load_gemini_key("config")
     api_key = None # turn off relevant inference for now. its annoying
     if api_key:
+        memory_context = build_person_memory_context(message, config_dir="config")
+        inference_history = f"{memory_context}\n\n{history}" if memory_context else history
         try:
-            if not await infer_if_reply_is_at_toast(history, message.content, api_key):
+            if not await infer_if_reply_is_at_toast(inference_history, message.content, api_key):
                 return
         except Exception as e:
             error_msg = f"Error inferring reply-worthy message: {e}"
-            config = load_config("config")
-            bot_config = config.get("bot_config", {})
-            owner_id = bot_config.get("owner_user_id")
+            owner_id = get_owner_user_id("config")
             if owner_id:
                 try:
                     owner = await bot.fetch_user(owner_id)
@@ -1048,56 +1143,50 @@ async def handle_random_channel_response(message: discord.Message) -> None:
                     await owner.send("**Error Details:**\n```\n" + error_msg + "\n```")
                 except Exception as dm_err:
                     print(f"Failed to notify owner about inference error: {dm_err}")
-            if not await should_respond_to_message(message):
+            if not await should_respond_to_message(message, intents):
                 return
     else:
-        if not await should_respond_to_message(message):
+        if not await should_respond_to_message(message, intents):
             return
-    try:
-        async for msg in message.channel.history(limit=15, before=message):
-            history_messages.insert(0, msg)  # Insert at beginning to maintain order
-    except:
-        pass
-    
-    # Build context string from recent messages
-    context = ""
-    for msg in history_messages:
-        context += f"{build_message_context(msg)}\n"
-    context += f"{build_message_context(message)}\n"
-    
-    history = context
-    #print(history)
-    
-    # Get AI response
-    error_details = None
-    response = None
-    try:
-        message_attachments = await collect_message_attachments([message] + history_messages)
-        response = await get_ai_response(
+
+    async def request_reply(batch: list) -> tuple:
+        # Earlier messages of a burst are already part of the fetched channel history;
+        # newest history gets first claim on the image budget
+        message_attachments = await prepare_images(await collect_message_attachments([message] + history_messages[::-1]))
+        return await request_ai_response(
+            message.channel,
             history,
             message.content,
             memory_context=build_person_memory_context(message, config_dir="config"),
             message_attachments=message_attachments,
         )
+
+    # Get AI response
+    error_details = None
+    response = None
+    delivered = False
+    try:
+        result = await llm_dispatcher.submit(get_conversation_key(message), message, request_reply)
+        if result is COALESCED:
+            return
+        response, delivered = result
     except Exception as e:
         error_details = f"{type(e).__name__}: {str(e)}"
 
     # If AI fails (None response), DM the owner about the issue instead of spamming the channel
     if response is None:
-        config = load_config("config")
-        bot_config = config.get("bot_config", {})
-        owner_id = bot_config.get("owner_user_id")
+        owner_id = get_owner_user_id("config")
         
         if owner_id:
             try:
                 owner = await bot.fetch_user(owner_id)
-                error_msg = error_details if error_details else f"{AI_PROVIDER} returned None"
+                error_msg = error_details if error_details else "AI provider returned None"
                 await owner.send(f"⚠️ AI response failed for channel message from {message.author} ({message.author.id}) in {message.guild.name}:\nMessage: {message.content}")
                 await owner.send(f"**Error Details:**\n```\n{error_msg}\n```")
             except Exception as e:
                 print(f"Failed to notify owner about AI error: {e}")
         
-        error_msg = error_details if error_details else f"{AI_PROVIDER} returned None"
+        error_msg = error_details if error_details else "AI provider returned None"
         print(f"AI response failed for channel message: {error_msg}")
         return
     
@@ -1105,6 +1194,10 @@ async def handle_random_channel_response(message: discord.Message) -> None:
     if not response:
         return
     
+    # Streamed replies are already in the channel
+    if delivered:
+        return
+
     # Send response (robustly)
     if len(response) > 2000:
         # Let safe_send handle splitting nicely
@@ -1236,10 +1329,19 @@ async def on_ready() -> None:
         print('✗ Failed to start tweet watcher')
 
     asyncio.create_task(monitor_pending_bets(bot))
+
+    # on_ready fires again after reconnects; keep a single sweeper running
+    global state_sweeper_task, state_snapshot_task
+    if state_sweeper_task is None or state_sweeper_task.done():
+        state_sweeper_task = asyncio.create_task(run_sweeper())
+    if state_snapshot_task is None or state_snapshot_task.done():
+        restored = state_snapshot.load()
+        if restored:
+            print(f'✓ Indexed {restored} saved mutes/conversations for lazy restore')
+        state_snapshot_task = asyncio.create_task(state_snapshot.run_periodic())
     
     # Send boot notification DM to owner with detailed command/schedule info
-    config = load_config("config")
-    bot_config = config.get("bot_config", {})
+    bot_config = get_bot_config("config")
     if bot_config.get("notify_on_boot", False):
         owner_id = bot_config.get("owner_user_id")
         if owner_id:
@@ -1298,6 +1400,10 @@ async def on_command_error(ctx: commands.Context, error: commands.CommandError)
 @bot.event
 async def on_message(message: discord.Message) -> None:
     """Handle all messages for AI responses."""
+    # Feed the channel cache first so the bot's own replies stay in reply context
+    if message.guild:
+        record_channel_message(message)
+
     # Skip if message is from bot
     if message.author == bot.user:
         return
@@ -1309,8 +1415,11 @@ async def on_message(message: discord.Message) -> None:
     # Process commands first
     await bot.process_commands(message)
 
+    # Classify once; every text check below reads from this result
+    intents = message_intents.classify(message.content)
+
     # If msg requests silence, mute thread and skip responding
-    if is_shutup_command(message.content) and not is_channel_muted(message.channel.id):
+    if is_shutup_command(message.content, intents) and not is_channel_muted(message.channel.id):
         mute_channel(message.channel.id)
         try:
             await message.channel.send("🤐 Got it. I’ll stay quiet here for 3 hours.")
@@ -1319,7 +1428,7 @@ async def on_message(message: discord.Message) -> None:
         return
 
     # If msg requests unmute, unmute thread and allow future responses
-    if is_unmute_command(message.content) and is_channel_muted(message.channel.id):
+    if is_unmute_command(message.content, intents) and is_channel_muted(message.channel.id):
         unmute_channel(message.channel.id)
         try:
             await message.channel.send("✅ Thanks! I’m back and ready to chat.")
@@ -1349,10 +1458,10 @@ async def on_message(message: discord.Message) -> None:
         
         # Handle random channel responses (only in guilds, not DMs)
         elif message.guild:
-            handled = await handle_kalshi_game_message(message)
+            handled = await handle_kalshi_game_message(message, intents)
             if handled:
                 return
-            await handle_random_channel_response(message)
+            await handle_random_channel_response(message, intents)
             
     except Exception as e:
         print(f"Error in message handling: {e}")
@@ -8,18 +8,38 @@ from toaster.scheduler import ScheduleRegistry
 from toaster.config import load_config, load_token
 
 try:
-    from toaster.llm_agents.gemini import get_gemini_response, get_gemini_response_with_key, load_gemini_key
+    from toaster.llm_agents.gemini import (
+        get_gemini_response,
+        get_gemini_response_async,
+        get_gemini_response_with_key,
+        get_gemini_response_with_key_async,
+        load_gemini_key,
+        stream_gemini_response,
+        stream_gemini_response_with_key,
+    )
 except Exception:
     get_gemini_response = None
+    get_gemini_response_async = None
     get_gemini_response_with_key = None
+    get_gemini_response_with_key_async = None
     load_gemini_key = None
+    stream_gemini_response = None
+    stream_gemini_response_with_key = None
 
 try:
-    from toaster.llm_agents.grok import get_grok_response, get_grok_response_with_key, load_grok_key
+    from toaster.llm_agents.grok import (
+        get_grok_response_async,
+        get_grok_response_with_key_async,
+        load_grok_key,
+        stream_grok_response,
+        stream_grok_response_with_key,
+    )
 except Exception:
-    get_grok_response = None
-    get_grok_response_with_key = None
+    get_grok_response_async = None
+    get_grok_response_with_key_async = None
     load_grok_key = None
+    stream_grok_response = None
+    stream_grok_response_with_key = None
 
 __all__ = [
     "CommandRegistry", 
@@ -27,9 +47,15 @@ __all__ = [
     "load_config", 
     "load_token",
     "get_gemini_response",
+    "get_gemini_response_async",
     "get_gemini_response_with_key", 
+    "get_gemini_response_with_key_async",
     "load_gemini_key",
-    "get_grok_response",
-    "get_grok_response_with_key",
-    "load_grok_key"
+    "stream_gemini_response",
+    "stream_gemini_response_with_key",
+    "get_grok_response_async",
+    "get_grok_response_with_key_async",
+    "load_grok_key",
+    "stream_grok_response",
+    "stream_grok_response_with_key",
 ]
@@ -4,6 +4,7 @@ Contains all callback functions for registered commands.
 Each function must be async and accept a discord.ext.commands.Context parameter.
 """
 
+import asyncio
 import discord
 from discord.ext import commands
 from datetime import datetime, timedelta
@@ -14,8 +15,12 @@ import sys
 
 from toaster.modules.mlb import get_standings
 from toaster.modules.pollen import result_handler
-from toaster import get_gemini_response_with_key
-from toaster.config import load_config
+from toaster import get_gemini_response_with_key_async
+from toaster.config import get_owner_user_id, invalidate_config_cache
+from toaster.http_client import get_http_client
+from toaster.llm_agents.result_cache import get_cache_stats
+from toaster.llm_agents.router import get_provider_router
+from toaster.state import run_async_shutdown_hooks, run_shutdown_hooks
 
 
 async def hello_command(ctx: commands.Context) -> None:
@@ -86,6 +91,70 @@ async def uptime_command(ctx: commands.Context) -> None:
     await ctx.send(f"⏰ Bot has been online for: {uptime_str}")
 
 
+async def llm_cache_command(ctx: commands.Context) -> None:
+    """
+    Show hit/miss counters for the cached LLM classifiers.
+    """
+    stats = get_cache_stats()
+    if not stats:
+        await ctx.send("🧠 No LLM caches are active")
+        return
+
+    lines = ["🧠 **LLM result caches**"]
+    for name, cache_stats in stats:
+        lines.append(
+            f"- `{name}`: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%}), {cache_stats['entries']} entries"
+        )
+    await ctx.send("\n".join(lines))
+
+
+async def http_stats_command(ctx: commands.Context) -> None:
+    """
+    Show request, error and latency counters per host for the shared HTTP client.
+    """
+    stats = get_http_client().stats()
+    if not stats:
+        await ctx.send("🌐 No HTTP requests made yet")
+        return
+
+    lines = ["🌐 **HTTP client**"]
+    for host, host_stats in stats:
+        lines.append(
+            f"- `{host}`: {host_stats['requests']:.0f} requests, {host_stats['errors']:.0f} errors, "
+            f"{host_stats['retries']:.0f} retries, avg {host_stats['avg_latency'] * 1000:.0f} ms, "
+            f"{host_stats['bytes'] / 1024:.0f} KiB"
+        )
+    await ctx.send("\n".join(lines))
+
+
+async def ai_providers_command(ctx: commands.Context) -> None:
+    """
+    Show health, p90 latency and hedging counters for each AI provider.
+    """
+    stats = get_provider_router().stats()
+    if not any(provider_stats["configured"] for _, provider_stats in stats):
+        await ctx.send("🤖 No AI providers are configured")
+        return
+
+    def seconds(value) -> str:
+        return f"{value:.1f}s" if value is not None else "n/a"
+
+    lines = ["🤖 **AI providers** (in order of preference)"]
+    for name, provider_stats in stats:
+        if not provider_stats["configured"]:
+            lines.append(f"- `{name}` (not configured)")
+            continue
+        state = "up" if provider_stats["available"] else "cooling down"
+        lines.append(
+            f"- `{name}` ({state}): {provider_stats['requests']} requests, "
+            f"{provider_stats['error_rate']:.0%} recent errors, p90 reply {seconds(provider_stats['p90_reply'])}, "
+            f"p90 first chunk {seconds(provider_stats['p90_first_chunk'])}, "
+            f"{provider_stats['hedges']} hedged starts, {provider_stats['wins']} wins"
+        )
+    await ctx.send("\n".join(lines))
+
+
 async def toast_command(ctx: commands.Context) -> None:
     """
     Toggle channel blacklist for Toast to speak in.
@@ -119,6 +188,7 @@ async def toast_command(ctx: commands.Context) -> None:
             data["channels"] = channels
             with open(blacklist_file, 'w') as f:
                 json.dump(data, f, indent=2)
+            invalidate_config_cache(blacklist_file)
             await ctx.send(f"✅ Unmuted channel '{channel_name}' (ID: {channel_id})! I can now speak here again.")
         else:
             # Add to blacklist
@@ -127,6 +197,7 @@ async def toast_command(ctx: commands.Context) -> None:
             data["channels"] = channels
             with open(blacklist_file, 'w') as f:
                 json.dump(data, f, indent=2)
+            invalidate_config_cache(blacklist_file)
             await ctx.send(f"🤐 Muted channel '{channel_name}' (ID: {channel_id}). I won't respond here unless mentioned. Use `$toast` again to unmute.")
     
     except Exception as e:
@@ -139,6 +210,9 @@ async def reboot_command(ctx: commands.Context) -> None:
     """
     try:
         await ctx.send("🔄 **Rebooting...**")
+        # Persist in-memory state before the replacement process starts reading it
+        run_shutdown_hooks()
+        await run_async_shutdown_hooks()
         script_path = Path(__file__).resolve().parents[1] / "toast.py"
         executable = getattr(sys, "executable", None) or "python"
         subprocess.Popen([executable, str(script_path)])
@@ -178,10 +252,12 @@ async def mlb_all_standings_command(ctx: commands.Context) -> None:
         (103, 200, "AL West"),
     ]
 
-    all_text = ""
-    for league_id, division_id, title in divisions:
-        text = get_standings(league_id, division_id, f"{title} Standings")
-        all_text += text + "\n"
+    # statsapi is blocking; fetch the divisions concurrently off the event loop
+    texts = await asyncio.gather(*(
+        asyncio.to_thread(get_standings, league_id, division_id, f"{title} Standings")
+        for league_id, division_id, title in divisions
+    ))
+    all_text = "".join(text + "\n" for text in texts)
     await ctx.send(all_text)
 
 
@@ -208,7 +284,7 @@ async def mlb_division_standings_command(ctx: commands.Context, division: str) -
         return
 
     league_id, division_id, title = mapping[normalized]
-    text = get_standings(league_id, division_id, f"{title} Standings")
+    text = await asyncio.to_thread(get_standings, league_id, division_id, f"{title} Standings")
     await ctx.send(text)
 
 
@@ -216,7 +292,7 @@ async def pollen_command(ctx: commands.Context) -> None:
     """
     Get the current pollen count in Atlanta.
     """
-    await ctx.send(result_handler())
+    await ctx.send(await result_handler())
 
 
 async def gemini_command(ctx: commands.Context, *, message: str) -> None:
@@ -224,14 +300,12 @@ async def gemini_command(ctx: commands.Context, *, message: str) -> None:
     Get a response from Gemini AI.
     Usage: $gemini <message>
     """
-    response, error = get_gemini_response_with_key("", message)
+    response, error = await get_gemini_response_with_key_async("", message)
     if response:
         await ctx.send(response)
     else:
         # Send error to owner instead of channel
-        config = load_config("config")
-        bot_config = config.get("bot_config", {})
-        owner_id = bot_config.get("owner_user_id")
+        owner_id = get_owner_user_id("config")
         if owner_id:
             try:
                 owner = await ctx.bot.fetch_user(owner_id)
@@ -246,7 +320,7 @@ async def weather_command(ctx: commands.Context) -> None:
     Get key weather messages for Atlanta from NWS.
     """
     from toaster.modules.nws_memo import get_atl_key_messages_formatted
-    message = get_atl_key_messages_formatted()
+    message = await get_atl_key_messages_formatted()
     if not message.startswith("No"):
         await ctx.send(message)
 
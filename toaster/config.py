@@ -1,11 +1,86 @@
 """
 Configuration Loader
 Centralizes loading of bot configuration from JSON files.
+
+Parsed files are cached in memory and re-read only when their modification
+time or size changes, so hot paths can call these loaders per message without
+file I/O while edits on disk still take effect without a restart.
 """
 
 import json
+import time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Optional, Union
+
+# Minimum seconds between stat() checks of a cached config file
+CONFIG_RECHECK_SECONDS = 1.0
+
+# Resolved path -> {"signature": (mtime_ns, size) | None, "checked": float, "value": Any}
+_file_cache: Dict[str, Dict[str, Any]] = {}
+
+
+def _read_cached(path: Path, parse: Callable[[Any], Any] = lambda data: data, default: Any = None) -> Any:
+    """
+    Return the parsed contents of a JSON file, re-reading it only when it changes.
+
+    Args:
+        path: JSON file to read
+        parse: Transform applied to the decoded JSON; its result is what gets cached
+        default: Value returned (and cached) while the file does not exist
+
+    Raises:
+        json.JSONDecodeError / OSError: If the file exists but cannot be read
+    """
+    key = str(path)
+    now = time.monotonic()
+    entry = _file_cache.get(key)
+    if entry is not None and now - entry["checked"] < CONFIG_RECHECK_SECONDS:
+        return entry["value"]
+
+    try:
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        signature = None
+
+    if entry is not None and entry["signature"] == signature:
+        entry["checked"] = now
+        return entry["value"]
+
+    if signature is None:
+        value = default
+    else:
+        with open(path, 'r') as f:
+            value = parse(json.load(f))
+    _file_cache[key] = {"signature": signature, "checked": now, "value": value}
+    return value
+
+
+def invalidate_config_cache(path: Optional[Union[str, Path]] = None) -> None:
+    """
+    Drop cached config so the next access re-reads from disk.
+
+    Args:
+        path: Specific file to invalidate, or None to clear everything
+    """
+    if path is None:
+        _file_cache.clear()
+    else:
+        _file_cache.pop(str(Path(path)), None)
+
+
+def load_config_file(filename: str, config_path: str = "config", default: Any = None) -> Any:
+    """
+    Load a single JSON file from the config folder through the cache.
+
+    Callers must treat the returned value as read-only; it is shared.
+
+    Args:
+        filename: File name inside the config folder (e.g. "gemini_key.json")
+        config_path: Path to config folder
+        default: Value returned if the file does not exist
+    """
+    return _read_cached(Path(config_path) / filename, default=default)
 
 
 def load_config(config_path: str = "config") -> Dict[str, Any]:
@@ -18,41 +93,25 @@ def load_config(config_path: str = "config") -> Dict[str, Any]:
     Returns:
         Dictionary with 'token', 'commands', and 'schedules' keys
     """
-    config_dir = Path(config_path)
-    
-    result = {
-        "token": None,
-        "commands": [],
-        "schedules": [],
-        "bot_config": {}
+    token_data = load_config_file("toast_discord_bot_token.json", config_path)
+
+    return {
+        "token": token_data.get("token") if token_data else None,
+        "commands": load_config_file("commands.json", config_path, default=[]),
+        "schedules": load_config_file("schedule.json", config_path, default=[]),
+        "bot_config": load_config_file("bot_config.json", config_path, default={}),
     }
-    
-    # Load token
-    token_file = config_dir / "toast_discord_bot_token.json"
-    if token_file.exists():
-        with open(token_file, 'r') as f:
-            token_data = json.load(f)
-            result["token"] = token_data.get("token")
-    
-    # Load commands
-    commands_file = config_dir / "commands.json"
-    if commands_file.exists():
-        with open(commands_file, 'r') as f:
-            result["commands"] = json.load(f)
-    
-    # Load schedules
-    schedules_file = config_dir / "schedule.json"
-    if schedules_file.exists():
-        with open(schedules_file, 'r') as f:
-            result["schedules"] = json.load(f)
-    
-    # Load bot config
-    bot_config_file = config_dir / "bot_config.json"
-    if bot_config_file.exists():
-        with open(bot_config_file, 'r') as f:
-            result["bot_config"] = json.load(f)
-    
-    return result
+
+
+def get_bot_config(config_path: str = "config") -> Dict[str, Any]:
+    """Return the contents of bot_config.json (empty dict if missing)."""
+    return load_config_file("bot_config.json", config_path, default={}) or {}
+
+
+def get_owner_user_id(config_path: str = "config") -> Optional[int]:
+    """Return the configured owner's Discord user ID, if any."""
+    owner_id = get_bot_config(config_path).get("owner_user_id")
+    return int(owner_id) if owner_id else None
 
 
 def load_token(config_path: str = "config") -> str:
@@ -75,6 +134,23 @@ def load_token(config_path: str = "config") -> str:
     return config["token"]
 
 
+def _parse_channel_blacklist(data: Any) -> list:
+    channels = data.get("channels", [])
+    result = []
+
+    for entry in channels:
+        if isinstance(entry, int):
+            result.append({"id": entry, "nickname": None})
+        elif isinstance(entry, dict):
+            channel_id = entry.get("id")
+            if channel_id is None:
+                continue
+            nickname = entry.get("nickname") or entry.get("name")
+            result.append({"id": int(channel_id), "nickname": nickname})
+
+    return result
+
+
 def load_channel_blacklist(config_path: str = "config") -> list:
     """
     Load blacklisted channel definitions for random AI responses.
@@ -87,25 +163,7 @@ def load_channel_blacklist(config_path: str = "config") -> list:
     """
     try:
         blacklist_file = Path(config_path) / "channel_blacklist.json"
-        if blacklist_file.exists():
-            with open(blacklist_file, 'r') as f:
-                data = json.load(f)
-
-                channels = data.get("channels", [])
-                result = []
-
-                for entry in channels:
-                    if isinstance(entry, int):
-                        result.append({"id": entry, "nickname": None})
-                    elif isinstance(entry, dict):
-                        channel_id = entry.get("id")
-                        if channel_id is None:
-                            continue
-                        nickname = entry.get("nickname") or entry.get("name")
-                        result.append({"id": int(channel_id), "nickname": nickname})
-
-                return result
-        return []
+        return list(_read_cached(blacklist_file, parse=_parse_channel_blacklist, default=[]))
     except Exception as e:
         print(f"Error loading channel blacklist: {e}")
         return []
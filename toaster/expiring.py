@@ -0,0 +1,158 @@
+"""
+Expiring Dict
+Size-capped LRU mapping with idle and per-entry expiry, plus a background sweeper.
+"""
+
+import asyncio
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Callable, Hashable, Iterator, List, Optional, Tuple
+
+# Seconds between background sweeps of every ExpiringDict
+SWEEP_INTERVAL_SECONDS = 300.0
+
+# Every live ExpiringDict, so one sweeper task covers them all
+_instances: "weakref.WeakSet[ExpiringDict]" = weakref.WeakSet()
+
+
+class ExpiringDict(MutableMapping):
+    """
+    Dict that forgets keys nobody has used for a while.
+
+    - At most `max_keys` entries; inserting past that evicts the least
+      recently used key. `max_keys=None` disables eviction, for state that
+      must only ever leave by expiring (e.g. mutes).
+    - Entries untouched for `idle_seconds` (None = never) are dropped.
+    - `set(key, value, ttl=...)` gives one entry a fixed lifetime
+      regardless of access (used for mutes).
+
+    Expired entries disappear on access and are purged in bulk by `sweep()`,
+    which `run_sweeper` calls periodically for every instance.
+
+    An optional `loader(key)` is consulted on a miss and may return
+    `(value, ttl)` to populate the entry (e.g. restoring from a snapshot).
+    """
+
+    # Compared by identity so instances can live in the sweeper's WeakSet
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    def __init__(
+        self,
+        max_keys: Optional[int] = 1000,
+        idle_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        loader: Optional[Callable[[Hashable], Optional[Tuple[Any, Optional[float]]]]] = None,
+    ):
+        self.max_keys = max_keys
+        self.idle_seconds = idle_seconds
+        self.loader = loader
+        self._clock = clock
+        # key -> (value, last access, absolute expiry or None); ordered oldest access first
+        self._data: "OrderedDict[Hashable, Tuple[Any, float, Optional[float]]]" = OrderedDict()
+        self.evictions = 0
+        _instances.add(self)
+
+    def _expired(self, entry: Tuple[Any, float, Optional[float]], now: float) -> bool:
+        _, last_access, expires_at = entry
+        if expires_at is not None and now >= expires_at:
+            return True
+        return self.idle_seconds is not None and now - last_access >= self.idle_seconds
+
+    def _load(self, key: Hashable) -> bool:
+        if self.loader is None:
+            return False
+        restored = self.loader(key)
+        if restored is None:
+            return False
+        value, ttl = restored
+        self.set(key, value, ttl=ttl)
+        return True
+
+    def __getitem__(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            if not self._load(key):
+                raise KeyError(key)
+            entry = self._data[key]
+        now = self._clock()
+        if self._expired(entry, now):
+            del self._data[key]
+            raise KeyError(key)
+        self._data[key] = (entry[0], now, entry[2])
+        self._data.move_to_end(key)
+        return entry[0]
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.set(key, value)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store `value`; with `ttl`, the entry expires `ttl` seconds from now even if used."""
+        now = self._clock()
+        self._data[key] = (value, now, now + ttl if ttl is not None else None)
+        self._data.move_to_end(key)
+        while self.max_keys is not None and len(self._data) > self.max_keys:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def __delitem__(self, key: Hashable) -> None:
+        del self._data[key]
+
+    def __contains__(self, key: object) -> bool:
+        entry = self._data.get(key)
+        if entry is None:
+            return self._load(key)
+        return not self._expired(entry, self._clock())
+
+    def __iter__(self) -> Iterator[Hashable]:
+        now = self._clock()
+        return iter([key for key, entry in self._data.items() if not self._expired(entry, now)])
+
+    def __len__(self) -> int:
+        """Number of live entries; expired ones not yet swept are not counted."""
+        now = self._clock()
+        return sum(1 for entry in self._data.values() if not self._expired(entry, now))
+
+    def _remaining(self, entry: Tuple[Any, float, Optional[float]], now: float) -> Optional[float]:
+        """Seconds until `entry` expires by TTL or idleness if left untouched; None if never."""
+        _, last_access, expires_at = entry
+        remaining = None if expires_at is None else expires_at - now
+        if self.idle_seconds is not None:
+            idle_left = last_access + self.idle_seconds - now
+            remaining = idle_left if remaining is None else min(remaining, idle_left)
+        return remaining
+
+    def snapshot_items(self) -> List[Tuple[Hashable, Any, Optional[float]]]:
+        """(key, value, seconds until expiry or None) for live entries, without touching them."""
+        now = self._clock()
+        return [
+            (key, entry[0], self._remaining(entry, now))
+            for key, entry in self._data.items()
+            if not self._expired(entry, now)
+        ]
+
+    def sweep(self) -> int:
+        """Drop every expired entry; returns how many were removed."""
+        now = self._clock()
+        stale: List[Hashable] = [key for key, entry in self._data.items() if self._expired(entry, now)]
+        for key in stale:
+            del self._data[key]
+        self.evictions += len(stale)
+        return len(stale)
+
+
+def sweep_all() -> int:
+    """Sweep every live ExpiringDict; returns the total number of entries removed."""
+    return sum(instance.sweep() for instance in list(_instances))
+
+
+async def run_sweeper(interval_seconds: float = SWEEP_INTERVAL_SECONDS) -> None:
+    """Periodically purge expired entries from every ExpiringDict."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            sweep_all()
+        except Exception as e:
+            print(f"Expiring dict sweep failed: {e}")
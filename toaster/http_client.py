@@ -0,0 +1,364 @@
+"""
+Shared HTTP Client
+One pooled aiohttp session used by every scraper and API client in the bot.
+
+- Keep-alive connection pools, reused across modules and requests
+- Consistent connect/total timeouts
+- Retry with exponential backoff and jitter on connection errors, timeouts,
+  429 and 5xx, honouring `Retry-After`
+- A concurrency cap per host, so one slow site cannot use up the pool
+- Per-host metrics (requests, errors, retries, bytes, latency)
+- Line streaming for server-sent events, with an idle timeout instead of a total one
+
+Usage:
+    from toaster.http_client import get_http_client
+
+    data = await get_http_client().get_json("https://api.weather.gov/...")
+"""
+
+import asyncio
+import json
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from toaster.state import register_async_shutdown_hook
+
+# Seconds allowed for a whole request (connect + response body) unless the caller overrides it
+DEFAULT_TIMEOUT_SECONDS = 15.0
+# Seconds a stream may go without receiving data before it is abandoned
+STREAM_IDLE_TIMEOUT_SECONDS = 30.0
+# Seconds allowed to establish a connection
+CONNECT_TIMEOUT_SECONDS = 5.0
+# Open connections across all hosts
+MAX_CONNECTIONS = 64
+# Requests in flight per host
+MAX_CONCURRENT_PER_HOST = 6
+# Seconds an idle pooled connection is kept open
+KEEPALIVE_SECONDS = 30.0
+# Extra attempts after the first for retryable failures
+DEFAULT_RETRIES = 2
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 8.0
+# Longest Retry-After we are willing to sleep through before giving up
+MAX_RETRY_AFTER_SECONDS = 30.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+DEFAULT_HEADERS = {"User-Agent": "toast-bot/1.0"}
+
+
+class HttpStatusError(Exception):
+    """Raised for a non-2xx response once retries (if any) are exhausted."""
+
+    def __init__(self, status: int, url: str, body: bytes = b"", retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status} for {url}")
+        self.status = status
+        self.url = url
+        self.body = body
+        self.retry_after = retry_after
+
+
+class ResponseTooLarge(Exception):
+    """Raised when a response body exceeds the caller's `max_bytes`."""
+
+
+class HttpResponse:
+    """Fully-read response body plus status and headers."""
+
+    def __init__(self, status: int, url: str, headers: Mapping[str, str], body: bytes):
+        self.status = status
+        self.url = url
+        self.headers = headers
+        self.body = body
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.body.decode(encoding, errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Delay before retry number `attempt` (0-based): Retry-After if given, else jittered exponential backoff."""
+    if retry_after is not None:
+        return min(retry_after, MAX_RETRY_AFTER_SECONDS)
+    ceiling = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def _host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+class HttpClient:
+    """
+    Pooled async HTTP client shared across the bot.
+
+    The aiohttp session is created lazily inside the running event loop and
+    recreated if the client is later used from a different loop (e.g. a CLI
+    `asyncio.run`), so importing this module never needs a loop.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        max_per_host: int = MAX_CONCURRENT_PER_HOST,
+        timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+        retries: int = DEFAULT_RETRIES,
+    ):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout_seconds = timeout_seconds
+        self.retries = retries
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        # host -> counters; see `stats()`
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed and self._loop is loop:
+            return self._session
+        stale = self._session
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_per_host,
+            keepalive_timeout=KEEPALIVE_SECONDS,
+            ttl_dns_cache=300,
+        )
+        self._session = aiohttp.ClientSession(connector=connector, headers=DEFAULT_HEADERS)
+        self._loop = loop
+        self._host_limits = {}
+        if stale is not None and not stale.closed:
+            # Left over from a previous event loop; release its pooled connections
+            try:
+                await stale.close()
+            except Exception as e:
+                print(f"Failed to close HTTP session from a previous event loop: {e}")
+        return self._session
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_per_host)
+            self._host_limits[host] = semaphore
+        return semaphore
+
+    def _record(self, host: str, **increments: float) -> None:
+        stats = self._stats.setdefault(host, {"requests": 0, "errors": 0, "retries": 0, "bytes": 0, "latency_total": 0.0})
+        for name, amount in increments.items():
+            stats[name] += amount
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Mapping[str, str]] = None,
+        params: Optional[Mapping[str, Any]] = None,
+        json_body: Any = None,
+        data: Any = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        allow_redirects: bool = True,
+        raise_for_status: bool = True,
+    ) -> HttpResponse:
+        """
+        Send a request and read the whole body.
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            headers: Extra headers (merged over the client defaults)
+            params: Query string parameters
+            json_body: JSON-serializable request body
+            data: Raw request body
+            timeout: Total seconds per attempt (default DEFAULT_TIMEOUT_SECONDS)
+            retries: Extra attempts for retryable failures (default DEFAULT_RETRIES)
+            max_bytes: Abort with ResponseTooLarge if the body is larger than this
+            allow_redirects: Follow redirects
+            raise_for_status: Raise HttpStatusError for non-2xx responses
+
+        Returns:
+            The HttpResponse
+        """
+        host = _host(url)
+        attempts = 1 + (self.retries if retries is None else retries)
+        client_timeout = aiohttp.ClientTimeout(
+            total=timeout or self.timeout_seconds,
+            connect=min(CONNECT_TIMEOUT_SECONDS, timeout or self.timeout_seconds),
+        )
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            retry_after: Optional[float] = None
+            started = time.monotonic()
+            try:
+                async with self._host_limit(host):
+                    session = await self._get_session()
+                    async with session.request(
+                        method,
+                        url,
+                        headers=headers,
+                        params=params,
+                        json=json_body,
+                        data=data,
+                        timeout=client_timeout,
+                        allow_redirects=allow_redirects,
+                    ) as resp:
+                        body = await self._read_body(resp, max_bytes)
+                        response = HttpResponse(resp.status, str(resp.url), resp.headers, body)
+                self._record(host, requests=1, bytes=len(body), latency_total=time.monotonic() - started)
+            except ResponseTooLarge:
+                self._record(host, requests=1, errors=1, latency_total=time.monotonic() - started)
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._record(host, requests=1, errors=1, latency_total=time.monotonic() - started)
+                if last_attempt:
+                    raise
+                print(f"HTTP {method} {url} failed ({type(e).__name__}: {e}); retrying")
+            else:
+                if response.status < 400 or not raise_for_status:
+                    return response
+                self._record(host, errors=1)
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if last_attempt or response.status not in RETRY_STATUSES or (retry_after or 0) > MAX_RETRY_AFTER_SECONDS:
+                    raise HttpStatusError(response.status, url, response.body, retry_after)
+            self._record(host, retries=1)
+            await asyncio.sleep(backoff_delay(attempt, retry_after))
+        raise AssertionError("unreachable")
+
+    async def stream_lines(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: Optional[Mapping[str, str]] = None,
+        json_body: Any = None,
+        idle_timeout: float = STREAM_IDLE_TIMEOUT_SECONDS,
+        retries: Optional[int] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Send a request and yield the response body line by line as it arrives.
+
+        Failures before the response starts (connection errors, 429/5xx) are
+        retried like `request`; once the first line has been yielded, errors
+        propagate to the caller. There is no total timeout, only `idle_timeout`
+        between reads, so long generations aren't cut off.
+
+        Yields:
+            Decoded lines without the trailing newline
+        """
+        host = _host(url)
+        attempts = 1 + (self.retries if retries is None else retries)
+        client_timeout = aiohttp.ClientTimeout(total=None, connect=CONNECT_TIMEOUT_SECONDS, sock_read=idle_timeout)
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            retry_after: Optional[float] = None
+            started = time.monotonic()
+            streaming = False
+            try:
+                async with self._host_limit(host):
+                    session = await self._get_session()
+                    async with session.request(
+                        method, url, headers=headers, json=json_body, timeout=client_timeout
+                    ) as resp:
+                        if resp.status >= 400:
+                            body = await resp.read()
+                            self._record(host, requests=1, errors=1, latency_total=time.monotonic() - started)
+                            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                            if last_attempt or resp.status not in RETRY_STATUSES or (retry_after or 0) > MAX_RETRY_AFTER_SECONDS:
+                                raise HttpStatusError(resp.status, url, body, retry_after)
+                        else:
+                            # Latency is time to the response headers; bytes are counted as they stream
+                            self._record(host, requests=1, latency_total=time.monotonic() - started)
+                            streaming = True
+                            async for raw in resp.content:
+                                self._record(host, bytes=len(raw))
+                                yield raw.decode("utf-8", errors="replace").rstrip("\r\n")
+                            return
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if streaming:
+                    self._record(host, errors=1)
+                    raise
+                self._record(host, requests=1, errors=1, latency_total=time.monotonic() - started)
+                if last_attempt:
+                    raise
+                print(f"HTTP {method} {url} stream failed ({type(e).__name__}: {e}); retrying")
+            self._record(host, retries=1)
+            await asyncio.sleep(backoff_delay(attempt, retry_after))
+        raise AssertionError("unreachable")
+
+    @staticmethod
+    async def _read_body(resp: aiohttp.ClientResponse, max_bytes: Optional[int]) -> bytes:
+        if max_bytes is None:
+            return await resp.read()
+        if resp.content_length is not None and resp.content_length > max_bytes:
+            raise ResponseTooLarge(f"{resp.url} is {resp.content_length} bytes (limit {max_bytes})")
+        body = await resp.content.read(max_bytes + 1)
+        if len(body) > max_bytes:
+            raise ResponseTooLarge(f"{resp.url} exceeds {max_bytes} bytes")
+        return body
+
+    async def get(self, url: str, **kwargs: Any) -> HttpResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> HttpResponse:
+        return await self.request("POST", url, **kwargs)
+
+    async def get_text(self, url: str, **kwargs: Any) -> str:
+        return (await self.get(url, **kwargs)).text()
+
+    async def get_json(self, url: str, **kwargs: Any) -> Any:
+        return (await self.get(url, **kwargs)).json()
+
+    async def get_bytes(self, url: str, **kwargs: Any) -> bytes:
+        return (await self.get(url, **kwargs)).body
+
+    def stats(self) -> List[Tuple[str, Dict[str, float]]]:
+        """(host, metrics) sorted by request count, with average latency in seconds."""
+        report = []
+        for host, stats in self._stats.items():
+            entry = dict(stats)
+            entry["avg_latency"] = stats["latency_total"] / stats["requests"] if stats["requests"] else 0.0
+            report.append((host, entry))
+        report.sort(key=lambda item: item[1]["requests"], reverse=True)
+        return report
+
+    async def close(self) -> None:
+        """Close the pooled session; the next request opens a new one."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+_client: Optional[HttpClient] = None
+
+
+def get_http_client() -> HttpClient:
+    """Return the process-wide HTTP client."""
+    global _client
+    if _client is None:
+        _client = HttpClient()
+        register_async_shutdown_hook(_client.close)
+    return _client
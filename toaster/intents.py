@@ -0,0 +1,121 @@
+"""
+Intent Router
+Classifies a message against every registered phrase list in a single call.
+
+Phrases are grouped by label and pruned of redundant entries, then matched
+with `str` containment, which runs at C speed; the first hit settles a
+label. Regex intents are attached to anchor phrases and only run when one
+of their anchors was seen.
+"""
+
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+# Label prefix for phrases that only gate a regex intent
+_ANCHOR_PREFIX = "anchor:"
+
+
+class PhraseMatcher:
+    """Reports which labels have a (case-insensitive) phrase occurring in the text."""
+
+    def __init__(self):
+        self._phrases: Dict[str, Set[str]] = {}
+        self._compiled: List[Tuple[str, Tuple[str, ...]]] = []
+        self._built = True
+
+    def add(self, phrase: str, label: str) -> None:
+        """Register a (case-insensitive) substring that yields `label` when found."""
+        phrase = phrase.lower()
+        if not phrase:
+            return
+        self._phrases.setdefault(label, set()).add(phrase)
+        self._built = False
+
+    def _build(self) -> None:
+        compiled = []
+        for label, phrases in self._phrases.items():
+            # A phrase containing a shorter phrase of the same label can never be the first hit
+            ordered = sorted(phrases, key=lambda phrase: (len(phrase), phrase))
+            kept: List[str] = []
+            for phrase in ordered:
+                if not any(shorter in phrase for shorter in kept):
+                    kept.append(phrase)
+            compiled.append((label, tuple(kept)))
+        self._compiled = compiled
+        self._built = True
+
+    def labels(self, text_lower: str) -> Set[str]:
+        """Return every label with at least one phrase in `text_lower` (already lowercased)."""
+        if not self._built:
+            self._build()
+        found: Set[str] = set()
+        for label, phrases in self._compiled:
+            for phrase in phrases:
+                if phrase in text_lower:
+                    found.add(label)
+                    break
+        return found
+
+
+class MessageIntents:
+    """Result of classifying one message: intent names plus regex matches."""
+
+    __slots__ = ("text", "text_lower", "names", "matches")
+
+    def __init__(self, text: str, text_lower: str, names: FrozenSet[str], matches: Dict[str, "re.Match"]):
+        self.text = text
+        self.text_lower = text_lower
+        self.names = names
+        self.matches = matches
+
+    def __contains__(self, intent: str) -> bool:
+        return intent in self.names
+
+    def match(self, intent: str) -> Optional["re.Match"]:
+        """Return the regex match for a pattern intent, if it matched."""
+        return self.matches.get(intent)
+
+    def __repr__(self) -> str:
+        return f"MessageIntents({sorted(self.names)})"
+
+
+class IntentRouter:
+    """
+    Registry of phrase and regex intents evaluated together.
+
+    - `add_phrases` marks an intent present when any phrase is a substring
+      of the lowercased message.
+    - `add_pattern` runs a compiled regex on the original text, but only
+      when one of its anchor phrases occurs, so most messages never reach
+      the regex engine.
+    """
+
+    def __init__(self):
+        self._matcher = PhraseMatcher()
+        self._patterns: List[Tuple[str, "re.Pattern", str]] = []
+
+    def add_phrases(self, intent: str, phrases: Iterable[str]) -> None:
+        for phrase in phrases:
+            self._matcher.add(phrase, intent)
+
+    def add_pattern(self, intent: str, pattern: str, anchors: Iterable[str], flags: int = re.IGNORECASE) -> None:
+        anchor_label = _ANCHOR_PREFIX + intent
+        for anchor in anchors:
+            self._matcher.add(anchor, anchor_label)
+        self._patterns.append((intent, re.compile(pattern, flags), anchor_label))
+
+    def classify(self, text: str) -> MessageIntents:
+        """Classify `text` and return the matched intents."""
+        text = text or ""
+        text_lower = text.lower()
+        labels = self._matcher.labels(text_lower)
+
+        matches: Dict[str, "re.Match"] = {}
+        for intent, regex, anchor_label in self._patterns:
+            if anchor_label in labels:
+                match = regex.search(text)
+                if match:
+                    matches[intent] = match
+
+        names = frozenset(label for label in labels if not label.startswith(_ANCHOR_PREFIX)) | frozenset(matches)
+        return MessageIntents(text, text_lower, names, matches)
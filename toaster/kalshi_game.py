@@ -1,39 +1,41 @@
 import asyncio
-import json
 import os
 import re
+import time
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
-import requests
+from toaster.http_client import get_http_client
+from toaster.kalshi_store import StoredUsers, UserRecord, get_kalshi_store
 
 DEFAULT_STARTING_BALANCE = 100000.0
+DB_FILE = Path("config/kalshi_game.db")
+# Pre-SQLite state file; imported into DB_FILE on first load and then renamed
 STATE_FILE = Path("config/kalshi_game_state.json")
+# Entries shown by a "betting history" reply
+HISTORY_PAGE_SIZE = 15
 
+# Seconds an open market's data is reused before fetching it again
+MARKET_CACHE_TTL_SECONDS = 60.0
+# Markets closing further out than this are only re-checked every FAR_MARKET_POLL_SECONDS
+FAR_MARKET_HORIZON_SECONDS = 6 * 60 * 60
+FAR_MARKET_POLL_SECONDS = 60 * 60
+# Max market requests in flight during one resolution cycle
+MAX_CONCURRENT_MARKET_FETCHES = 4
 
-def _state_path() -> Path:
-    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    return STATE_FILE
+# ticker -> (monotonic expiry, market data) for markets that are still open
+_market_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
 
 
 def load_state() -> Dict[str, Any]:
-    path = _state_path()
-    if not path.exists():
-        return {"users": {}}
-    try:
-        with path.open("r", encoding="utf-8") as handle:
-            data = json.load(handle)
-            if isinstance(data, dict):
-                return data
-    except Exception:
-        pass
-    return {"users": {}}
+    """Return a game state whose users are read from the database as they are accessed."""
+    return get_kalshi_store(DB_FILE, legacy_json=STATE_FILE).load_state()
 
 
 def save_state(state: Dict[str, Any]) -> None:
-    path = _state_path()
-    with path.open("w", encoding="utf-8") as handle:
-        json.dump(state, handle, indent=2, ensure_ascii=False)
+    """Write the users changed in `state` back to the database in one transaction."""
+    get_kalshi_store(DB_FILE, legacy_json=STATE_FILE).save_state(state)
 
 
 def _user_key(user_id: str) -> str:
@@ -57,6 +59,15 @@ def _ensure_user(state: Dict[str, Any], user_id: str, display_name: str) -> Dict
     return users[key]
 
 
+def _append_history(state: Dict[str, Any], user_key: str, field: str, entry: Dict[str, Any]) -> None:
+    """Record a ledger entry without loading the user's existing history."""
+    users = state["users"]
+    if isinstance(users, StoredUsers):
+        users.append_history(user_key, field, entry)
+    else:
+        users[user_key][field].append(entry)
+
+
 def _normalize_outcome_label(label: str) -> str:
     normalized = label.strip().lower()
     normalized = normalized.replace("the ", "", 1).strip()
@@ -149,7 +160,7 @@ def place_bet(state: Dict[str, Any], user_id: str, display_name: str, channel_id
         "status": "pending",
     }
     user["pending_bets"].append(bet)
-    user["bet_history"].append({
+    _append_history(state, _user_key(user_id), "bet_history", {
         "type": "bet",
         "amount": amount,
         "outcome": outcome.lower(),
@@ -170,20 +181,77 @@ def transfer_funds(state: Dict[str, Any], from_user_id: str, to_user_id: str, am
 
     from_user["balance"] -= amount
     to_user["balance"] += amount
-    from_user["transfers"].append({"to": to_user_id, "amount": amount})
-    from_user["bet_history"].append({"type": "transfer_out", "amount": amount, "to": to_user_id})
-    to_user["bet_history"].append({"type": "transfer_in", "amount": amount, "from": from_user_id})
+    _append_history(state, _user_key(from_user_id), "transfers", {"to": to_user_id, "amount": amount})
+    _append_history(state, _user_key(from_user_id), "bet_history", {"type": "transfer_out", "amount": amount, "to": to_user_id})
+    _append_history(state, _user_key(to_user_id), "bet_history", {"type": "transfer_in", "amount": amount, "from": from_user_id})
     return {"ok": True, "from_balance": from_user["balance"], "to_balance": to_user["balance"]}
 
 
-def fetch_market_data(ticker: str) -> Dict[str, Any]:
+async def fetch_market_data(ticker: str) -> Dict[str, Any]:
     url = f"https://external-api.kalshi.com/trade-api/v2/markets/{ticker}"
-    response = requests.get(url, timeout=20)
-    response.raise_for_status()
-    data = response.json()
+    data = await get_http_client().get_json(url, timeout=20)
     return data.get("market") or {}
 
 
+def _market_cache_ttl(market: Dict[str, Any]) -> float:
+    """Seconds to reuse an open market's data; long for markets that close far in the future."""
+    close_time = market.get("close_time")
+    if close_time:
+        try:
+            closes_at = datetime.fromisoformat(str(close_time).replace("Z", "+00:00"))
+            if closes_at.tzinfo is None:
+                closes_at = closes_at.replace(tzinfo=timezone.utc)
+            seconds_left = (closes_at - datetime.now(timezone.utc)).total_seconds()
+            if seconds_left > FAR_MARKET_HORIZON_SECONDS:
+                return min(FAR_MARKET_POLL_SECONDS, seconds_left - FAR_MARKET_HORIZON_SECONDS)
+        except ValueError:
+            pass
+    return MARKET_CACHE_TTL_SECONDS
+
+
+async def get_market_data(ticker: str) -> Dict[str, Any]:
+    """Return market data for `ticker`, serving still-open markets from a short-lived cache."""
+    now = time.monotonic()
+    cached = _market_cache.get(ticker)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+
+    market = await fetch_market_data(ticker)
+    if str(market.get("status") or "").lower() == "resolved":
+        _market_cache.pop(ticker, None)
+    else:
+        _market_cache[ticker] = (now + _market_cache_ttl(market), market)
+    return market
+
+
+def pending_tickers(state: Dict[str, Any]) -> Set[str]:
+    """Distinct tickers with at least one pending bet."""
+    users = state.get("users", {})
+    if isinstance(users, StoredUsers):
+        return users.pending_tickers()
+    return {
+        bet["ticker"]
+        for user in state.get("users", {}).values()
+        for bet in user.get("pending_bets", [])
+        if bet.get("ticker")
+    }
+
+
+async def fetch_markets(tickers: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Fetch each distinct ticker once, concurrently.
+
+    Tickers that fail to fetch are left out of the result.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_MARKET_FETCHES)
+
+    async def _fetch(ticker: str) -> Tuple[str, Dict[str, Any]]:
+        async with semaphore:
+            return ticker, await get_market_data(ticker)
+
+    results = await asyncio.gather(*(_fetch(ticker) for ticker in set(tickers)), return_exceptions=True)
+    return {ticker: market for result in results if not isinstance(result, BaseException) for ticker, market in [result]}
+
+
 def _notify_resolution(bot: Any, user: Dict[str, Any], bet: Dict[str, Any], won: bool, balance: float) -> None:
     if bot is None:
         return
@@ -212,20 +280,31 @@ def _notify_resolution(bot: Any, user: Dict[str, Any], bet: Dict[str, Any], won:
     try:
         loop = asyncio.get_running_loop()
     except RuntimeError:
-        asyncio.run(_send())
-    else:
-        loop.create_task(_send())
+        # The bot's client only works on its own loop; without one there is nobody to DM from
+        print(f"Skipping Kalshi notification for {user['user_id']}: no running event loop")
+        return
+    loop.create_task(_send())
+
 
+def resolve_pending_bets(state: Dict[str, Any], markets: Dict[str, Dict[str, Any]], bot=None) -> List[Dict[str, Any]]:
+    """Settle pending bets whose markets have resolved.
+
+    `markets` maps ticker -> market data, prefetched with `fetch_markets(pending_tickers(state))`.
+    """
+    users = state.get("users", {})
+    if isinstance(users, StoredUsers):
+        # Only load the users holding bets on the fetched markets
+        candidates = users.with_pending_bets(markets)
+    else:
+        candidates = list(users.items())
 
-def resolve_pending_bets(state: Dict[str, Any], bot=None) -> List[Dict[str, Any]]:
     resolved = []
-    for user_key, user in list(state.get("users", {}).items()):
+    for user_key, user in candidates:
         pending = list(user.get("pending_bets", []))
         still_pending = []
         for bet in pending:
-            try:
-                market = fetch_market_data(bet["ticker"])
-            except Exception:
+            market = markets.get(bet["ticker"])
+            if market is None:
                 still_pending.append(bet)
                 continue
 
@@ -242,7 +321,7 @@ def resolve_pending_bets(state: Dict[str, Any], bot=None) -> List[Dict[str, Any]
             bet["status"] = "resolved"
             bet["won"] = won
             bet["payout"] = payout
-            user["bet_history"].append({
+            _append_history(state, user_key, "bet_history", {
                 "type": "bet_result",
                 "ticker": bet["ticker"],
                 "outcome": outcome,
@@ -258,10 +337,14 @@ def resolve_pending_bets(state: Dict[str, Any], bot=None) -> List[Dict[str, Any]
 async def monitor_pending_bets(bot: Any, interval_seconds: float = 60.0) -> None:
     while True:
         try:
-            state = load_state()
-            resolved = resolve_pending_bets(state, bot=bot)
-            if resolved:
-                save_state(state)
+            tickers = pending_tickers(load_state())
+            if tickers:
+                markets = await fetch_markets(tickers)
+                # Reload after the awaits so bets placed meanwhile are not overwritten
+                state = load_state()
+                resolved = resolve_pending_bets(state, bot=bot, markets=markets)
+                if resolved:
+                    save_state(state)
         except Exception as exc:
             print(f"Kalshi resolution loop error: {exc}")
         await asyncio.sleep(interval_seconds)
@@ -271,15 +354,28 @@ def format_balance(user: Dict[str, Any]) -> str:
     return f"${user['balance']:.2f}"
 
 
-def format_history(user: Dict[str, Any]) -> str:
-    if not user.get("bet_history"):
-        return "No betting history yet."
-    lines = ["Betting history:"]
-    for item in user["bet_history"]:
+def format_history(user: Dict[str, Any], limit: int = HISTORY_PAGE_SIZE) -> str:
+    """Format the user's most recent `limit` history entries."""
+    if isinstance(user, UserRecord):
+        items, older_cursor = user.history(limit=limit)
+        has_more = older_cursor is not None
+    else:
+        all_items = user.get("bet_history") or []
+        items, has_more = all_items[-limit:], len(all_items) > limit
+    entries = []
+    for item in items:
         if item.get("type") == "bet":
-            lines.append(f"- Bet {item['amount']:.2f} on {item['outcome']} for {item['ticker']} ({item['status']})")
+            entries.append(f"- Bet {item['amount']:.2f} on {item['outcome']} for {item['ticker']} ({item['status']})")
+        elif item.get("type") == "bet_result":
+            result = f"won ${item['payout']:.2f}" if item.get("won") else "lost"
+            entries.append(f"- {item['ticker']} resolved {item['outcome']}: {result}")
         elif item.get("type") == "transfer_out":
-            lines.append(f"- Sent ${item['amount']:.2f} to {item['to']}")
+            entries.append(f"- Sent ${item['amount']:.2f} to {item['to']}")
         elif item.get("type") == "transfer_in":
-            lines.append(f"- Received ${item['amount']:.2f} from {item['from']}")
+            entries.append(f"- Received ${item['amount']:.2f} from {item['from']}")
+    if not entries:
+        return "No betting history yet."
+    # Count what is shown, not what was fetched, so the header never overstates the page
+    lines = [f"Betting history (most recent {len(entries)}):" if has_more else "Betting history:"]
+    lines.extend(entries)
     return "\n".join(lines)
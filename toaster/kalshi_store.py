@@ -0,0 +1,519 @@
+"""
+Kalshi Game Store
+SQLite (WAL) storage for the pretend Kalshi game with per-row updates.
+
+`load_state()` returns the same {"users": {...}} shape the game functions have
+always used, but user rows are only read when a handler touches them, and
+history fields are append-only logs. `StoredUsers.append_history` buffers
+a new entry without reading the ledger, which is only loaded if the
+entries themselves are read. `save_state()` writes back just the rows that changed,
+in one transaction, so a save costs O(rows touched) regardless of how many
+users or history entries exist.
+
+History lives in an append-only ledger. Entries are never rewritten: a reset
+appends a marker that hides everything before it, and a balance snapshot is
+recorded every SNAPSHOT_EVERY_ENTRIES ledger entries per user. Use `history()`
+for paginated or time-ranged reads instead of loading a user's whole list.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import MutableMapping, Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from toaster.state import register_shutdown_hook
+
+# Per-user lists kept in the ledger rather than on the user row
+HISTORY_FIELDS = ("bet_history", "transfers")
+# Ledger entry kind that hides all earlier entries of the same field
+RESET_KIND = "reset"
+# Record a balance snapshot after this many ledger entries for a user
+SNAPSHOT_EVERY_ENTRIES = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_key TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    display_name TEXT,
+    balance REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pending_bets (
+    user_key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    ticker TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user_key, position)
+);
+CREATE INDEX IF NOT EXISTS idx_pending_bets_ticker ON pending_bets (ticker);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_key TEXT NOT NULL,
+    field TEXT NOT NULL,
+    data TEXT NOT NULL,
+    kind TEXT NOT NULL DEFAULT '',
+    ts REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS balance_snapshots (
+    user_key TEXT NOT NULL,
+    ledger_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    balance REAL NOT NULL,
+    PRIMARY KEY (user_key, ledger_id)
+);
+"""
+
+# Created after columns added by `_upgrade_schema` exist
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_history_user ON history (user_key, field, id);
+CREATE INDEX IF NOT EXISTS idx_history_user_ts ON history (user_key, field, ts);
+CREATE INDEX IF NOT EXISTS idx_history_reset ON history (user_key, field, kind, id);
+CREATE INDEX IF NOT EXISTS idx_snapshots_user_ts ON balance_snapshots (user_key, ts);
+"""
+
+
+class HistoryLog(Sequence):
+    """
+    One user's ledger field, as seen through a loaded user record.
+
+    `append`/`extend` only buffer new entries, which `save_state` inserts;
+    the saved entries are read from the ledger the first time the log is
+    read (iterated, indexed, measured or compared).
+    """
+
+    def __init__(self, store: "KalshiStore", user_key: str, field: str, saved: Optional[List[Dict[str, Any]]] = None):
+        self._store = store
+        self._user_key = user_key
+        self._field = field
+        self._saved = saved
+        # Entries appended since the last save
+        self.pending: List[Dict[str, Any]] = []
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        self.pending.append(entry)
+
+    def extend(self, entries: Iterable[Dict[str, Any]]) -> None:
+        self.pending.extend(entries)
+
+    def _items(self) -> List[Dict[str, Any]]:
+        if self._saved is None:
+            self._saved = self._store._read_history(self._user_key, self._field)
+        return self._saved + self.pending
+
+    def __getitem__(self, index: Any) -> Any:
+        return self._items()[index]
+
+    def __len__(self) -> int:
+        return len(self._items())
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._items())
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (list, HistoryLog)):
+            return self._items() == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"HistoryLog({self._field!r}, pending={len(self.pending)})"
+
+    def mark_saved(self) -> None:
+        if self._saved is not None:
+            self._saved.extend(self.pending)
+        self.pending = []
+
+
+class UserRecord(dict):
+    """
+    A user row loaded from the store.
+
+    History fields are `HistoryLog`s, created on first access, and the row
+    values as loaded are remembered so `save_state` can tell what changed.
+    """
+
+    def __init__(self, store: "KalshiStore", user_key: str, fields: Dict[str, Any]):
+        super().__init__(fields)
+        self._store = store
+        self._user_key = user_key
+        self._snapshot: Tuple[Any, Any, str] = ()
+        self.mark_clean()
+
+    def __missing__(self, field: str) -> Any:
+        if field not in HISTORY_FIELDS:
+            raise KeyError(field)
+        log = HistoryLog(self._store, self._user_key, field)
+        dict.__setitem__(self, field, log)
+        return log
+
+    def get(self, field: str, default: Any = None) -> Any:
+        if dict.__contains__(self, field) or field in HISTORY_FIELDS:
+            return self[field]
+        return default
+
+    def history(self, field: str = "bet_history", **kwargs: Any) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Page through this user's saved ledger; see `KalshiStore.history`."""
+        return self._store.history(self._user_key, field, **kwargs)
+
+    def mark_clean(self) -> None:
+        self._snapshot = (self.get("display_name"), self.get("balance"), _dump(dict.get(self, "pending_bets", [])))
+        for field in HISTORY_FIELDS:
+            if not dict.__contains__(self, field):
+                continue
+            items = dict.__getitem__(self, field)
+            if isinstance(items, HistoryLog):
+                items.mark_saved()
+            else:
+                # A replaced list (e.g. after a reset) is now exactly what the ledger shows
+                dict.__setitem__(self, field, HistoryLog(self._store, self._user_key, field, saved=list(items)))
+
+
+class StoredUsers(MutableMapping):
+    """Mapping of user key -> user record that reads rows from the store on demand."""
+
+    def __init__(self, store: "KalshiStore"):
+        self._store = store
+        self._loaded: Dict[str, Dict[str, Any]] = {}
+        self._deleted: Set[str] = set()
+
+    def __getitem__(self, user_key: str) -> Dict[str, Any]:
+        if user_key in self._loaded:
+            return self._loaded[user_key]
+        if user_key in self._deleted:
+            raise KeyError(user_key)
+        record = self._store._read_user(user_key)
+        if record is None:
+            raise KeyError(user_key)
+        self._loaded[user_key] = record
+        return record
+
+    def __setitem__(self, user_key: str, record: Dict[str, Any]) -> None:
+        self._deleted.discard(user_key)
+        self._loaded[user_key] = record
+
+    def __delitem__(self, user_key: str) -> None:
+        self[user_key]
+        del self._loaded[user_key]
+        self._deleted.add(user_key)
+
+    def __iter__(self) -> Iterator[str]:
+        seen = set()
+        for user_key in list(self._loaded) + self._store._user_keys():
+            if user_key not in seen and user_key not in self._deleted:
+                seen.add(user_key)
+                yield user_key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def append_history(self, user_key: str, field: str, entry: Dict[str, Any]) -> None:
+        """
+        Add an entry to a user's ledger, written by the next `save_state`.
+
+        Existing ledger rows are not read, so this is O(1) however long the
+        user's history is.
+
+        Args:
+            user_key: Stored user key (e.g. "user_123")
+            field: "bet_history" or "transfers"
+            entry: The ledger entry; its "type" is stored as the entry kind
+        """
+        if field not in HISTORY_FIELDS:
+            raise KeyError(field)
+        self[user_key][field].append(entry)
+
+    def pending_tickers(self) -> Set[str]:
+        """Distinct tickers with pending bets, including unsaved changes to loaded users."""
+        tickers = set(self._store._pending_tickers(exclude=set(self._loaded) | self._deleted))
+        for record in self._loaded.values():
+            tickers.update(bet["ticker"] for bet in record.get("pending_bets", []) if bet.get("ticker"))
+        return tickers
+
+    def with_pending_bets(self, tickers: Iterable[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """(user key, record) pairs for users holding a pending bet on any of `tickers`."""
+        tickers = set(tickers)
+        keys = set(self._store._users_with_pending(tickers)) - self._deleted
+        for user_key, record in self._loaded.items():
+            if any(bet.get("ticker") in tickers for bet in record.get("pending_bets", [])):
+                keys.add(user_key)
+        return [(user_key, self[user_key]) for user_key in sorted(keys)]
+
+
+def _dump(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+class KalshiStore:
+    """One SQLite database holding every player's balance, pending bets and history."""
+
+    def __init__(self, db_path: Union[str, Path], legacy_json: Optional[Union[str, Path]] = None):
+        self.path = Path(db_path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._upgrade_schema()
+        self._conn.executescript(INDEXES)
+        if legacy_json is not None:
+            self._migrate_json(Path(legacy_json))
+
+    def _upgrade_schema(self) -> None:
+        """Add ledger columns to databases created before the ledger existed."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(history)")}
+        if "kind" not in columns:
+            self._conn.execute("ALTER TABLE history ADD COLUMN kind TEXT NOT NULL DEFAULT ''")
+        if "ts" not in columns:
+            self._conn.execute("ALTER TABLE history ADD COLUMN ts REAL NOT NULL DEFAULT 0")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def load_state(self) -> Dict[str, Any]:
+        return {"users": StoredUsers(self)}
+
+    def save_state(self, state: Dict[str, Any]) -> None:
+        """Write the rows of `state` that changed since they were loaded, atomically."""
+        users = state.get("users", {})
+        if isinstance(users, StoredUsers):
+            records = users._loaded.items()
+            deleted = users._deleted
+        else:
+            records = users.items()
+            deleted = set()
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                for user_key in deleted:
+                    for table in ("users", "pending_bets"):
+                        self._conn.execute(f"DELETE FROM {table} WHERE user_key = ?", (user_key,))
+                    for field in HISTORY_FIELDS:
+                        self._append_reset(user_key, field, now)
+                for user_key, record in records:
+                    self._write_user(user_key, record, now)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        for _, record in records:
+            if isinstance(record, UserRecord):
+                record.mark_clean()
+        if isinstance(users, StoredUsers):
+            users._deleted.clear()
+
+    def _write_user(self, user_key: str, record: Dict[str, Any], now: float) -> None:
+        stored = isinstance(record, UserRecord) and record._user_key == user_key
+        snapshot = record._snapshot if stored else (None, None, None)
+        pending = dict.get(record, "pending_bets", [])
+
+        if not stored or (record.get("display_name"), record.get("balance")) != snapshot[:2]:
+            self._conn.execute(
+                "INSERT INTO users (user_key, user_id, display_name, balance) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(user_key) DO UPDATE SET display_name = excluded.display_name, balance = excluded.balance",
+                (user_key, str(record.get("user_id") or user_key), record.get("display_name"), float(record.get("balance") or 0.0)),
+            )
+
+        if not stored or _dump(pending) != snapshot[2]:
+            self._conn.execute("DELETE FROM pending_bets WHERE user_key = ?", (user_key,))
+            self._conn.executemany(
+                "INSERT INTO pending_bets (user_key, position, ticker, data) VALUES (?, ?, ?, ?)",
+                [(user_key, position, bet.get("ticker") or "", _dump(bet)) for position, bet in enumerate(pending)],
+            )
+
+        appended = 0
+        reset = False
+        for field in HISTORY_FIELDS:
+            if not dict.__contains__(record, field):
+                continue
+            items = dict.__getitem__(record, field)
+            if stored and isinstance(items, HistoryLog):
+                new_items = items.pending
+            else:
+                # History was replaced (e.g. a reset) rather than appended to
+                reset = self._append_reset(user_key, field, now) or reset
+                new_items = items
+            self._conn.executemany(
+                "INSERT INTO history (user_key, field, data, kind, ts) VALUES (?, ?, ?, ?, ?)",
+                [(user_key, field, _dump(item), str(item.get("type") or ""), now) for item in new_items],
+            )
+            appended += len(new_items)
+
+        if appended or reset:
+            self._maybe_snapshot(user_key, float(record.get("balance") or 0.0), now, force=reset)
+
+    def _append_reset(self, user_key: str, field: str, now: float) -> bool:
+        """Hide earlier ledger entries of `field`; returns False if there were none to hide."""
+        if self._conn.execute(
+            "SELECT 1 FROM history WHERE user_key = ? AND field = ? LIMIT 1", (user_key, field)
+        ).fetchone() is None:
+            return False
+        self._conn.execute(
+            "INSERT INTO history (user_key, field, data, kind, ts) VALUES (?, ?, ?, ?, ?)",
+            (user_key, field, _dump({"type": RESET_KIND}), RESET_KIND, now),
+        )
+        return True
+
+    def _maybe_snapshot(self, user_key: str, balance: float, now: float, force: bool = False) -> None:
+        last = self._conn.execute(
+            "SELECT COALESCE(MAX(ledger_id), 0) FROM balance_snapshots WHERE user_key = ?", (user_key,)
+        ).fetchone()[0]
+        rows = self._conn.execute(
+            "SELECT id FROM history WHERE user_key = ? AND id > ? ORDER BY id DESC LIMIT ?",
+            (user_key, last, SNAPSHOT_EVERY_ENTRIES),
+        ).fetchall()
+        if rows and (force or len(rows) >= SNAPSHOT_EVERY_ENTRIES):
+            self._conn.execute(
+                "INSERT OR REPLACE INTO balance_snapshots (user_key, ledger_id, ts, balance) VALUES (?, ?, ?, ?)",
+                (user_key, rows[0][0], now, balance),
+            )
+
+    def _read_user(self, user_key: str) -> Optional[UserRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT user_id, display_name, balance FROM users WHERE user_key = ?", (user_key,)
+            ).fetchone()
+            if row is None:
+                return None
+            pending = [
+                json.loads(data)
+                for (data,) in self._conn.execute(
+                    "SELECT data FROM pending_bets WHERE user_key = ? ORDER BY position", (user_key,)
+                )
+            ]
+        return UserRecord(self, user_key, {
+            "user_id": row[0],
+            "display_name": row[1],
+            "balance": row[2],
+            "pending_bets": pending,
+        })
+
+    def _last_reset_id(self, user_key: str, field: str) -> int:
+        row = self._conn.execute(
+            "SELECT MAX(id) FROM history WHERE user_key = ? AND field = ? AND kind = ?", (user_key, field, RESET_KIND)
+        ).fetchone()
+        return row[0] or 0
+
+    def _read_history(self, user_key: str, field: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM history WHERE user_key = ? AND field = ? AND id > ? ORDER BY id",
+                (user_key, field, self._last_reset_id(user_key, field)),
+            ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def history(
+        self,
+        user_key: str,
+        field: str = "bet_history",
+        limit: int = 20,
+        before: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Read one page of a user's ledger, newest page first.
+
+        Args:
+            user_key: Stored user key (e.g. "user_123")
+            field: "bet_history" or "transfers"
+            limit: Maximum entries to return
+            before: Only entries older than this cursor (from a previous call)
+            since: Only entries recorded at or after this Unix timestamp
+            until: Only entries recorded before this Unix timestamp
+
+        Returns:
+            (entries oldest-to-newest with "id" and "ts" added, cursor for the next older page or None)
+        """
+        clauses = ["user_key = ?", "field = ?", "id > ?", "kind != ?"]
+        with self._lock:
+            params: List[Any] = [user_key, field, self._last_reset_id(user_key, field), RESET_KIND]
+            if before is not None:
+                clauses.append("id < ?")
+                params.append(before)
+            if since is not None:
+                clauses.append("ts >= ?")
+                params.append(since)
+            if until is not None:
+                clauses.append("ts < ?")
+                params.append(until)
+            rows = self._conn.execute(
+                f"SELECT id, ts, data FROM history WHERE {' AND '.join(clauses)} ORDER BY id DESC LIMIT ?",
+                (*params, limit + 1),
+            ).fetchall()
+
+        cursor = rows[limit - 1][0] if len(rows) > limit else None
+        entries = []
+        for entry_id, ts, data in reversed(rows[:limit]):
+            entry = json.loads(data)
+            entry["id"] = entry_id
+            entry["ts"] = ts
+            entries.append(entry)
+        return entries, cursor
+
+    def balance_snapshots(self, user_key: str, limit: int = 20, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Most recent balance snapshots for a user, oldest-to-newest."""
+        query = "SELECT ledger_id, ts, balance FROM balance_snapshots WHERE user_key = ?"
+        params: List[Any] = [user_key]
+        if since is not None:
+            query += " AND ts >= ?"
+            params.append(since)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY ts DESC, ledger_id DESC LIMIT ?", (*params, limit)).fetchall()
+        return [{"ledger_id": ledger_id, "ts": ts, "balance": balance} for ledger_id, ts, balance in reversed(rows)]
+
+    def _user_keys(self) -> List[str]:
+        with self._lock:
+            return [user_key for (user_key,) in self._conn.execute("SELECT user_key FROM users ORDER BY user_key")]
+
+    def _pending_tickers(self, exclude: Set[str]) -> Set[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT user_key, ticker FROM pending_bets").fetchall()
+        return {ticker for user_key, ticker in rows if user_key not in exclude and ticker}
+
+    def _users_with_pending(self, tickers: Set[str]) -> List[str]:
+        if not tickers:
+            return []
+        placeholders = ",".join("?" for _ in tickers)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT user_key FROM pending_bets WHERE ticker IN ({placeholders})", tuple(tickers)
+            ).fetchall()
+        return [user_key for (user_key,) in rows]
+
+    def _migrate_json(self, legacy_path: Path) -> None:
+        """Import a pre-SQLite JSON state file once, then move it aside."""
+        if not legacy_path.exists():
+            return
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM users LIMIT 1").fetchone() is not None:
+                return
+            try:
+                with legacy_path.open("r", encoding="utf-8") as handle:
+                    data = json.load(handle)
+            except Exception as exc:
+                print(f"Failed to read legacy Kalshi state {legacy_path}: {exc}")
+                return
+            if isinstance(data, dict) and isinstance(data.get("users"), dict):
+                self.save_state(data)
+            legacy_path.replace(legacy_path.with_name(legacy_path.name + ".migrated"))
+            print(f"Migrated Kalshi game state from {legacy_path} to {self.path}")
+
+
+_stores: Dict[str, KalshiStore] = {}
+
+
+def get_kalshi_store(db_path: Union[str, Path], legacy_json: Optional[Union[str, Path]] = None) -> KalshiStore:
+    """Return the process-wide store for `db_path`, opening (and migrating) it on first use."""
+    cache_key = str(Path(db_path).resolve())
+    store = _stores.get(cache_key)
+    if store is None:
+        store = KalshiStore(db_path, legacy_json=legacy_json)
+        _stores[cache_key] = store
+        register_shutdown_hook(store.close)
+    return store
@@ -2,8 +2,11 @@
 Shared utilities for LLM agent implementations.
 """
 
-from typing import List
-
+import re
+import string
+from collections import deque
+from datetime import datetime
+from typing import Deque, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 def get_default_system_prompt() -> str:
     """Default instruction for all Toast AI agents."""
@@ -16,89 +19,374 @@ def get_default_system_prompt() -> str:
     )
 
 
-def prune_history(history: str, max_chars: int) -> str:
+# Prompt budgets, in estimated tokens, for a grounded reply and for the reply-worthiness check
+REPLY_PROMPT_TOKENS = 3000
+REPLY_WORTHINESS_PROMPT_TOKENS = 600
+# Share of the budget left after the system prompt and message that memory context may use;
+# whatever it doesn't use goes to history
+MEMORY_CONTEXT_SHARE = 0.25
+
+# Letters per token for words a tokenizer splits into several pieces
+_CHARS_PER_WORD_TOKEN = 6
+# Deletes ASCII punctuation, to count it by length difference
+_STRIP_PUNCTUATION = str.maketrans("", "", string.punctuation)
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]")
+# A history line that starts a new turn ("[2026-01-02 03:04:05 UTC] Name: ...")
+_TURN_START_RE = re.compile(r"\[\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2} UTC\] ")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate the BPE token count of `text` without a tokenizer.
+
+    Each whitespace-separated word counts as one token plus one per further
+    ~6 characters, each ASCII punctuation mark as one more, and each
+    non-ASCII character (emoji, accented or CJK text) as one more. Only
+    built-in string operations are used, so this is cheap enough to run on
+    every history turn; it is an estimate, so budgets should leave headroom
+    below the model's real limit.
+    """
+    if not text:
+        return 0
+    words = text.split()
+    count = len(words) + len(text) - len(text.translate(_STRIP_PUNCTUATION))
+    for word in words:
+        if len(word) > _CHARS_PER_WORD_TOKEN:
+            count += (len(word) - 1) // _CHARS_PER_WORD_TOKEN
+    if not text.isascii():
+        count += len(_NON_ASCII_RE.findall(text))
+    return count
+
+
+class ConversationTurn(NamedTuple):
+    """One message in a conversation window."""
+
+    timestamp: datetime
+    role: str
+    content: str
+
+    def render(self) -> str:
+        """Format the turn as a timestamped history line for LLM context."""
+        stamp = self.timestamp.strftime("%Y-%m-%d %H:%M:%S UTC")
+        return f"[{stamp}] {self.role}: {self.content}".strip()
+
+
+class ConversationWindow:
+    """
+    Bounded, append-only window of the most recent conversation turns.
+
+    Each turn is rendered once when added, and the window keeps a running
+    character count, so picking the newest turns that fit a budget is
+    O(turns) with no re-splitting. The oldest turns drop off once
+    `max_turns` is reached, and overlong turns are truncated to
+    `max_turn_chars`, which hard-bounds memory per conversation.
+    """
+
+    def __init__(self, max_turns: int = 20, max_turn_chars: int = 4000):
+        self.max_turns = max_turns
+        self.max_turn_chars = max_turn_chars
+        self._turns: Deque[ConversationTurn] = deque()
+        self._lines: Deque[str] = deque()
+        self._tokens: Deque[int] = deque()
+        self.total_chars = 0
+
+    def append(self, turn: ConversationTurn) -> None:
+        if len(turn.content) > self.max_turn_chars:
+            turn = turn._replace(content=turn.content[: self.max_turn_chars - 3] + "...")
+        line = turn.render()
+        self._turns.append(turn)
+        self._lines.append(line)
+        self._tokens.append(estimate_tokens(line))
+        self.total_chars += len(line)
+        while len(self._turns) > self.max_turns:
+            self._turns.popleft()
+            self._tokens.popleft()
+            self.total_chars -= len(self._lines.popleft())
+
+    def add(self, role: str, content: str, timestamp: Optional[datetime] = None) -> None:
+        self.append(ConversationTurn(timestamp or datetime.utcnow(), role, content))
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def __iter__(self) -> Iterator[ConversationTurn]:
+        return iter(self._turns)
+
+    def render(self, max_chars: Optional[int] = None) -> str:
+        """Join the newest turns whose lines fit within `max_chars` (all turns if None)."""
+        if max_chars is None or self.total_chars + len(self._lines) - 1 <= max_chars:
+            return "\n".join(self._lines)
+        return "\n".join(_newest_lines_within(list(self._lines), max_chars))
+
+    def __str__(self) -> str:
+        return self.render()
+
+    def turn_texts(self) -> List[str]:
+        """Rendered line of each turn, oldest first."""
+        return list(self._lines)
+
+    def turn_tokens(self) -> List[int]:
+        """Estimated tokens of each turn, oldest first; computed once when the turn was added."""
+        return list(self._tokens)
+
+    def to_list(self) -> List[List[str]]:
+        """Serialize turns as [iso timestamp, role, content] triples."""
+        return [[turn.timestamp.isoformat(), turn.role, turn.content] for turn in self._turns]
+
+    @classmethod
+    def from_list(cls, turns: List[List[str]], **kwargs) -> "ConversationWindow":
+        """Rebuild a window from `to_list()` output."""
+        window = cls(**kwargs)
+        for stamp, role, content in turns:
+            window.add(role, content, datetime.fromisoformat(stamp))
+        return window
+
+
+def _newest_lines_within(lines: List[str], max_chars: int) -> List[str]:
+    """Longest suffix of `lines` whose newline-joined length is at most max_chars."""
+    total = -1  # the first line kept needs no separator
+    start = len(lines)
+    for idx in range(len(lines) - 1, -1, -1):
+        cost = len(lines[idx]) + 1
+        if total + cost > max_chars:
+            break
+        total += cost
+        start = idx
+    return lines[start:]
+
+
+def prune_history(history: Union[str, ConversationWindow], max_chars: int) -> str:
     """Trim history from the oldest entries until within max character length."""
+    if isinstance(history, ConversationWindow):
+        return history.render(max_chars)
     if not history:
         return ""
 
     lines = history.strip().split("\n")
-    text = "\n".join(lines)
-    if len(text) <= max_chars:
-        return text
+    return "\n".join(_newest_lines_within(lines, max_chars))
 
-    # Drop earliest lines until we fit
-    while lines and len("\n".join(lines)) > max_chars:
-        lines.pop(0)
 
-    return "\n".join(lines)
+# Conversation history as rendered text, a ConversationWindow, or (turn text, tokens) pairs oldest first
+History = Union[str, ConversationWindow, Sequence[Tuple[str, int]], None]
 
 
-def build_conversation_snippet(history: str, message: str, max_total_chars: int) -> str:
-    """Create a single text snippet with history plus current message, within max_total_chars."""
-    if not history:
-        combined = message.strip()
-        if len(combined) <= max_total_chars:
-            return combined
-        return combined[-max_total_chars:]
+def split_turns(history: str) -> List[str]:
+    """
+    Split rendered history into whole turns.
+
+    A turn starts at a "[YYYY-MM-DD HH:MM:SS UTC] " line; following lines
+    without a timestamp (multi-line messages) belong to it. Lines before the
+    first timestamp are kept as separate entries.
+    """
+    turns: List[str] = []
+    in_turn = False
+    for line in history.strip().split("\n"):
+        if _TURN_START_RE.match(line):
+            turns.append(line)
+            in_turn = True
+        elif in_turn:
+            turns[-1] += "\n" + line
+        elif line.strip():
+            turns.append(line)
+    return turns
 
-    # Reserve 20% of the budget for the current message (min 21 chars)
-    budget_for_history = max_total_chars - max(21, int(len(message) * 0.2))
-    pruned_history = prune_history(history, budget_for_history)
-    reply_to = f"Reply to the following message: {message.strip()}"
-    combined = f"{pruned_history}\n{reply_to}".strip()
 
-    if len(combined) <= max_total_chars:
-        return combined
+def pack_history(history: History, max_tokens: int) -> Tuple[str, int, int, int]:
+    """
+    Pick the newest whole turns of `history` that fit in `max_tokens`.
 
-    # Last resort, trim from the front
-    return combined[-max_total_chars:]
+    `history` is rendered text, a ConversationWindow, or (turn text, tokens)
+    pairs oldest first. Windows and pairs carry each turn's token count, so
+    they are packed in O(turns) with no splitting or estimating; rendered
+    text is split into turns and only the turns considered are estimated.
 
-def build_is_this_reply_worthy_snippet(history: str, message: str, max_total_chars: int) -> str:
-    """Create a single text snippet with history plus current message, within max_total_chars."""
+    Returns:
+        (turns joined oldest first, estimated tokens used, turns kept, turns dropped)
+    """
     if not history:
-        combined = message.strip()
-        if len(combined) <= max_total_chars:
-            return combined
-        return combined[-max_total_chars:]
+        return "", 0, 0, 0
+    if isinstance(history, ConversationWindow):
+        texts, costs = history.turn_texts(), history.turn_tokens()
+    elif isinstance(history, str):
+        texts, costs = split_turns(history), None
+    else:
+        texts, costs = [text for text, _ in history], [tokens for _, tokens in history]
+    used = 0
+    start = len(texts)
+    for idx in range(len(texts) - 1, -1, -1):
+        cost = (costs[idx] if costs is not None else estimate_tokens(texts[idx])) + 1  # +1 for the joining newline
+        if used + cost > max_tokens:
+            break
+        used += cost
+        start = idx
+    return "\n".join(texts[start:]), used, len(texts) - start, start
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Head of `text` that fits `max_tokens`, cut at a line or word break and marked with an ellipsis."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 1:
+        return ""
+    # Binary search on character length; token estimates grow monotonically with the prefix
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) + 1 <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    head = text[:low]
+    for separator in ("\n", " "):
+        idx = head.rfind(separator)
+        if idx > low // 2:
+            head = head[:idx]
+            break
+    return head.rstrip() + "…"
+
+
+def _keep_lines_within(text: str, max_tokens: int) -> str:
+    """Leading whole lines of `text` that fit `max_tokens`."""
+    kept: List[str] = []
+    used = 0
+    for line in text.strip().split("\n"):
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+class AssembledPrompt(NamedTuple):
+    """A packed prompt plus how the budget was spent."""
+
+    text: str
+    tokens: int
+    history_turns: int
+    dropped_turns: int
 
-    # Reserve 20% of the budget for the current message (min 21 chars)
-    budget_for_history = max_total_chars - max(21, int(len(message) * 0.2))
-    pruned_history = prune_history(history, budget_for_history)
-    reply_to = f"Does this final message (and prior context) prompt a reasonable reply from Toast: {message.strip()}"
-    combined = f"{pruned_history}\n{reply_to}".strip()
 
-    if len(combined) <= max_total_chars:
-        return combined
+def assemble_prompt(
+    system_prompt: str,
+    message: str,
+    history: History = None,
+    memory_context: Optional[str] = None,
+    instructions: Sequence[str] = (),
+    max_tokens: int = REPLY_PROMPT_TOKENS,
+    memory_share: float = MEMORY_CONTEXT_SHARE,
+    memory_header: str = "Personal context about the person you are replying to:",
+    history_header: Optional[str] = None,
+    message_prefix: str = "Reply to the following message: ",
+) -> AssembledPrompt:
+    """
+    Pack a prompt into an estimated token budget.
 
-    # Last resort, trim from the front
-    return combined[-max_total_chars:]
+    Sections are laid out as system prompt, instructions, memory context,
+    history, then the current message. The budget is spent in priority order:
 
+    1. System prompt and instructions are always included whole.
+    2. The current message is included whole, unless it alone exceeds what
+       is left, in which case its head is kept up to a word break.
+    3. Memory context gets up to `memory_share` of the remainder, in whole lines.
+    4. History gets everything else, as whole turns, newest first.
 
-def build_grok_messages(history: str, message: str, max_length: int = 2000) -> List[dict]:
-    """Build Grok message list with pruned history and system prompt."""
+    Args:
+        system_prompt: Base instructions for the model
+        message: The message being answered
+        history: Rendered history text, a ConversationWindow, or (turn text, tokens) pairs
+        memory_context: Facts about the person being answered
+        instructions: Extra instruction paragraphs placed after the system prompt
+        max_tokens: Total budget in estimated tokens
+        memory_share: Fraction of the post-message remainder available to memory
+        memory_header: Line introducing the memory context
+        history_header: Optional line introducing the history
+        message_prefix: Text placed before the current message
+
+    Returns:
+        AssembledPrompt with the text, estimated tokens and history turn counts
+    """
+    separator_tokens = 1  # blank line between sections
+    fixed_parts = [part for part in [system_prompt, *instructions] if part]
+    used = sum(estimate_tokens(part) + separator_tokens for part in fixed_parts)
+
+    message_text = message.strip()
+    prefix_tokens = estimate_tokens(message_prefix)
+    message_text = _truncate_to_tokens(message_text, max(0, max_tokens - used - prefix_tokens))
+    message_part = f"{message_prefix}{message_text}"
+    used += estimate_tokens(message_part)
+
+    remaining = max(0, max_tokens - used)
+    memory_part = ""
+    if memory_context and memory_context.strip() and remaining > 0:
+        header_tokens = estimate_tokens(memory_header) + 1 + separator_tokens
+        memory_budget = int(remaining * memory_share) - header_tokens
+        if memory_budget > 0:
+            memory_body = _keep_lines_within(memory_context, memory_budget)
+            if memory_body:
+                memory_part = f"{memory_header}\n{memory_body}"
+                remaining -= estimate_tokens(memory_part) + separator_tokens
+
+    history_part = ""
+    header_tokens = (estimate_tokens(history_header) + 1 if history_header else 0) + separator_tokens
+    packed, packed_tokens, history_turns, dropped_turns = pack_history(history, max(0, remaining - header_tokens))
+    if packed:
+        history_part = f"{history_header}\n{packed}" if history_header else packed
+        remaining -= packed_tokens + header_tokens
+
+    parts = [*fixed_parts, memory_part, history_part, message_part]
+    text = "\n\n".join(part for part in parts if part)
+    return AssembledPrompt(text, max_tokens - max(0, remaining), history_turns, dropped_turns)
+
+
+def build_conversation_snippet(history: str, message: str, max_tokens: int = REPLY_PROMPT_TOKENS) -> str:
+    """History (newest whole turns that fit) followed by the message to reply to, within max_tokens."""
+    return assemble_prompt("", message, history=history, max_tokens=max_tokens).text
+
+
+def build_is_this_reply_worthy_snippet(history: str, message: str, max_tokens: int = REPLY_WORTHINESS_PROMPT_TOKENS) -> str:
+    """History (newest whole turns that fit) followed by the reply-worthiness question, within max_tokens."""
+    return assemble_prompt(
+        "",
+        message,
+        history=history,
+        max_tokens=max_tokens,
+        message_prefix="Does this final message (and prior context) prompt a reasonable reply from Toast: ",
+    ).text
+
+
+def build_grok_messages(
+    history: History,
+    message: str,
+    max_length: int = 2000,
+    memory_context: Optional[str] = None,
+    max_tokens: int = REPLY_PROMPT_TOKENS,
+) -> List[dict]:
+    """Build Grok message list with token-budgeted history, memory and system prompt."""
     system_prompt = get_default_system_prompt()
-    history_snippet = build_conversation_snippet(history, message, max_length - len(system_prompt) - 20)
+    user_prompt = assemble_prompt(
+        "",
+        message,
+        history=history,
+        memory_context=memory_context,
+        max_tokens=max_tokens - estimate_tokens(system_prompt),
+        history_header="Here is the message history for context from oldest to newest:",
+        message_prefix=f"Reply to the following message in under {max_length} characters without telling me how many characters you used. Also do not add follow up questions:\n",
+    )
 
     return [
         {"role": "system", "content": system_prompt},
-        {
-            "role": "user",
-            "content": (
-                "Here is the message history for context from oldest to newest:\n\n"
-                + (history_snippet + "\n" if history_snippet else "")
-                + f"Reply to the following message in under {max_length} characters without telling me how many characters you used. Also do not add follow up questions:\n{message}"
-            )
-        }
+        {"role": "user", "content": user_prompt.text},
     ]
 
 
-def build_gemini_contents(history: str, message: str, max_history_chars: int = 1500) -> List[dict]:
+def build_gemini_contents(history: str, message: str, max_history_tokens: int = 400) -> List[dict]:
     """Build Gemini API contents with pruned history and a default prompt."""
     contents = []
     system_prompt = get_default_system_prompt()
     contents.append({"role": "user", "parts": [{"text": system_prompt}]})
 
-    history_snippet = prune_history(history, max_history_chars)
+    history_snippet = pack_history(history, max_history_tokens)[0]
     if history_snippet:
         # Convert history lines into role-style entries (User/AI). Keep raw to preserve existing called formats.
         for line in history_snippet.split("\n"):
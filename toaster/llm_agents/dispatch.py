@@ -0,0 +1,101 @@
+"""
+LLM Request Dispatcher
+Bounds concurrent LLM calls and coalesces bursts of messages per conversation.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Returned to callers whose message was folded into a newer request for the same conversation
+COALESCED = object()
+
+
+class _ConversationQueue:
+    """Messages waiting for the next LLM request of one conversation."""
+
+    def __init__(self):
+        self.payloads: List[Any] = []
+        self.runner: Optional[Callable[[List[Any]], Awaitable[Any]]] = None
+        self.waiter: Optional[asyncio.Future] = None
+        self.worker: Optional[asyncio.Task] = None
+
+
+class LLMDispatcher:
+    """
+    Front door for LLM calls made by message handlers.
+
+    - At most `max_concurrent` requests run at once across all conversations.
+    - Each conversation key runs one request at a time.
+    - Messages submitted for a conversation while its next request is still
+      waiting are collapsed into that request: the newest submitter's runner is
+      called once with every pending payload, and earlier submitters receive
+      `COALESCED` instead of a response.
+    """
+
+    def __init__(self, max_concurrent: int = 3):
+        self.max_concurrent = max_concurrent
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._queues: Dict[str, _ConversationQueue] = {}
+        self.requests_started = 0
+        self.messages_coalesced = 0
+
+    async def submit(self, key: str, payload: Any, runner: Callable[[List[Any]], Awaitable[Any]]) -> Any:
+        """
+        Queue `payload` for conversation `key` and wait for the result.
+
+        Args:
+            key: Conversation key (see get_conversation_key)
+            payload: Item describing this message, passed to the runner in a batch
+            runner: Coroutine function called with the list of batched payloads
+
+        Returns:
+            The runner's result, or `COALESCED` if a newer message took over this request
+        """
+        loop = asyncio.get_running_loop()
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = _ConversationQueue()
+            self._queues[key] = queue
+
+        if queue.waiter is not None and not queue.waiter.done():
+            queue.waiter.set_result(COALESCED)
+            self.messages_coalesced += 1
+
+        waiter = loop.create_future()
+        queue.payloads.append(payload)
+        queue.runner = runner
+        queue.waiter = waiter
+
+        if queue.worker is None:
+            queue.worker = loop.create_task(self._drain(key, queue))
+        return await waiter
+
+    async def _drain(self, key: str, queue: _ConversationQueue) -> None:
+        try:
+            while queue.payloads:
+                async with self._semaphore:
+                    # Take the batch only once a slot is free so late arrivals still coalesce
+                    payloads, runner, waiter = queue.payloads, queue.runner, queue.waiter
+                    queue.payloads, queue.runner, queue.waiter = [], None, None
+                    self.requests_started += 1
+                    try:
+                        result = await runner(payloads)
+                    except Exception as e:
+                        if not waiter.done():
+                            waiter.set_exception(e)
+                        continue
+                if not waiter.done():
+                    waiter.set_result(result)
+        finally:
+            queue.worker = None
+            if self._queues.get(key) is queue and not queue.payloads:
+                del self._queues[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Return counters useful for spotting quota pressure."""
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active_conversations": len(self._queues),
+            "requests_started": self.requests_started,
+            "messages_coalesced": self.messages_coalesced,
+        }
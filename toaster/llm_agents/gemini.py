@@ -1,9 +1,7 @@
-import json
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 import asyncio
 import time
-import requests
 
 try:
     from google import genai
@@ -12,74 +10,220 @@ except Exception:  # pragma: no cover - optional dependency
     genai = None
     types = None
 
-from toaster.llm_agents.agent_utils import get_default_system_prompt, build_conversation_snippet, build_is_this_reply_worthy_snippet
+from toaster.config import load_config_file
+from toaster.http_client import get_http_client
+from toaster.llm_agents.image_cache import get_image_cache
+from toaster.llm_agents.agent_utils import (
+    REPLY_PROMPT_TOKENS,
+    REPLY_WORTHINESS_PROMPT_TOKENS,
+    History,
+    assemble_prompt,
+    build_is_this_reply_worthy_snippet,
+    get_default_system_prompt,
+)
+from toaster.llm_agents.result_cache import MISS, LLMResultCache
 
+# Images attached to one LLM request; earlier messages win once a limit is hit
+MAX_IMAGES_PER_REQUEST = 8
+MAX_IMAGE_BYTES_PER_REQUEST = 12 * 1024 * 1024
+# Larger single images are skipped (attachments without being downloaded)
+MAX_IMAGE_BYTES = 8 * 1024 * 1024
+# Image downloads in flight for one request
+MAX_CONCURRENT_IMAGE_FETCHES = 6
 
-async def collect_message_attachments(messages: List[Any]) -> List[Dict[str, Any]]:
-    """Collect image payloads from Discord message attachments and embeds."""
-    payloads: List[Dict[str, Any]] = []
+# Reply-worthiness verdicts for identical conversation snippets (short-lived; context moves on)
+REPLY_WORTHINESS_CACHE = LLMResultCache("reply_worthiness", max_entries=1024, ttl_seconds=10 * 60)
+
+
+def _image_sources(messages: List[Any]) -> List[Dict[str, Any]]:
+    """Distinct candidate images across `messages`, in message order, with cache keys and any known size."""
+    sources: List[Dict[str, Any]] = []
+    seen = set()
     for message in messages:
-        attachments = getattr(message, "attachments", None) or []
-        for attachment in attachments:
-            filename = getattr(attachment, "filename", None) or "attachment"
+        for attachment in getattr(message, "attachments", None) or []:
             content_type = getattr(attachment, "content_type", None) or "application/octet-stream"
             if not content_type.startswith("image/"):
                 continue
-            try:
-                data = await attachment.read()
-            except Exception:
+            attachment_id = getattr(attachment, "id", None)
+            key = f"attachment:{attachment_id}" if attachment_id is not None else None
+            if key is not None and key in seen:
                 continue
-            payloads.append({
-                "filename": filename,
+            seen.add(key)
+            sources.append({
+                "key": key,
+                "attachment": attachment,
+                "filename": getattr(attachment, "filename", None) or "attachment",
                 "mime_type": content_type,
-                "data": data,
+                "size": getattr(attachment, "size", None),
             })
 
-        embeds = getattr(message, "embeds", None) or []
-        for embed in embeds:
+        for embed in getattr(message, "embeds", None) or []:
             image = getattr(embed, "image", None)
-            if image is None:
+            image_url = getattr(image, "url", None) if image is not None else None
+            if not image_url or f"url:{image_url}" in seen:
                 continue
-            image_url = getattr(image, "url", None)
-            if not image_url:
-                continue
-            try:
-                response = requests.get(image_url, timeout=10)
-                response.raise_for_status()
-                content_type = response.headers.get("content-type", "image/png")
-                if not content_type.startswith("image/"):
-                    continue
-                payloads.append({
-                    "filename": Path(image_url.split("/")[-1] or "embed-image").name,
-                    "mime_type": content_type,
-                    "data": response.content,
-                })
-            except Exception:
+            seen.add(f"url:{image_url}")
+            sources.append({
+                "key": f"url:{image_url}",
+                "url": image_url,
+                "filename": Path(image_url.split("/")[-1] or "embed-image").name,
+                "mime_type": None,
+                "size": None,
+            })
+    return sources
+
+
+async def _fetch_image(source: Dict[str, Any], max_bytes: int) -> Optional[Tuple[str, bytes]]:
+    """Return (mime type, bytes) for one image source from the cache or the network; None if unusable."""
+    cache = get_image_cache()
+    key = source["key"]
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    try:
+        if "url" in source:
+            response = await get_http_client().get(source["url"], timeout=10, max_bytes=max_bytes)
+            mime_type = response.headers.get("content-type", "image/png")
+            data = response.body
+        else:
+            mime_type = source["mime_type"]
+            data = await source["attachment"].read()
+    except Exception:
+        return None
+    if not mime_type.startswith("image/") or len(data) > max_bytes:
+        return None
+    if key is not None:
+        cache.put(key, mime_type, data)
+    return mime_type, data
+
+
+async def collect_message_attachments(
+    messages: List[Any],
+    max_images: int = MAX_IMAGES_PER_REQUEST,
+    max_total_bytes: int = MAX_IMAGE_BYTES_PER_REQUEST,
+) -> List[Dict[str, Any]]:
+    """
+    Collect image payloads from Discord message attachments and embeds.
+
+    Images are downloaded concurrently and served from the shared image cache
+    when seen before. Earlier messages in `messages` take priority once
+    `max_images` or `max_total_bytes` is reached.
+
+    Args:
+        messages: Discord messages, highest priority first
+        max_images: Maximum number of images returned
+        max_total_bytes: Maximum combined size of the returned images
+
+    Returns:
+        List of {"filename", "mime_type", "data"} payloads in priority order
+    """
+    per_image_limit = min(MAX_IMAGE_BYTES, max_total_bytes)
+    candidates = []
+    known_bytes = 0
+    for source in _image_sources(messages):
+        if len(candidates) >= max_images:
+            break
+        size = source["size"]
+        if size is not None:
+            # Skip images that can't fit without downloading them
+            if size > per_image_limit or known_bytes + size > max_total_bytes:
                 continue
-    return payloads
+            known_bytes += size
+        candidates.append(source)
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_IMAGE_FETCHES)
+
+    async def _fetch(source: Dict[str, Any]) -> Optional[Tuple[str, bytes]]:
+        async with semaphore:
+            return await _fetch_image(source, per_image_limit)
 
+    results = await asyncio.gather(*(_fetch(source) for source in candidates))
 
-def build_gemini_prompt(history: str, message: str, memory_context: Optional[str] = None, max_total_chars: int = 3000) -> str:
-    """Build the full prompt sent to Gemini, including personal memory context."""
-    system_prompt = get_default_system_prompt()
-    conversation = build_conversation_snippet(history, message, max_total_chars)
+    payloads: List[Dict[str, Any]] = []
+    total_bytes = 0
+    for source, result in zip(candidates, results):
+        if result is None:
+            continue
+        mime_type, data = result
+        if total_bytes + len(data) > max_total_bytes:
+            continue
+        total_bytes += len(data)
+        payloads.append({
+            "filename": source["filename"],
+            "mime_type": mime_type,
+            "data": data,
+        })
+    return payloads
 
-    prompt_parts = [system_prompt]
+
+def build_gemini_prompt(history: History, message: str, memory_context: Optional[str] = None, max_tokens: int = REPLY_PROMPT_TOKENS) -> str:
+    """Build the full prompt sent to Gemini, packing memory context and history into `max_tokens`."""
+    instructions = []
     if "news" in message.lower() or "latest" in message.lower() or "report" in message.lower() or "week" in message.lower():
-        prompt_parts.append(
+        instructions.append(
             "Formatting rules for this reply: use a short title line, then 3-5 bullet points, keep each bullet concise, and use at most 2 emojis total."
         )
-    if memory_context:
-        prompt_parts.append("Personal context about the person you are replying to:")
-        prompt_parts.append(memory_context)
-    prompt_parts.append(conversation)
-    prompt_parts.append(f"Reply to the following message: {message.strip()}")
+    return assemble_prompt(
+        get_default_system_prompt(),
+        message,
+        history=history,
+        memory_context=memory_context,
+        instructions=instructions,
+        max_tokens=max_tokens,
+    ).text
+
 
-    return "\n\n".join(part for part in prompt_parts if part)
+_clients: Dict[str, Any] = {}
+
+
+def _get_client(api_key: str) -> Any:
+    """Return the process-wide Gemini client for `api_key`, creating it on first use.
+
+    The client owns the underlying HTTP connection pools (sync and `client.aio`),
+    so reusing it keeps connections warm across requests.
+    """
+    if genai is None or types is None:
+        raise RuntimeError("google-generativeai is not installed")
+    client = _clients.get(api_key)
+    if client is None:
+        client = genai.Client(api_key=api_key)
+        _clients[api_key] = client
+    return client
+
+
+def _build_reply_request(
+    history: History,
+    message: str,
+    memory_context: Optional[str] = None,
+    message_attachments: Optional[List[Dict[str, Any]]] = None,
+) -> Tuple[List[Any], Any]:
+    """Build the contents and generation config for a grounded Toast reply."""
+    full_prompt = build_gemini_prompt(history, message, memory_context=memory_context)
+
+    contents = [full_prompt]
+    if message_attachments:
+        parts = []
+        for payload in message_attachments:
+            parts.append(
+                types.Part.from_bytes(
+                    data=payload["data"],
+                    mime_type=payload["mime_type"],
+                )
+            )
+        if parts:
+            contents = [full_prompt, *parts]
+
+    # Google Search grounding for current information
+    config = types.GenerateContentConfig(
+        tools=[types.Tool(google_search=types.GoogleSearch())],
+        max_output_tokens=2000
+    )
+    return contents, config
 
 
 def get_gemini_response(
-    history: str,
+    history: History,
     message: str,
     api_key: str,
     memory_context: Optional[str] = None,
@@ -88,6 +232,9 @@ def get_gemini_response(
     """
     Get a response from Google's Gemini AI model with web grounding.
     Uses gemini-2.5-flash for fast responses with up-to-date information.
+
+    Blocking; for use from worker threads and scripts. Bot handlers running on
+    the event loop should use `get_gemini_response_async`.
     
     Args:
         history: Previous conversation history
@@ -100,34 +247,13 @@ def get_gemini_response(
     """
     for attempt in range(6):
         try:
-            if genai is None or types is None:
-                raise RuntimeError("google-generativeai is not installed")
-            client = genai.Client(api_key=api_key)
-            
-            max_total_chars = 3000
-            full_prompt = build_gemini_prompt(history, message, memory_context=memory_context, max_total_chars=max_total_chars)
-            
-            contents = [full_prompt]
-            if message_attachments:
-                parts = []
-                for payload in message_attachments:
-                    parts.append(
-                        types.Part.from_bytes(
-                            data=payload["data"],
-                            mime_type=payload["mime_type"],
-                        )
-                    )
-                if parts:
-                    contents = [full_prompt, *parts]
-
-            # Make request with Google Search grounding for current information
+            client = _get_client(api_key)
+            contents, config = _build_reply_request(history, message, memory_context, message_attachments)
+
             response = client.models.generate_content(
                 model="gemini-2.5-flash",
                 contents=contents,
-                config=types.GenerateContentConfig(
-                    tools=[types.Tool(google_search=types.GoogleSearch())],
-                    max_output_tokens=2000
-                )
+                config=config
             )
             
             # Return empty string for empty responses, None only for errors
@@ -147,6 +273,100 @@ def get_gemini_response(
                 return None, str(e)
 
 
+async def get_gemini_response_async(
+    history: History,
+    message: str,
+    api_key: str,
+    memory_context: Optional[str] = None,
+    message_attachments: Optional[List[Dict[str, Any]]] = None,
+    retries: int = 5,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Non-blocking variant of `get_gemini_response` for use on the event loop.
+
+    Uses the SDK's async surface on the pooled client and backs off with
+    `asyncio.sleep`, so a slow or failing model call never stalls the gateway.
+    `retries` extra attempts are made after a failure; the provider router
+    lowers it so it can fail over instead.
+
+    Returns:
+        Tuple of (response text, error message) - response is None on error, error contains details
+    """
+    for attempt in range(retries + 1):
+        try:
+            client = _get_client(api_key)
+            contents, config = _build_reply_request(history, message, memory_context, message_attachments)
+
+            response = await client.aio.models.generate_content(
+                model="gemini-2.5-flash",
+                contents=contents,
+                config=config
+            )
+
+            # Return empty string for empty responses, None only for errors
+            if response.text:
+                return response.text, None
+            else:
+                return "", None
+
+        except Exception as e:
+            if attempt < retries:
+                wait_time = 2 ** (attempt + 1)
+                print(f"Error in Gemini API call (attempt {attempt + 1}/{retries}): {e}")
+                print(f"Waiting {wait_time} seconds before retry...")
+                await asyncio.sleep(wait_time)
+            else:
+                print(f"Error in Gemini API call (final attempt: {attempt}): {e}")
+                return None, str(e)
+
+
+async def stream_gemini_response(
+    history: History,
+    message: str,
+    api_key: str,
+    memory_context: Optional[str] = None,
+    message_attachments: Optional[List[Dict[str, Any]]] = None,
+    retries: int = 5,
+) -> AsyncIterator[str]:
+    """
+    Stream a grounded Gemini reply as text chunks as soon as they are generated.
+
+    Retries with the same backoff as `get_gemini_response_async`, but only
+    until the first chunk arrives; a failure after text has been yielded is
+    raised to the caller, which already holds the partial reply.
+
+    Yields:
+        Non-empty text chunks in order
+    """
+    for attempt in range(retries + 1):
+        yielded = False
+        try:
+            client = _get_client(api_key)
+            contents, config = _build_reply_request(history, message, memory_context, message_attachments)
+
+            stream = await client.aio.models.generate_content_stream(
+                model="gemini-2.5-flash",
+                contents=contents,
+                config=config
+            )
+            async for chunk in stream:
+                # Grounding metadata arrives in chunks without text
+                text = chunk.text
+                if text:
+                    yielded = True
+                    yield text
+            return
+
+        except Exception as e:
+            if yielded or attempt >= retries:
+                print(f"Error in Gemini streaming call (attempt {attempt + 1}): {e}")
+                raise
+            wait_time = 2 ** (attempt + 1)
+            print(f"Error in Gemini streaming call (attempt {attempt + 1}/{retries}): {e}")
+            print(f"Waiting {wait_time} seconds before retry...")
+            await asyncio.sleep(wait_time)
+
+
 def load_gemini_key(config_path: str = "config") -> Optional[str]:
     """
     Load the Gemini API key from config file.
@@ -158,18 +378,14 @@ def load_gemini_key(config_path: str = "config") -> Optional[str]:
         API key string or None if not found
     """
     try:
-        config_file = Path(config_path) / "gemini_key.json"
-        if config_file.exists():
-            with open(config_file, 'r') as f:
-                data = json.load(f)
-                return data.get("key")
-        return None
+        data = load_config_file("gemini_key.json", config_path)
+        return data.get("key") if data else None
     except Exception as e:
         print(f"Error loading Gemini key: {e}")
         return None
 
 def get_gemini_response_with_key(
-    history: str,
+    history: History,
     message: str,
     config_path: str = "config",
     memory_context: Optional[str] = None,
@@ -199,6 +415,59 @@ def get_gemini_response_with_key(
         message_attachments=message_attachments,
     )
 
+async def get_gemini_response_with_key_async(
+    history: History,
+    message: str,
+    config_path: str = "config",
+    memory_context: Optional[str] = None,
+    message_attachments: Optional[List[Dict[str, Any]]] = None,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Async convenience function that loads the API key and gets a Gemini response.
+
+    Returns:
+        Tuple of (response text, error message)
+    """
+    api_key = load_gemini_key(config_path)
+    if not api_key:
+        return None, "Gemini API key not found in config/gemini_key.json"
+
+    return await get_gemini_response_async(
+        history,
+        message,
+        api_key,
+        memory_context=memory_context,
+        message_attachments=message_attachments,
+    )
+
+
+async def stream_gemini_response_with_key(
+    history: History,
+    message: str,
+    config_path: str = "config",
+    memory_context: Optional[str] = None,
+    message_attachments: Optional[List[Dict[str, Any]]] = None,
+) -> AsyncIterator[str]:
+    """
+    Load the API key and stream a Gemini response.
+
+    Raises:
+        RuntimeError: If no API key is configured
+    """
+    api_key = load_gemini_key(config_path)
+    if not api_key:
+        raise RuntimeError("Gemini API key not found in config/gemini_key.json")
+
+    async for chunk in stream_gemini_response(
+        history,
+        message,
+        api_key,
+        memory_context=memory_context,
+        message_attachments=message_attachments,
+    ):
+        yield chunk
+
+
 async def infer_if_reply_is_at_toast(history:str, message:str, api_key:str) -> bool:
     """
     Infer if the user's message is likely directed at Toast based on conversation history and message content.
@@ -212,25 +481,25 @@ async def infer_if_reply_is_at_toast(history:str, message:str, api_key:str) -> b
         True if the message is likely directed at Toast, False otherwise
     """
     
+    system_prompt = (
+        "You are an assistant that determines if a user's message in a conversation is directed at Toast, a helpful Discord bot. "
+        "Based on the conversation history and the final message, respond with 'Yes' if the final message (and prior context) prompt a reasonable reply from Toast, or 'No' if it is not."
+    )
+
+    conversation = build_is_this_reply_worthy_snippet(history, message, REPLY_WORTHINESS_PROMPT_TOKENS)
+    full_prompt = f"{system_prompt}\n\nConversation history:\n{conversation}"
+
+    cache_key = LLMResultCache.make_key("gemini-2.5-flash-lite", full_prompt)
+    cached = REPLY_WORTHINESS_CACHE.get(cache_key)
+    if cached is not MISS:
+        return cached
+
     # Retry logic: try up to 3 times with exponential backoff
     for attempt in range(6):
         try:
-            if genai is None or types is None:
-                raise RuntimeError("google-generativeai is not installed")
-            client = genai.Client(api_key=api_key)
-            
-            system_prompt = (
-                "You are an assistant that determines if a user's message in a conversation is directed at Toast, a helpful Discord bot. "
-                "Based on the conversation history and the final message, respond with 'Yes' if the final message (and prior context) prompt a reasonable reply from Toast, or 'No' if it is not."
-            )
-            
-            max_total_chars = 1500
-            conversation = build_is_this_reply_worthy_snippet(history, message, max_total_chars)
-            full_prompt = f"{system_prompt}\n\nConversation history:\n{conversation}"
-            
-            #print(full_prompt)
+            client = _get_client(api_key)
 
-            response = client.models.generate_content(
+            response = await client.aio.models.generate_content(
                 model="gemini-2.5-flash-lite",
                 contents=full_prompt,
                 config=types.GenerateContentConfig(
@@ -240,7 +509,9 @@ async def infer_if_reply_is_at_toast(history:str, message:str, api_key:str) -> b
             
             # Check if we got a valid response text
             if response.text:
-                return response.text.strip().lower() == "yes"
+                is_reply_worthy = response.text.strip().lower() == "yes"
+                REPLY_WORTHINESS_CACHE.set(cache_key, is_reply_worthy)
+                return is_reply_worthy
             else:
                 # No text in response, treat as failure
                 raise Exception("Gemini API returned empty response text")
@@ -1,74 +1,187 @@
-import requests
+"""
+Grok Agent
+Chat completions from xAI's Grok over the shared async HTTP client.
+
+Requests reuse the bot's pooled keep-alive connections, are bounded by
+GROK_TIMEOUT_SECONDS, and retry 429/5xx responses honouring Retry-After.
+Replies can be streamed as server-sent events, like the Gemini agent.
+"""
+
 import json
-from pathlib import Path
-from typing import Optional
+from contextlib import aclosing
+from typing import AsyncIterator, Optional, Tuple
+
+from toaster.config import load_config_file
+from toaster.http_client import HttpClient, HttpStatusError, get_http_client
+from toaster.llm_agents.agent_utils import History, build_grok_messages
 
-from toaster.llm_agents.agent_utils import build_grok_messages
+GROK_API_URL = "https://api.x.ai/v1/chat/completions"
+GROK_MODEL = "grok-4-1-fast-reasoning"
+# Seconds allowed for a whole (non-streaming) completion; reasoning models think before answering
+GROK_TIMEOUT_SECONDS = 90.0
+# Seconds a streamed completion may go without sending anything
+GROK_STREAM_IDLE_SECONDS = 45.0
+# Extra attempts after the first for 429/5xx and connection failures
+GROK_RETRIES = 3
 
 
 def load_grok_key(config_path: str = "config") -> Optional[str]:
     """
     Load the Grok API key from config file.
-    
+
     Args:
         config_path: Path to config directory
-        
+
     Returns:
         API key string or None if not found
     """
     try:
-        config_file = Path(config_path) / "grok_key.json"
-        if config_file.exists():
-            with open(config_file, 'r') as f:
-                data = json.load(f)
-                return data.get("token")
-        return None
+        data = load_config_file("grok_key.json", config_path)
+        return data.get("token") if data else None
     except Exception as e:
         print(f"Error loading Grok key: {e}")
         return None
 
 
-def get_grok_response(history: str, message: str, api_key: str) -> Optional[str]:
-    max_length = 2000
-    messages = build_grok_messages(history, message, max_length)
-    url = "https://api.x.ai/v1/chat/completions"
+def _build_request(history: History, message: str, api_key: str, memory_context: Optional[str], stream: bool) -> Tuple[dict, dict]:
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
     }
-
     payload = {
-        "model": "grok-4-1-fast-reasoning",
-        "messages": messages,
+        "model": GROK_MODEL,
+        "messages": build_grok_messages(history, message, memory_context=memory_context),
         "temperature": 0.9,
     }
+    if stream:
+        payload["stream"] = True
+    return headers, payload
 
-    response = requests.post(url, json=payload, headers=headers)
 
-    if response.status_code == 200:
-        data = response.json()
-        choices = data.get("choices", [])
-        if choices:
-            return choices[0]["message"]["content"]
+async def get_grok_response_async(
+    history: History,
+    message: str,
+    api_key: str,
+    memory_context: Optional[str] = None,
+    client: Optional[HttpClient] = None,
+    retries: int = GROK_RETRIES,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Get a Grok reply without blocking the event loop.
+
+    Args:
+        history: Previous conversation history
+        message: Current user message
+        api_key: xAI API key
+        memory_context: Personal facts collected about the person
+        client: HTTP client (defaults to the shared one)
+        retries: Extra attempts for 429/5xx and connection failures
 
-    return None
+    Returns:
+        Tuple of (response text, error message) - response is None on error, error contains details
+    """
+    client = client or get_http_client()
+    headers, payload = _build_request(history, message, api_key, memory_context, stream=False)
+    try:
+        response = await client.post(
+            GROK_API_URL,
+            headers=headers,
+            json_body=payload,
+            timeout=GROK_TIMEOUT_SECONDS,
+            retries=retries,
+        )
+        choices = response.json().get("choices", [])
+    except HttpStatusError as e:
+        print(f"Error in Grok API call: {e}")
+        return None, f"{e}: {e.body[:200].decode('utf-8', errors='replace')}"
+    except Exception as e:
+        print(f"Error in Grok API call: {type(e).__name__}: {e}")
+        return None, str(e) or type(e).__name__
+    if not choices:
+        return "", None
+    return choices[0]["message"].get("content") or "", None
 
 
-def get_grok_response_with_key(history: str, message: str, config_path: str = "config") -> Optional[str]:
+async def stream_grok_response(
+    history: History,
+    message: str,
+    api_key: str,
+    memory_context: Optional[str] = None,
+    client: Optional[HttpClient] = None,
+    retries: int = GROK_RETRIES,
+) -> AsyncIterator[str]:
     """
-    Convenience function that loads the API key and gets a Grok response.
-    
-    Args:
-        history: Previous conversation history
-        message: Current user message  
-        config_path: Path to config directory
-        
+    Stream a Grok reply as text chunks from its server-sent events.
+
+    Failures before the first chunk are retried by the HTTP client; a
+    failure after text has been yielded is raised to the caller, which
+    already holds the partial reply.
+
+    Yields:
+        Non-empty text chunks in order
+    """
+    client = client or get_http_client()
+    headers, payload = _build_request(history, message, api_key, memory_context, stream=True)
+    lines = client.stream_lines(
+        "POST",
+        GROK_API_URL,
+        headers=headers,
+        json_body=payload,
+        idle_timeout=GROK_STREAM_IDLE_SECONDS,
+        retries=retries,
+    )
+    # Close the connection as soon as [DONE] arrives instead of when the generator is collected
+    async with aclosing(lines):
+        async for line in lines:
+            if not line.startswith("data:"):
+                # Blank event separators and ": keep-alive" comments
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                return
+            try:
+                choices = json.loads(data).get("choices", [])
+            except ValueError:
+                continue
+            text = choices[0].get("delta", {}).get("content") if choices else None
+            if text:
+                yield text
+
+
+async def get_grok_response_with_key_async(
+    history: History,
+    message: str,
+    config_path: str = "config",
+    memory_context: Optional[str] = None,
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Async convenience function that loads the API key and gets a Grok response.
+
     Returns:
-        AI response text or None if error
+        Tuple of (response text, error message)
     """
     api_key = load_grok_key(config_path)
     if not api_key:
-        print("Grok API key not found in config/grok_key.json")
-        return None
-    
-    return get_grok_response(history, message, api_key)
\ No newline at end of file
+        return None, "Grok API key not found in config/grok_key.json"
+
+    return await get_grok_response_async(history, message, api_key, memory_context=memory_context)
+
+
+async def stream_grok_response_with_key(
+    history: History,
+    message: str,
+    config_path: str = "config",
+    memory_context: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Load the API key and stream a Grok response.
+
+    Raises:
+        RuntimeError: If no API key is configured
+    """
+    api_key = load_grok_key(config_path)
+    if not api_key:
+        raise RuntimeError("Grok API key not found in config/grok_key.json")
+
+    async for chunk in stream_grok_response(history, message, api_key, memory_context=memory_context):
+        yield chunk
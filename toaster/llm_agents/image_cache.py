@@ -0,0 +1,82 @@
+"""
+Image Blob Cache
+Content-addressed LRU cache for downloaded images (Discord attachments and embed images).
+
+Lookups are keyed by attachment ID or URL; the bytes are stored once per
+SHA-256 digest, so the same picture reposted under another URL costs no
+extra memory. Least recently used keys are evicted once the stored bytes
+exceed the budget.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# Total image bytes kept in memory across all cached keys
+IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class ImageBlobCache:
+    """LRU mapping of attachment key -> (mime type, bytes), deduplicated by content hash."""
+
+    def __init__(self, max_bytes: int = IMAGE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        # key -> digest; ordered least recently used first
+        self._keys: "OrderedDict[str, str]" = OrderedDict()
+        # digest -> [mime type, bytes, number of keys pointing at it]
+        self._blobs: Dict[str, list] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        digest = self._keys.get(key)
+        if digest is None:
+            self.misses += 1
+            return None
+        self._keys.move_to_end(key)
+        self.hits += 1
+        mime_type, data, _ = self._blobs[digest]
+        return mime_type, data
+
+    def put(self, key: str, mime_type: str, data: bytes) -> str:
+        """Store `data` under `key` (replacing any previous value); returns its content digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        if self._keys.get(key) == digest:
+            self._keys.move_to_end(key)
+            return digest
+        if key in self._keys:
+            self._drop_key(key)
+        blob = self._blobs.get(digest)
+        if blob is None:
+            self._blobs[digest] = [mime_type, data, 1]
+            self.total_bytes += len(data)
+        else:
+            blob[2] += 1
+        self._keys[key] = digest
+        # Never evict the entry just stored, even if it alone exceeds the budget
+        while self.total_bytes > self.max_bytes and len(self._keys) > 1:
+            self._drop_key(next(iter(self._keys)))
+        return digest
+
+    def _drop_key(self, key: str) -> None:
+        digest = self._keys.pop(key)
+        blob = self._blobs[digest]
+        blob[2] -= 1
+        if blob[2] == 0:
+            del self._blobs[digest]
+            self.total_bytes -= len(blob[1])
+
+
+_image_cache: Optional[ImageBlobCache] = None
+
+
+def get_image_cache() -> ImageBlobCache:
+    """Return the process-wide image cache."""
+    global _image_cache
+    if _image_cache is None:
+        _image_cache = ImageBlobCache()
+    return _image_cache
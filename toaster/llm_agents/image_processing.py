@@ -0,0 +1,169 @@
+"""
+Image Preprocessing
+Shrinks and deduplicates images before they are uploaded with a multimodal LLM request.
+
+- Images larger than MAX_IMAGE_DIMENSION on either side are downscaled
+- Large or oversized images are re-encoded as WebP (JPEG if WebP is unavailable)
+- Near-duplicate images (same picture reposted, re-compressed or resized)
+  are dropped using a 64-bit difference hash
+
+Pillow is listed in requirements.txt. If it is missing anyway, processing
+degrades to passing payloads through unchanged apart from removing
+byte-identical duplicates.
+"""
+
+import asyncio
+import hashlib
+import io
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except Exception:  # pragma: no cover - degraded mode for installs missing Pillow
+    Image = None
+    ImageOps = None
+
+from toaster.expiring import ExpiringDict
+from toaster.llm_agents.image_cache import get_image_cache
+
+# Longest side, in pixels, of an uploaded image
+MAX_IMAGE_DIMENSION = 1536
+# Images already within the dimension cap and smaller than this are uploaded as-is
+REENCODE_MIN_BYTES = 256 * 1024
+OUTPUT_QUALITY = 80
+# Images whose difference hashes differ in at most this many bits count as duplicates
+DUPLICATE_HASH_DISTANCE = 4
+
+# Original content digest -> difference hash (None when the image can't be decoded)
+_dhashes = ExpiringDict(max_keys=4096)
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def difference_hash(image: Any) -> int:
+    """64-bit dHash: compares horizontally adjacent pixels of a 9x8 grayscale thumbnail."""
+    thumbnail = image.convert("L").resize((9, 8), Image.BILINEAR)
+    pixels = thumbnail.tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return value
+
+
+def _encode(image: Any) -> Tuple[str, bytes]:
+    buffer = io.BytesIO()
+    try:
+        image.save(buffer, format="WEBP", quality=OUTPUT_QUALITY, method=2)
+        return "image/webp", buffer.getvalue()
+    except (KeyError, OSError):
+        # Pillow built without WebP support
+        buffer = io.BytesIO()
+        image.convert("RGB").save(buffer, format="JPEG", quality=OUTPUT_QUALITY, optimize=True)
+        return "image/jpeg", buffer.getvalue()
+
+
+def process_image(data: bytes, mime_type: str) -> Tuple[str, bytes, Optional[int]]:
+    """
+    Downscale and re-encode one image when that makes it smaller.
+
+    Args:
+        data: Original image bytes
+        mime_type: Original MIME type
+
+    Returns:
+        (mime type, bytes, difference hash or None if the image couldn't be decoded)
+    """
+    if Image is None:
+        return mime_type, data, None
+    try:
+        with Image.open(io.BytesIO(data)) as opened:
+            # Animated images keep their animation; only hash the first frame
+            animated = getattr(opened, "is_animated", False)
+            if not animated and max(opened.size) > MAX_IMAGE_DIMENSION:
+                # Let the JPEG decoder downscale by a power of two while decoding
+                opened.draft("RGB", (MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION))
+            image = ImageOps.exif_transpose(opened)
+            image.load()
+    except Exception:
+        return mime_type, data, None
+
+    too_large = max(image.size) > MAX_IMAGE_DIMENSION
+    if too_large:
+        image.thumbnail((MAX_IMAGE_DIMENSION, MAX_IMAGE_DIMENSION), Image.BICUBIC)
+    # Hash after downscaling: cheaper, and the 9x8 thumbnail is the same either way
+    dhash = difference_hash(image)
+    if animated or (not too_large and len(data) < REENCODE_MIN_BYTES):
+        return mime_type, data, dhash
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() or image.mode == "P" else "RGB")
+    new_mime_type, encoded = _encode(image)
+    if len(encoded) >= len(data) and not too_large:
+        return mime_type, data, dhash
+    return new_mime_type, encoded, dhash
+
+
+def _is_duplicate(dhash: int, seen_hashes: List[int]) -> bool:
+    return any(bin(dhash ^ other).count("1") <= DUPLICATE_HASH_DISTANCE for other in seen_hashes)
+
+
+async def prepare_images(payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Downscale, re-encode and deduplicate image payloads from `collect_message_attachments`.
+
+    Processed results are cached next to the originals (keyed by the original's
+    digest), so only new images are decoded, in worker threads to keep the
+    event loop free. When two images are duplicates, the earlier one is kept.
+
+    Args:
+        payloads: {"filename", "mime_type", "data"} dicts in priority order
+
+    Returns:
+        Payloads ready for upload
+    """
+    if not payloads:
+        return payloads
+    cache = get_image_cache()
+
+    unique: List[Tuple[str, Dict[str, Any]]] = []
+    seen_digests = set()
+    for payload in payloads:
+        digest = _digest(payload["data"])
+        if digest not in seen_digests:
+            seen_digests.add(digest)
+            unique.append((digest, payload))
+
+    processed: Dict[str, Tuple[str, bytes, Optional[int]]] = {}
+    misses: List[Tuple[str, Dict[str, Any]]] = []
+    for digest, payload in unique:
+        cached = cache.get(f"processed:{digest}")
+        if cached is not None and digest in _dhashes:
+            processed[digest] = (cached[0], cached[1], _dhashes[digest])
+        else:
+            misses.append((digest, payload))
+
+    if misses:
+        # Pillow releases the GIL while decoding, resizing and encoding, so images process in parallel
+        results = await asyncio.gather(*(
+            asyncio.to_thread(process_image, payload["data"], payload["mime_type"]) for _, payload in misses
+        ))
+        for (digest, _), (mime_type, data, dhash) in zip(misses, results):
+            cache.put(f"processed:{digest}", mime_type, data)
+            _dhashes[digest] = dhash
+            processed[digest] = (mime_type, data, dhash)
+
+    prepared: List[Dict[str, Any]] = []
+    seen_hashes: List[int] = []
+    for digest, payload in unique:
+        mime_type, data, dhash = processed[digest]
+        if dhash is not None:
+            if _is_duplicate(dhash, seen_hashes):
+                continue
+            seen_hashes.append(dhash)
+        prepared.append({**payload, "mime_type": mime_type, "data": data})
+    return prepared
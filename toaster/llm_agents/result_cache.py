@@ -0,0 +1,142 @@
+"""
+LLM Result Cache
+Content-hashed TTL/LRU cache for deterministic LLM calls such as yes/no classifiers.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from toaster.state import register_shutdown_hook, write_atomic
+
+# Returned by `get` when nothing usable is cached (None is a valid cached value)
+MISS = object()
+
+_URL_RE = re.compile(r"https?://\S+")
+_SPACE_RE = re.compile(r"\s+")
+
+# Every cache created, for stats reporting
+_caches: Dict[str, "LLMResultCache"] = {}
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold, drop links and collapse whitespace so reposts of the same text share a key."""
+    text = _URL_RE.sub("", text or "")
+    return _SPACE_RE.sub(" ", text).strip().lower()
+
+
+class LLMResultCache:
+    """
+    Thread-safe LRU cache of LLM results keyed by a hash of normalized inputs.
+
+    Entries expire `ttl_seconds` after they are stored. With `path`, entries
+    are loaded at construction and written back at shutdown (or on `save()`),
+    so classifications survive restarts.
+    """
+
+    def __init__(self, name: str, max_entries: int = 2048, ttl_seconds: float = 24 * 60 * 60, path: Optional[Union[str, Path]] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = Path(path) if path else None
+        # key -> (expires_at, value); ordered least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        if self.path is not None:
+            self._load()
+            register_shutdown_hook(self.save)
+        _caches[name] = self
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Hash the normalized parts (e.g. model name and prompt input) into a cache key."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(normalize_text(part).encode("utf-8"))
+            digest.update(b"\x1f")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Any:
+        """Return the cached value, or `MISS`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        now = time.time()
+        try:
+            with self.path.open("r", encoding="utf-8") as handle:
+                for line in handle:
+                    parts = line.rstrip("\n").split("\t", 2)
+                    if len(parts) != 3:
+                        continue
+                    key, expires_at, raw = parts
+                    if float(expires_at) > now:
+                        self._entries[key] = (float(expires_at), json.loads(raw))
+        except Exception as e:
+            print(f"Failed to load LLM cache {self.path}: {e}")
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def save(self) -> None:
+        """Write live entries to `path` if anything changed since the last save."""
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time.time()
+            lines = [
+                f"{key}\t{expires_at:.0f}\t{json.dumps(value)}"
+                for key, (expires_at, value) in self._entries.items()
+                if expires_at > now
+            ]
+            self._dirty = False
+        try:
+            write_atomic(self.path, "\n".join(lines) + ("\n" if lines else ""))
+        except Exception as e:
+            with self._lock:
+                # Try again on the next save
+                self._dirty = True
+            print(f"Failed to save LLM cache {self.path}: {e}")
+
+
+def get_cache_stats() -> List[Tuple[str, Dict[str, Any]]]:
+    """(name, stats) for every LLM result cache, for status reporting."""
+    return [(name, cache.stats()) for name, cache in sorted(_caches.items())]
@@ -0,0 +1,403 @@
+"""
+LLM Provider Router
+Sends reply requests to whichever configured provider is healthy, with failover and hedging.
+
+- Each provider keeps a rolling window of outcomes (error rate) and latencies (p90)
+- Providers that keep failing are tried last for a cooldown instead of being waited on first
+- A failed request fails over to the next provider straight away
+- Hedging: if the current provider hasn't answered within its own p90 latency,
+  the next provider is started too; the first good answer wins and the
+  other request is cancelled
+
+Usage:
+    from toaster.llm_agents.router import ReplyRequest, get_provider_router
+
+    text = await get_provider_router().complete(ReplyRequest(history, message))
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from toaster.llm_agents.agent_utils import History
+
+# Providers in order of preference; those without a configured key are skipped until one is added
+DEFAULT_PROVIDER_ORDER = ("gemini", "grok")
+# Start a backup provider when the current one is slower than its p90
+HEDGE_REQUESTS = True
+# Outcomes and latencies remembered per provider
+HEALTH_WINDOW = 50
+# Latency samples needed before a provider's own p90 is trusted as the hedge delay
+MIN_LATENCY_SAMPLES = 5
+# Hedge delays, in seconds, while a provider has too few samples, and the floor once it has them
+DEFAULT_HEDGE_DELAY_SECONDS = {"reply": 12.0, "first_chunk": 6.0}
+MIN_HEDGE_DELAY_SECONDS = 1.0
+# Providers above this error rate, over at least this many recent requests, are tried after healthier ones
+MAX_ERROR_RATE = 0.5
+MIN_ERROR_RATE_SAMPLES = 10
+# Consecutive failures that move a provider to the back of the line, and for how long
+CIRCUIT_BREAK_FAILURES = 3
+CIRCUIT_BREAK_SECONDS = 60.0
+# Retries each provider makes on its own before the router fails over
+PROVIDER_RETRIES = 1
+
+
+class ReplyRequest(NamedTuple):
+    """Everything a provider needs to produce a reply."""
+
+    # Rendered text or a ConversationWindow; providers pack it into their prompt budget
+    history: History
+    message: str
+    memory_context: Optional[str] = None
+    message_attachments: Optional[List[Dict[str, Any]]] = None
+
+
+class ProviderError(Exception):
+    """Raised by a provider adapter when it could not produce a reply."""
+
+
+class AllProvidersFailed(Exception):
+    """Raised when no provider produced a reply; the message lists each provider's error."""
+
+    def __init__(self, errors: Sequence[Tuple[str, str]]):
+        details = "; ".join(f"{name}: {error}" for name, error in errors) or "no AI providers configured"
+        super().__init__(details)
+        self.errors = list(errors)
+
+
+class ProviderHealth:
+    """Rolling error rate, latency percentiles and circuit breaker for one provider."""
+
+    def __init__(self, window: int = HEALTH_WINDOW, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        # "reply" = full response time, "first_chunk" = time to the first streamed text
+        self._latencies: Dict[str, Deque[float]] = {kind: deque(maxlen=window) for kind in DEFAULT_HEDGE_DELAY_SECONDS}
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.hedges = 0
+        self.wins = 0
+
+    def record_success(self, kind: str, latency: float) -> None:
+        self.requests += 1
+        self._outcomes.append(True)
+        self.record_latency(kind, latency)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    def record_latency(self, kind: str, latency: float) -> None:
+        self._latencies[kind].append(latency)
+
+    def record_failure(self) -> None:
+        self.requests += 1
+        self.failures += 1
+        self._outcomes.append(False)
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= CIRCUIT_BREAK_FAILURES:
+            self.open_until = self.clock() + CIRCUIT_BREAK_SECONDS
+
+    @property
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    @property
+    def unreliable(self) -> bool:
+        """True once enough recent requests have failed to push the error rate past MAX_ERROR_RATE."""
+        return len(self._outcomes) >= MIN_ERROR_RATE_SAMPLES and self.error_rate > MAX_ERROR_RATE
+
+    @property
+    def available(self) -> bool:
+        """False while the circuit breaker is open."""
+        return self.clock() >= self.open_until
+
+    def latency_percentile(self, kind: str, percentile: float) -> Optional[float]:
+        samples = sorted(self._latencies[kind])
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(percentile * len(samples)))]
+
+    def hedge_delay(self, kind: str) -> float:
+        """Seconds to wait for this provider before starting a backup."""
+        if len(self._latencies[kind]) < MIN_LATENCY_SAMPLES:
+            return DEFAULT_HEDGE_DELAY_SECONDS[kind]
+        return max(MIN_HEDGE_DELAY_SECONDS, self.latency_percentile(kind, 0.9))
+
+
+class Provider:
+    """
+    One LLM backend, adapted to the router's interface.
+
+    Args:
+        name: Short provider name shown in logs and stats
+        complete: Coroutine function taking a ReplyRequest and returning the reply
+            text ("" means the model chose not to answer); raises on failure
+        stream: Optional async generator function taking a ReplyRequest and
+            yielding text chunks; providers without one stream their full reply
+            as a single chunk
+        configured: Optional function returning whether the provider can be
+            used right now (e.g. its API key exists); checked on every request
+    """
+
+    def __init__(
+        self,
+        name: str,
+        complete: Callable[[ReplyRequest], Awaitable[str]],
+        stream: Optional[Callable[[ReplyRequest], AsyncIterator[str]]] = None,
+        configured: Optional[Callable[[], bool]] = None,
+    ):
+        self.name = name
+        self._complete = complete
+        self._stream = stream
+        self._configured = configured
+        self.health = ProviderHealth()
+
+    @property
+    def configured(self) -> bool:
+        return self._configured is None or self._configured()
+
+    async def complete(self, request: ReplyRequest) -> str:
+        return await self._complete(request)
+
+    async def stream(self, request: ReplyRequest) -> AsyncIterator[str]:
+        if self._stream is None:
+            text = await self._complete(request)
+            if text:
+                yield text
+            return
+        async with aclosing(self._stream(request)) as chunks:
+            async for chunk in chunks:
+                yield chunk
+
+
+class ProviderRouter:
+    """
+    Routes each request to the healthiest provider, failing over and hedging as needed.
+
+    Providers are tried in preference order, except that providers with an
+    open circuit breaker or an error rate above MAX_ERROR_RATE go last.
+    Providers that aren't configured are skipped.
+    """
+
+    def __init__(self, providers: Sequence[Provider], hedge: bool = HEDGE_REQUESTS):
+        self.providers = list(providers)
+        self.hedge = hedge
+
+    def _candidates(self) -> List[Provider]:
+        def rank(provider: Provider) -> Tuple[bool, bool]:
+            health = provider.health
+            return (not health.available, health.unreliable)
+
+        # sorted() is stable, so preference order holds within each rank
+        return sorted((provider for provider in self.providers if provider.configured), key=rank)
+
+    async def _race(self, kind: str, attempt: Callable[[Provider], Awaitable[Any]]) -> Tuple[Provider, Any]:
+        """
+        Run `attempt` on providers until one succeeds, starting the next
+        provider early (when hedging) or as soon as the current one fails.
+
+        Returns:
+            (winning provider, its result)
+        """
+        candidates = self._candidates()
+        errors: List[Tuple[str, str]] = []
+        running: Dict[asyncio.Task, Tuple[Provider, float]] = {}
+
+        def start_next(hedged: bool) -> None:
+            provider = candidates.pop(0)
+            if hedged:
+                provider.health.hedges += 1
+            task = asyncio.ensure_future(attempt(provider))
+            running[task] = (provider, time.monotonic())
+
+        try:
+            if candidates:
+                start_next(hedged=False)
+            while running:
+                timeout = None
+                if self.hedge and candidates:
+                    # Wait for the most recently started provider's p90, measured from its start
+                    newest, started = max(running.values(), key=lambda item: item[1])
+                    timeout = max(0.0, started + newest.health.hedge_delay(kind) - time.monotonic())
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    start_next(hedged=True)
+                    continue
+                for task in done:
+                    provider, started = running.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        provider.health.record_success(kind, time.monotonic() - started)
+                        provider.health.wins += 1
+                        # A losing provider took at least this long; recording it keeps its p90
+                        # from drifting down just because its slow requests get cancelled
+                        now = time.monotonic()
+                        for loser, loser_started in running.values():
+                            loser.health.record_latency(kind, now - loser_started)
+                        return provider, task.result()
+                    provider.health.record_failure()
+                    errors.append((provider.name, f"{type(error).__name__}: {error}"))
+                    print(f"AI provider {provider.name} failed: {type(error).__name__}: {error}")
+                if not running and candidates:
+                    start_next(hedged=False)
+        finally:
+            # Losers (and everything else, if we were cancelled) are stopped
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+        raise AllProvidersFailed(errors)
+
+    async def complete(self, request: ReplyRequest) -> str:
+        """
+        Get a full reply from the first provider to answer successfully.
+
+        Raises:
+            AllProvidersFailed: If every provider failed
+        """
+        _, text = await self._race("reply", lambda provider: provider.complete(request))
+        return text
+
+    async def stream(self, request: ReplyRequest) -> AsyncIterator[str]:
+        """
+        Stream a reply from the first provider to produce text.
+
+        Failover and hedging apply until the first chunk arrives; after that
+        the winning provider's stream is followed to the end and errors are
+        raised to the caller, which already holds the partial reply.
+
+        Raises:
+            AllProvidersFailed: If every provider failed before producing text
+        """
+
+        async def first_chunk(provider: Provider) -> Tuple[AsyncIterator[str], Optional[str]]:
+            chunks = provider.stream(request)
+            try:
+                return chunks, await chunks.__anext__()
+            except StopAsyncIteration:
+                # The model chose not to answer
+                return chunks, None
+            except BaseException:
+                await chunks.aclose()
+                raise
+
+        provider, (chunks, chunk) = await self._race("first_chunk", first_chunk)
+        async with aclosing(chunks):
+            if chunk is None:
+                return
+            yield chunk
+            try:
+                async for chunk in chunks:
+                    yield chunk
+            except Exception:
+                provider.health.record_failure()
+                raise
+
+    def stats(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """(provider, metrics) in preference order."""
+        report = []
+        for provider in self.providers:
+            health = provider.health
+            report.append((provider.name, {
+                "configured": provider.configured,
+                "available": health.available,
+                "requests": health.requests,
+                "error_rate": health.error_rate,
+                "p90_reply": health.latency_percentile("reply", 0.9),
+                "p90_first_chunk": health.latency_percentile("first_chunk", 0.9),
+                "hedges": health.hedges,
+                "wins": health.wins,
+            }))
+        return report
+
+
+def _gemini_provider(config_path: str) -> Provider:
+    from toaster.llm_agents import gemini
+
+    # Looked up on every request (load_gemini_key is served from the config cache),
+    # so adding or rotating the key takes effect without a restart
+    def api_key() -> str:
+        key = gemini.load_gemini_key(config_path) if gemini.genai is not None else None
+        if not key:
+            raise ProviderError("Gemini is not configured (no key in gemini_key.json or google-genai missing)")
+        return key
+
+    def configured() -> bool:
+        return gemini.genai is not None and bool(gemini.load_gemini_key(config_path))
+
+    async def complete(request: ReplyRequest) -> str:
+        text, error = await gemini.get_gemini_response_async(
+            request.history, request.message, api_key(),
+            memory_context=request.memory_context,
+            message_attachments=request.message_attachments,
+            retries=PROVIDER_RETRIES,
+        )
+        if text is None:
+            raise ProviderError(error or "no response")
+        return text
+
+    def stream(request: ReplyRequest) -> AsyncIterator[str]:
+        return gemini.stream_gemini_response(
+            request.history, request.message, api_key(),
+            memory_context=request.memory_context,
+            message_attachments=request.message_attachments,
+            retries=PROVIDER_RETRIES,
+        )
+
+    return Provider("gemini", complete, stream, configured)
+
+
+def _grok_provider(config_path: str) -> Provider:
+    from toaster.llm_agents import grok
+
+    # Looked up on every request, like the Gemini key
+    def api_key() -> str:
+        key = grok.load_grok_key(config_path)
+        if not key:
+            raise ProviderError("Grok is not configured (no token in grok_key.json)")
+        return key
+
+    def configured() -> bool:
+        return bool(grok.load_grok_key(config_path))
+
+    # Grok requests are text-only; attachments only go to Gemini
+    async def complete(request: ReplyRequest) -> str:
+        text, error = await grok.get_grok_response_async(
+            request.history, request.message, api_key(), memory_context=request.memory_context, retries=PROVIDER_RETRIES
+        )
+        if text is None:
+            raise ProviderError(error or "no response")
+        return text
+
+    def stream(request: ReplyRequest) -> AsyncIterator[str]:
+        return grok.stream_grok_response(
+            request.history, request.message, api_key(), memory_context=request.memory_context, retries=PROVIDER_RETRIES
+        )
+
+    return Provider("grok", complete, stream, configured)
+
+
+_PROVIDER_FACTORIES: Dict[str, Callable[[str], Provider]] = {
+    "gemini": _gemini_provider,
+    "grok": _grok_provider,
+}
+
+_router: Optional[ProviderRouter] = None
+
+
+def get_provider_router(config_path: str = "config") -> ProviderRouter:
+    """
+    Return the process-wide router over every provider in DEFAULT_PROVIDER_ORDER.
+
+    The router is built on first use. Provider keys are read per request, so a
+    provider whose key is missing is skipped until the key file appears.
+    """
+    global _router
+    if _router is None:
+        _router = ProviderRouter([_PROVIDER_FACTORIES[name](config_path) for name in DEFAULT_PROVIDER_ORDER])
+    return _router
@@ -1,7 +1,8 @@
+import asyncio
 import sys
-import json
-import urllib.request
-import urllib.error
+import urllib.parse
+
+from toaster.http_client import get_http_client
 
 
 NWS_API_BASE = "https://api.weather.gov"
@@ -82,17 +83,15 @@ KNOWN_WFO = {
 }
 
 
-def fetch_json(url: str) -> dict:
+HEADERS = {"User-Agent": "nws-memo-script/1.0 (python)"}
+
+
+async def fetch_json(url: str) -> dict:
     """Fetch a URL and return parsed JSON."""
-    req = urllib.request.Request(
-        url,
-        headers={"User-Agent": "nws-memo-script/1.0 (python)"}
-    )
-    with urllib.request.urlopen(req, timeout=15) as resp:
-        return json.loads(resp.read().decode("utf-8"))
+    return await get_http_client().get_json(url, headers=HEADERS, timeout=15)
 
 
-def geocode_city(city: str) -> tuple[float, float]:
+async def geocode_city(city: str) -> tuple[float, float]:
     """
     Geocode a city name to (lat, lon) using the US Census Geocoder.
     Returns the coordinates of the best match.
@@ -102,9 +101,7 @@ def geocode_city(city: str) -> tuple[float, float]:
         f"https://geocoding.geo.census.gov/geocoder/locations/onelineaddress"
         f"?address={encoded}&benchmark=Public_AR_Current&format=json"
     )
-    req = urllib.request.Request(url, headers={"User-Agent": "nws-memo-script/1.0"})
-    with urllib.request.urlopen(req, timeout=15) as resp:
-        data = json.loads(resp.read().decode("utf-8"))
+    data = await fetch_json(url)
 
     matches = data.get("result", {}).get("addressMatches", [])
     if not matches:
@@ -114,7 +111,7 @@ def geocode_city(city: str) -> tuple[float, float]:
     return float(coords["y"]), float(coords["x"])   # lat, lon
 
 
-def get_wfo_for_city(city: str) -> str:
+async def get_wfo_for_city(city: str) -> str:
     """
     Resolve a city name to a NWS Weather Forecast Office (WFO) code.
     First tries the known-WFO table, then falls back to the NWS points API
@@ -126,11 +123,10 @@ def get_wfo_for_city(city: str) -> str:
         return KNOWN_WFO[key]
 
     # Slow path: geocode → NWS /points
-    import urllib.parse  # imported here so it's only needed for this branch
-    lat, lon = geocode_city(city)
+    lat, lon = await geocode_city(city)
     points_url = f"{NWS_API_BASE}/points/{lat:.4f},{lon:.4f}"
     try:
-        data = fetch_json(points_url)
+        data = await fetch_json(points_url)
         wfo = data["properties"]["cwa"]   # e.g. "FFC"
         return wfo
     except Exception as exc:
@@ -139,13 +135,13 @@ def get_wfo_for_city(city: str) -> str:
         ) from exc
 
 
-def get_latest_afd(wfo: str) -> str:
+async def get_latest_afd(wfo: str) -> str:
     """
     Fetch the latest Area Forecast Discussion (AFD) for the given WFO.
     Returns the full memo text.
     """
     url = f"{NWS_API_BASE}/products/types/AFD/locations/{wfo}"
-    data = fetch_json(url)
+    data = await fetch_json(url)
 
     graph = data.get("@graph", [])
     if not graph:
@@ -153,7 +149,7 @@ def get_latest_afd(wfo: str) -> str:
 
     # The first entry is the most recent
     product_url = graph[0]["@id"]
-    product = fetch_json(product_url)
+    product = await fetch_json(product_url)
     return product["productText"]
 
 import re
@@ -190,14 +186,14 @@ def extract_key_messages(afd_text: str) -> list[str]:
 
     return messages
 
-def get_atl_key_messages():
-    wfo = get_wfo_for_city("Atlanta, GA")
-    memo = get_latest_afd(wfo)
+async def get_atl_key_messages():
+    wfo = await get_wfo_for_city("Atlanta, GA")
+    memo = await get_latest_afd(wfo)
     key_messages = extract_key_messages(memo)
     return key_messages
 
-def get_atl_key_messages_formatted():
-    key_messages = get_atl_key_messages()
+async def get_atl_key_messages_formatted():
+    key_messages = await get_atl_key_messages()
     if not key_messages:
         return "No key messages found in the latest AFD for the Atlanta metro."
     
@@ -229,4 +225,4 @@ def get_atl_key_messages_formatted():
     return formatted
 
 if __name__ == "__main__":
-    print(get_atl_key_messages_formatted())
\ No newline at end of file
+    print(asyncio.run(get_atl_key_messages_formatted()))
\ No newline at end of file
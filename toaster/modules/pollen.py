@@ -1,9 +1,10 @@
 
+import asyncio
 import os
 from . import webscraper as ws
 
-def get_atl_pollen_count():
-    mylist = ws.chunk_parser(ws.scrape('https://www.atlantaallergy.com/pollen_counts'),
+async def get_atl_pollen_count():
+    mylist = ws.chunk_parser(await ws.scrape('https://www.atlantaallergy.com/pollen_counts'),
                                        'class="pollen-num"').split(' ')
     if len(mylist) > 0:
         for i in mylist:
@@ -18,8 +19,8 @@ def get_atl_pollen_count():
     else:
         return 'HTML Failure'
 
-def result_handler():
-    result = get_atl_pollen_count()
+async def result_handler():
+    result = await get_atl_pollen_count()
     if type(result) == int:
         return f"🌼 The pollen count in Atlanta for the day is {result}"
     elif result == None:
@@ -29,12 +30,12 @@ def result_handler():
     else:
         return "something broke lol"
 
-def get_atl_pollen_count_by_date(date: str):
+async def get_atl_pollen_count_by_date(date: str):
     
     url = f'https://www.atlantaallergy.com/pollen_counts/index/{date}'
-    mylist = ws.chunk_parser(ws.scrape(url), 'class="pollen-num"').split(' ')
+    mylist = ws.chunk_parser(await ws.scrape(url), 'class="pollen-num"').split(' ')
 
     return None
 
 if __name__ == "__main__":
-    print(result_handler())
\ No newline at end of file
+    print(asyncio.run(result_handler()))
\ No newline at end of file
@@ -1,15 +1,17 @@
 """Simple utility to fetch the latest tweet link for an X (twitter) username.
 
 Functions:
- - `get_latest_tweet_link(username)` -> str | None
+ - `fetch_latest_tweet_link(username, client=None)` -> str | None (async, shared HTTP client)
 
 CLI usage:
     python -m toaster.modules.tweet_puller Braves
 """
 
+import asyncio
 from typing import Optional
 import re
-import requests
+
+from toaster.http_client import HttpClient, get_http_client
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
@@ -90,42 +92,34 @@ def _search_for_status_links(text: str, username: str, skip_pinned: bool = True)
     return links[0]
 
 
-def get_latest_tweet_link(username: str, timeout: int = 10, try_nitter: bool = True) -> Optional[str]:
+async def fetch_latest_tweet_link(username: str, client: Optional[HttpClient] = None, timeout: int = 10, try_nitter: bool = True) -> Optional[str]:
     """Return the URL of the latest tweet for `username`, or None if not found.
 
-    This attempts to fetch `https://x.com/{username}` and parse the HTML for
-    the first non-pinned status URL. If that fails and `try_nitter` is True, it falls back
-    to `https://nitter.net/{username}`.
+    This fetches `https://x.com/{username}` (then the mobile site) and parses
+    the HTML for the first non-pinned status URL. If that fails and
+    `try_nitter` is True, it falls back to `https://nitter.net/{username}`.
+    Requests go through the shared HTTP client unless `client` is given.
     """
     if not username or not username.strip():
         raise ValueError("username must be a non-empty string")
     username = username.strip().lstrip("@")
+    client = client or get_http_client()
 
-    # Try X (x.com)
     urls_to_try = [f"https://x.com/{username}", f"https://mobile.twitter.com/{username}"]
+    if try_nitter:
+        urls_to_try.append(f"https://nitter.net/{username}")
+
     for url in urls_to_try:
         try:
-            resp = requests.get(url, headers=HEADERS, timeout=timeout)
-            resp.raise_for_status()
-            link = _search_for_status_links(resp.text, username, skip_pinned=True)
+            # Each host is its own fallback, so don't retry within one
+            text = await client.get_text(url, headers=HEADERS, timeout=timeout, retries=0)
+            link = _search_for_status_links(text, username, skip_pinned=True)
             if link:
                 return link
         except Exception:
             # ignore and try next
             continue
 
-    # Fallback to nitter if available
-    if try_nitter:
-        try:
-            nitter_url = f"https://nitter.net/{username}"
-            resp = requests.get(nitter_url, headers=HEADERS, timeout=timeout)
-            resp.raise_for_status()
-            link = _search_for_status_links(resp.text, username, skip_pinned=True)
-            if link:
-                return link
-        except Exception:
-            pass
-
     return None
 
 
@@ -163,5 +157,5 @@ def get_fixvx_equivalent(x_link: str, provider: str = "fxtwitter") -> Optional[s
 
 if __name__ == "__main__":
     
-    print(get_latest_tweet_link("Braves"))
+    print(asyncio.run(fetch_latest_tweet_link("Braves")))
     print(get_fixvx_equivalent(r"https://x.com/Braves/status/2088771820757336419"))
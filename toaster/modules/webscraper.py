@@ -1,9 +1,10 @@
-import requests
+from toaster.http_client import get_http_client
 
-def scrape(url):
-    headers = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_11_5) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/50.0.2661.102 Safari/537.36'}
-    result = requests.get(url, headers=headers)
-    return str(result.text)
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_11_5) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/50.0.2661.102 Safari/537.36'}
+
+async def scrape(url):
+    # Error pages are returned like any other page; the parsers report what they can't find
+    return await get_http_client().get_text(url, headers=HEADERS, raise_for_status=False)
 
 def chunk_parser(scrape, needle):
     ind = scrape.find(needle)
@@ -11,4 +12,4 @@ def chunk_parser(scrape, needle):
 
 def big_chunk_parser(scrape, needle):
     ind = scrape.find(needle)
-    return scrape[ind:ind+180]
\ No newline at end of file
+    return scrape[ind:ind+180]    
@@ -0,0 +1,179 @@
+"""
+Person Memory Store
+Keeps the person memory database resident in memory and persists it with write-behind.
+"""
+
+import asyncio
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+from toaster.state import register_shutdown_hook, write_atomic
+
+# Seconds to coalesce memory updates before writing the file
+PERSON_MEMORY_FLUSH_DELAY_SECONDS = 5.0
+
+
+def get_person_memory_path(config_dir: Union[str, Path] = "config") -> Path:
+    """Return the path for the persistent person memory JSON file."""
+    config_path = Path(config_dir)
+    config_path.mkdir(parents=True, exist_ok=True)
+    return config_path / "person_memory.json"
+
+
+def load_person_memory(config_dir: Union[str, Path] = "config") -> dict:
+    """Load the persisted memory database from disk."""
+    memory_path = get_person_memory_path(config_dir)
+    if not memory_path.exists():
+        return {}
+    try:
+        with memory_path.open("r", encoding="utf-8") as handle:
+            data = json.load(handle)
+            return data if isinstance(data, dict) else {}
+    except Exception as exc:
+        print(f"Failed to load person memory: {exc}")
+        return {}
+
+
+def save_person_memory(memory: dict, config_dir: Union[str, Path] = "config") -> None:
+    """Persist person memory to disk."""
+    memory_path = get_person_memory_path(config_dir)
+    try:
+        write_atomic(memory_path, json.dumps(memory, indent=2, ensure_ascii=False))
+    except Exception as exc:
+        print(f"Failed to save person memory: {exc}")
+
+
+class PersonMemoryStore:
+    """
+    Resident copy of the person memory database.
+
+    Reads are served from `data`. Callers mutate entries in place and then call
+    `mark_dirty()`; inside a running event loop the write is deferred by
+    `flush_delay` seconds so a burst of messages produces a single file write,
+    performed off the loop thread. Without a running loop the write happens
+    immediately. `flush()` forces a synchronous write (used at shutdown).
+    """
+
+    def __init__(self, config_dir: Union[str, Path] = "config", flush_delay: float = PERSON_MEMORY_FLUSH_DELAY_SECONDS):
+        self.config_dir = config_dir
+        self.path = get_person_memory_path(config_dir)
+        self.flush_delay = flush_delay
+        self.data: Dict[str, Any] = load_person_memory(config_dir)
+        # Lowercased display name / alias -> memory keys, and the reverse for re-indexing
+        self._name_index: Dict[str, Set[str]] = {}
+        self._indexed_names: Dict[str, Set[str]] = {}
+        for key in self.data:
+            self.reindex(key)
+        self._version = 0
+        self._written_version = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._write_lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.data.get(key, default)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.data
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        """Store an entry and schedule it for persistence."""
+        self.data[key] = entry
+        self.reindex(key)
+        self.mark_dirty()
+
+    def reindex(self, key: str) -> None:
+        """Refresh the name index for `key` after its display name or aliases changed."""
+        entry = self.data.get(key)
+        names: Set[str] = set()
+        if isinstance(entry, dict):
+            display_name = entry.get("display_name") or key
+            if isinstance(display_name, str):
+                names.add(display_name.lower())
+            for alias in entry.get("aliases", []) or []:
+                if isinstance(alias, str):
+                    names.add(alias.lower())
+
+        previous = self._indexed_names.get(key, set())
+        for name in previous - names:
+            keys = self._name_index.get(name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._name_index[name]
+        for name in names - previous:
+            self._name_index.setdefault(name, set()).add(key)
+
+        if names:
+            self._indexed_names[key] = names
+        else:
+            self._indexed_names.pop(key, None)
+
+    def find_by_names(self, names: Iterable[str]) -> List[str]:
+        """Return memory keys whose display name or alias matches any of `names` (case-insensitive)."""
+        found: List[str] = []
+        seen: Set[str] = set()
+        for name in names:
+            for key in sorted(self._name_index.get(name.lower(), ())):
+                if key not in seen:
+                    seen.add(key)
+                    found.append(key)
+        return found
+
+    def mark_dirty(self) -> None:
+        """Record that `data` changed and schedule a write-behind flush."""
+        self._version += 1
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_delay, self._flush_in_background)
+
+    def _flush_in_background(self) -> None:
+        self._flush_handle = None
+        if self._version == self._written_version:
+            return
+        # Serialize on the loop thread (entries are mutated there), write in a worker thread
+        text, version = self._serialize()
+        asyncio.get_running_loop().run_in_executor(None, self._write, text, version)
+
+    def flush(self) -> None:
+        """Synchronously write pending changes to disk."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._version == self._written_version:
+            return
+        text, version = self._serialize()
+        self._write(text, version)
+
+    def _serialize(self) -> tuple:
+        return json.dumps(self.data, indent=2, ensure_ascii=False), self._version
+
+    def _write(self, text: str, version: int) -> None:
+        with self._write_lock:
+            # A newer snapshot may already be on disk if writes finished out of order
+            if version <= self._written_version:
+                return
+            try:
+                write_atomic(self.path, text)
+                self._written_version = version
+            except Exception as exc:
+                print(f"Failed to save person memory: {exc}")
+
+
+_stores: Dict[str, PersonMemoryStore] = {}
+
+
+def get_person_memory_store(config_dir: Union[str, Path] = "config") -> PersonMemoryStore:
+    """Return the process-wide store for `config_dir`, loading it on first use."""
+    cache_key = str(Path(config_dir).resolve())
+    store = _stores.get(cache_key)
+    if store is None:
+        store = PersonMemoryStore(config_dir)
+        _stores[cache_key] = store
+        register_shutdown_hook(store.flush)
+    return store
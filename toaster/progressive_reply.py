@@ -0,0 +1,129 @@
+"""
+Progressive Reply
+Shows a streamed LLM reply in Discord by posting early and editing as text arrives.
+"""
+
+import time
+from typing import Any, Callable, List, Optional
+
+import discord
+
+# Discord rejects messages longer than this
+DISCORD_MESSAGE_LIMIT = 2000
+# Discord allows about 5 message edits per 5 seconds per channel; stay well below that
+EDIT_INTERVAL_SECONDS = 1.2
+
+
+def _split_point(text: str, limit: int) -> int:
+    """Index to cut `text` at so the head fits in `limit`, preferring paragraph, line, then word breaks."""
+    for separator in ("\n\n", "\n", " "):
+        idx = text.rfind(separator, 0, limit)
+        if idx > limit // 2:
+            return idx + len(separator)
+    return limit
+
+
+class ProgressiveReply:
+    """
+    Live Discord message fed by streamed text.
+
+    The first text is posted immediately, after which the message is edited at
+    most once per `edit_interval` seconds. When the text outgrows Discord's
+    2000-character limit, the full part is finalized and the rest continues in
+    a new message. Call `finish()` once the stream ends to flush the tail.
+
+    Discord errors never abort the stream: a failed edit (e.g. the message was
+    deleted) continues in a new message, and a failed send is retried on the
+    next update. A full part that could not be posted is kept and re-sent, in
+    order, before anything after it. `finish()` never raises, so it is safe in
+    a `finally` block after the stream itself failed.
+    """
+
+    def __init__(
+        self,
+        channel: Any,
+        limit: int = DISCORD_MESSAGE_LIMIT,
+        edit_interval: float = EDIT_INTERVAL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.channel = channel
+        self.limit = limit
+        self.edit_interval = edit_interval
+        self._clock = clock
+        self.messages: List[Any] = []
+        self._current: Optional[Any] = None  # Discord message showing `_pending`
+        self._shown = ""
+        self._pending = ""
+        self._parts: List[str] = []
+        # Full parts whose message could not be sent yet, oldest first
+        self._unsent: List[str] = []
+        self._last_update = float("-inf")
+
+    @property
+    def text(self) -> str:
+        """Everything received so far."""
+        return "".join(self._parts) + self._pending
+
+    async def append(self, chunk: str) -> None:
+        """Add streamed text, rolling over and updating Discord when the edit budget allows."""
+        if not chunk:
+            return
+        self._pending += chunk
+        while len(self._pending) > self.limit:
+            cut = _split_point(self._pending, self.limit)
+            head, self._pending = self._pending[:cut], self._pending[cut:]
+            if not await self._show(head):
+                self._unsent.append(head)
+            self._parts.append(head)
+            self._current, self._shown = None, ""
+        if self._clock() - self._last_update >= self.edit_interval:
+            await self._show(self._pending)
+
+    async def finish(self) -> str:
+        """Flush the remaining text and return the full reply."""
+        try:
+            await self._show(self._pending)
+        except Exception as e:
+            # Don't mask whatever error ended the stream
+            print(f"Failed to flush streamed reply: {type(e).__name__}: {e}")
+        return self.text
+
+    async def _send_unsent(self) -> bool:
+        while self._unsent:
+            try:
+                message = await self.channel.send(self._unsent[0])
+            except discord.HTTPException as e:
+                print(f"Re-sending streamed reply part failed: {e}")
+                return False
+            self.messages.append(message)
+            self._unsent.pop(0)
+        return True
+
+    async def _show(self, content: str) -> bool:
+        """Put `content` on screen after any unsent parts; returns False if Discord refused."""
+        if not await self._send_unsent():
+            self._last_update = self._clock()
+            return False
+        if not content.strip() or content == self._shown:
+            return True
+        if self._current is not None:
+            try:
+                await self._current.edit(content=content)
+            except discord.HTTPException as e:
+                print(f"Editing streamed reply failed ({e}); continuing in a new message")
+                self._current = None
+            else:
+                self._shown = content
+                self._last_update = self._clock()
+                return True
+        try:
+            self._current = await self.channel.send(content)
+        except discord.HTTPException as e:
+            # Leave `_shown` as is so the next update retries
+            print(f"Sending streamed reply failed: {e}")
+            self._last_update = self._clock()
+            return False
+        self.messages.append(self._current)
+        self._shown = content
+        self._last_update = self._clock()
+        return True
@@ -1,21 +1,35 @@
 """
 Scheduler System
 Manages recurring message schedules based on day of week, specific dates, and times.
+
+Each enabled schedule's next fire time is computed in its own timezone and kept
+in a heap; the scheduler task sleeps until the earliest one is due instead of
+polling every schedule on a fixed interval.
 """
 
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Tuple, Union
 try:
     from typing import Literal
 except ImportError:
     from typing_extensions import Literal
-from datetime import datetime, time
+from datetime import date as date_cls, datetime, time, timedelta
 import asyncio
+import heapq
 
 try:
     from zoneinfo import ZoneInfo
 except ImportError:
     ZoneInfo = None  # zoneinfo not available in older Python versions
 
+# Longest gap between possible fire days (Feb 29 annual schedules combined with filters)
+MAX_LOOKAHEAD_DAYS = 366 * 8
+
+# Upper bound on a single scheduler sleep, guarding against wall-clock jumps
+MAX_SLEEP_SECONDS = 60.0
+
+# A fire time this many seconds in the past is still sent (same-minute semantics)
+FIRE_GRACE_SECONDS = 60.0
+
 
 class ScheduleRegistry:
     """
@@ -35,8 +49,13 @@ class ScheduleRegistry:
     def __init__(self):
         self.schedules: List[Dict[str, Any]] = []
         self.is_running = False
-        # Lock to prevent concurrent send checks/updates causing duplicate sends
-        self._send_lock = asyncio.Lock()
+        # (fire timestamp, sequence, schedule name) for every enabled schedule
+        self._heap: List[Tuple[float, int, str]] = []
+        self._heap_seq = 0
+        self._heap_dirty = True
+        # Set whenever schedules change so the sleeping scheduler recomputes fire times
+        self._wakeup = asyncio.Event()
+        self._send_tasks = set()
     
     def register(
         self,
@@ -134,6 +153,7 @@ class ScheduleRegistry:
             "timezone": timezone,
             "last_sent": None  # Track last sent time to avoid duplicates
         })
+        self._reschedule()
     
     def get_schedule(self, name: str) -> Optional[Dict[str, Any]]:
         """
@@ -172,6 +192,7 @@ class ScheduleRegistry:
         for i, schedule in enumerate(self.schedules):
             if schedule["name"] == name:
                 self.schedules.pop(i)
+                self._reschedule()
                 return True
         return False
     
@@ -189,8 +210,100 @@ class ScheduleRegistry:
         schedule = self.get_schedule(name)
         if schedule:
             schedule["enabled"] = enabled
+            self._reschedule()
             return True
         return False
+
+    def _reschedule(self) -> None:
+        """Mark fire times stale and wake the scheduler so it recomputes them now."""
+        self._heap_dirty = True
+        self._wakeup.set()
+
+    @staticmethod
+    def _schedule_zone(schedule: Dict[str, Any]):
+        schedule_tz = schedule.get("timezone")
+        if schedule_tz and ZoneInfo is not None:
+            return ZoneInfo(schedule_tz)
+        return None
+
+    @staticmethod
+    def _minute_key(moment: datetime) -> str:
+        try:
+            return moment.isoformat(timespec='minutes')
+        except TypeError:
+            # Older Python versions may not support timespec kw; fallback
+            return moment.strftime("%Y-%m-%dT%H:%M")
+
+    @staticmethod
+    def _matches_day(schedule: Dict[str, Any], day: date_cls) -> bool:
+        """Return True if `schedule` may fire on calendar `day` (in its own timezone)."""
+        # Skip if schedule has reduced month window
+        if schedule.get("months") is not None and day.month not in schedule["months"]:
+            return False
+
+        # Alternating-day filter for schedules that require every-other-day frequency
+        if schedule.get("every_other_day") and day.day % 2 == 0:
+            return False
+
+        if schedule["type"] == "weekly":
+            return day.isoweekday() in schedule["weekdays"]
+        if schedule["type"] == "date":
+            return day.strftime("%Y-%m-%d") == schedule["date"]
+        if schedule["type"] == "annual":
+            return day.strftime("%m-%d") == schedule.get("date")
+        return False
+
+    def next_fire_time(self, schedule: Dict[str, Any], now: Optional[datetime] = None) -> Optional[datetime]:
+        """
+        Compute when `schedule` should next send.
+
+        A fire time earlier in the current minute still counts unless it was
+        already sent (tracked by `last_sent`), matching minute-resolution sends.
+
+        Args:
+            schedule: Schedule dictionary
+            now: Reference time (defaults to the current time)
+
+        Returns:
+            Datetime in the schedule's timezone (naive local time if none), or None if it never fires again
+        """
+        zone = self._schedule_zone(schedule)
+        if now is None:
+            now = datetime.now(zone)
+        elif zone is not None:
+            now = now.astimezone(zone)
+
+        hour, minute = (int(part) for part in schedule["time"].split(":"))
+        fire_time = time(hour, minute)
+        now_ts = now.timestamp()
+        day = now.date()
+        for _ in range(MAX_LOOKAHEAD_DAYS):
+            if self._matches_day(schedule, day):
+                candidate = datetime.combine(day, fire_time, tzinfo=zone)
+                if candidate.timestamp() + FIRE_GRACE_SECONDS > now_ts and self._minute_key(candidate) != schedule.get("last_sent"):
+                    return candidate
+            if schedule["type"] == "date" and day.strftime("%Y-%m-%d") > schedule["date"]:
+                return None
+            day += timedelta(days=1)
+        return None
+
+    def _push_next_fire(self, schedule: Dict[str, Any]) -> None:
+        try:
+            fire_at = self.next_fire_time(schedule)
+        except Exception as e:
+            print(f"Invalid schedule '{schedule['name']}': {e}")
+            return
+        if fire_at is None:
+            return
+        self._heap_seq += 1
+        heapq.heappush(self._heap, (fire_at.timestamp(), self._heap_seq, schedule["name"]))
+
+    def _rebuild_heap(self) -> None:
+        self._heap = []
+        self._heap_dirty = False
+        for schedule in self.schedules:
+            if schedule["enabled"]:
+                self._push_next_fire(schedule)
     
     class ScheduleContext:
         """Minimal context for running command handlers from scheduler."""
@@ -262,6 +375,17 @@ class ScheduleRegistry:
             except Exception as dm_err:
                 print(f"Failed to notify owner about scheduled command error: {dm_err}")
 
+    async def _send_scheduled(self, schedule: Dict[str, Any], bot) -> None:
+        try:
+            channel = bot.get_channel(schedule["channel_id"]) 
+            if channel:
+                if isinstance(schedule["message"], str) and schedule["message"].startswith('$'):
+                    await self._execute_scheduled_command(schedule["message"], channel, bot, schedule)
+                else:
+                    await channel.send(schedule["message"])
+        except Exception as e:
+            print(f"Error sending scheduled message '{schedule['name']}': {e}")
+
     async def start_scheduler(self, bot) -> None:
         """
         Start the scheduler background task.
@@ -270,96 +394,42 @@ class ScheduleRegistry:
             bot: Discord bot instance
         """
         self.is_running = True
-        
+        self._heap_dirty = True
+
         while self.is_running:
-            for schedule in self.schedules:
-                if not schedule["enabled"]:
+            self._wakeup.clear()
+            if self._heap_dirty:
+                self._rebuild_heap()
+
+            now_ts = datetime.now().timestamp()
+            while self._heap and self._heap[0][0] <= now_ts:
+                fire_ts, _, name = heapq.heappop(self._heap)
+                schedule = self.get_schedule(name)
+                if schedule is None or not schedule["enabled"]:
                     continue
 
-                schedule_tz = schedule.get("timezone")
-                if schedule_tz and ZoneInfo is not None:
-                    try:
-                        schedule_now = datetime.now(ZoneInfo(schedule_tz))
-                    except Exception as e:
-                        print(f"Invalid timezone for schedule '{schedule['name']}': {e}")
-                        continue
+                if now_ts - fire_ts < FIRE_GRACE_SECONDS:
+                    zone = self._schedule_zone(schedule)
+                    # mark as sent for this minute before sending
+                    schedule["last_sent"] = self._minute_key(datetime.fromtimestamp(fire_ts, zone))
+                    # Send in its own task so a slow send never delays other schedules
+                    task = asyncio.create_task(self._send_scheduled(schedule, bot))
+                    self._send_tasks.add(task)
+                    task.add_done_callback(self._send_tasks.discard)
                 else:
-                    schedule_now = datetime.now()
-
-                current_time = schedule_now.strftime("%H:%M")
-                current_weekday = schedule_now.isoweekday()  # 1=Monday, 7=Sunday
-                current_date = schedule_now.strftime("%Y-%m-%d")
-                current_month = schedule_now.month
-
-                # Skip if schedule has reduced month window
-                if schedule.get("months") is not None:
-                    if current_month not in schedule["months"]:
-                        continue
-
-                # Alternating-day filter for schedules that require every-other-day frequency
-                if schedule.get("every_other_day"):
-                    if schedule_now.day % 2 == 0:
-                        continue
-
-                # Build a minute-resolution key for de-duplication (ISO minute)
-                try:
-                    minute_key = schedule_now.isoformat(timespec='minutes')
-                except TypeError:
-                    # Older Python versions may not support timespec kw; fallback
-                    minute_key = schedule_now.strftime("%Y-%m-%dT%H:%M")
-
-                # Skip if already sent in this minute (use lock to avoid races)
-                already_sent = False
-                async with self._send_lock:
-                    if schedule.get("last_sent") == minute_key:
-                        already_sent = True
-                if already_sent:
-                    continue
+                    print(f"Skipped scheduled message '{name}': woke {now_ts - fire_ts:.0f}s late")
 
-                should_send = False
-
-                # Check weekly schedules
-                if schedule["type"] == "weekly":
-                    if current_weekday in schedule["weekdays"]:
-                        if current_time == schedule["time"]:
-                            should_send = True
-
-                # Check date-based schedules
-                elif schedule["type"] == "date":
-                    if current_date == schedule["date"]:
-                        if current_time == schedule["time"]:
-                            should_send = True
-
-                # Check annual schedules
-                elif schedule["type"] == "annual":
-                    current_month_day = schedule_now.strftime("%m-%d")
-                    if current_month_day == schedule.get("date"):
-                        if current_time == schedule["time"]:
-                            should_send = True
-
-                # Send message if conditions are met
-                if should_send:
-                    try:
-                        # Acquire lock and re-check/mark last_sent to avoid double-send races
-                        async with self._send_lock:
-                            if schedule.get("last_sent") == minute_key:
-                                # Another coroutine already sent this minute
-                                continue
-                            # mark as sent for this minute before sending
-                            schedule["last_sent"] = minute_key
-
-                        channel = bot.get_channel(schedule["channel_id"]) 
-                        if channel:
-                            if isinstance(schedule["message"], str) and schedule["message"].startswith('$'):
-                                await self._execute_scheduled_command(schedule["message"], channel, bot, schedule)
-                            else:
-                                await channel.send(schedule["message"])
-                    except Exception as e:
-                        print(f"Error sending scheduled message '{schedule['name']}': {e}")
-
-            # Check every 10 seconds to catch all minute boundaries
-            await asyncio.sleep(10)
+                self._push_next_fire(schedule)
+
+            timeout = MAX_SLEEP_SECONDS
+            if self._heap:
+                timeout = min(timeout, max(0.0, self._heap[0][0] - now_ts))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
 
     def stop_scheduler(self) -> None:
         """Stop the scheduler background task."""
         self.is_running = False
+        self._wakeup.set()
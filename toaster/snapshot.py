@@ -0,0 +1,159 @@
+"""
+Runtime State Snapshot
+Persists in-memory ExpiringDicts (mutes, conversation windows) across restarts.
+
+The snapshot is a text file with one entry per line:
+
+    kind<TAB>key<TAB>expires_at<TAB>json payload
+
+Loading only splits each line on its first three tabs; a payload is parsed
+the first time its key is looked up, so startup cost does not depend on how
+much conversation text was saved.
+"""
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+from toaster.expiring import ExpiringDict
+from toaster.state import register_shutdown_hook, write_atomic
+
+# Seconds between periodic snapshot writes
+SNAPSHOT_INTERVAL_SECONDS = 300.0
+
+# encode(value, seconds until expiry or None) -> (payload, seconds until the entry is stale) or None to skip
+Encoder = Callable[[Any, Optional[float]], Optional[Tuple[Any, float]]]
+# decode(payload, seconds until stale) -> (value, ttl for ExpiringDict.set) or None to drop
+Decoder = Callable[[Any, float], Optional[Tuple[Any, Optional[float]]]]
+
+
+class _Section:
+    def __init__(self, container: ExpiringDict, encode: Encoder, decode: Decoder):
+        self.container = container
+        self.encode = encode
+        self.decode = decode
+
+
+class StateSnapshot:
+    """
+    Snapshot file shared by several ExpiringDicts, one `kind` per dict.
+
+    `register()` installs a loader on the dict so a key missing from memory is
+    restored from the snapshot on first access. Saved entries that were never
+    accessed are carried over into the next snapshot until they expire.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._sections: Dict[str, _Section] = {}
+        # (kind, key) -> (expires_at, raw json) for entries not restored yet
+        self._pending: Dict[Tuple[str, str], Tuple[float, str]] = {}
+        self._loaded = False
+
+    def register(self, kind: str, container: ExpiringDict, encode: Encoder, decode: Decoder) -> None:
+        self._sections[kind] = _Section(container, encode, decode)
+        container.loader = lambda key, kind=kind: self._restore(kind, key)
+
+    def load(self) -> int:
+        """Index the snapshot file (payloads stay unparsed); returns the number of live entries."""
+        if self._loaded:
+            return len(self._pending)
+        self._loaded = True
+        if not self.path.exists():
+            return 0
+        now = time.time()
+        try:
+            with self.path.open("r", encoding="utf-8") as handle:
+                for line in handle:
+                    parts = line.rstrip("\n").split("\t", 3)
+                    if len(parts) != 4:
+                        continue
+                    kind, key, expires_at, raw = parts
+                    try:
+                        expires = float(expires_at)
+                    except ValueError:
+                        continue
+                    if expires > now:
+                        self._pending[(kind, key)] = (expires, raw)
+        except Exception as e:
+            print(f"Failed to load state snapshot {self.path}: {e}")
+        return len(self._pending)
+
+    def _restore(self, kind: str, key: Hashable) -> Optional[Tuple[Any, Optional[float]]]:
+        if not self._loaded:
+            self.load()
+        saved = self._pending.pop((kind, str(key)), None)
+        section = self._sections.get(kind)
+        if saved is None or section is None:
+            return None
+        expires_at, raw = saved
+        remaining = expires_at - time.time()
+        if remaining <= 0:
+            return None
+        try:
+            return section.decode(json.loads(raw), remaining)
+        except Exception as e:
+            print(f"Failed to restore {kind} {key} from snapshot: {e}")
+            return None
+
+    def serialize(self) -> str:
+        """Render live entries plus not-yet-restored saved entries as snapshot text."""
+        if not self._loaded:
+            # Never overwrite a snapshot we have not read yet
+            self.load()
+        now = time.time()
+        lines: List[str] = []
+        written = set()
+        for kind, section in self._sections.items():
+            for key, value, ttl in section.container.snapshot_items():
+                try:
+                    encoded = section.encode(value, ttl)
+                except Exception as e:
+                    print(f"Failed to snapshot {kind} {key}: {e}")
+                    continue
+                if encoded is None:
+                    continue
+                payload, lifetime = encoded
+                if lifetime <= 0:
+                    continue
+                lines.append(f"{kind}\t{key}\t{now + lifetime:.3f}\t{json.dumps(payload, ensure_ascii=False, separators=(',', ':'))}")
+                written.add((kind, str(key)))
+        for (kind, key), (expires_at, raw) in self._pending.items():
+            if (kind, key) not in written and expires_at > now:
+                lines.append(f"{kind}\t{key}\t{expires_at:.3f}\t{raw}")
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def save(self) -> None:
+        """Synchronously write the snapshot (used at shutdown)."""
+        try:
+            text = self.serialize()
+            if text or self.path.exists():
+                write_atomic(self.path, text)
+        except Exception as e:
+            print(f"Failed to save state snapshot {self.path}: {e}")
+
+    async def run_periodic(self, interval_seconds: float = SNAPSHOT_INTERVAL_SECONDS) -> None:
+        """Write the snapshot every `interval_seconds`; file I/O happens off the event loop."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                # Serialize on the loop thread, where the dicts are mutated
+                await asyncio.to_thread(write_atomic, self.path, self.serialize())
+            except Exception as e:
+                print(f"Failed to save state snapshot {self.path}: {e}")
+
+
+_snapshots: Dict[str, StateSnapshot] = {}
+
+
+def get_state_snapshot(path: Union[str, Path]) -> StateSnapshot:
+    """Return the process-wide snapshot for `path`, saved automatically at shutdown."""
+    cache_key = str(Path(path).resolve())
+    snapshot = _snapshots.get(cache_key)
+    if snapshot is None:
+        snapshot = StateSnapshot(path)
+        _snapshots[cache_key] = snapshot
+        register_shutdown_hook(snapshot.save)
+    return snapshot
@@ -2,11 +2,20 @@
 Bot state container to avoid circular dependencies in command modules.
 """
 
+import atexit
+import os
+import tempfile
 from datetime import datetime
-from typing import Optional
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional, Union
 
 start_time: Optional[datetime] = None
 
+# Callbacks that persist in-memory state before the process exits
+_shutdown_hooks: List[Callable[[], None]] = []
+# Coroutine callbacks that release resources tied to the event loop (e.g. HTTP sessions)
+_async_shutdown_hooks: List[Callable[[], Awaitable[None]]] = []
+
 
 def set_start_time(value: datetime) -> None:
     global start_time
@@ -15,3 +24,60 @@ def set_start_time(value: datetime) -> None:
 
 def get_start_time() -> Optional[datetime]:
     return start_time
+
+
+def register_shutdown_hook(hook: Callable[[], None]) -> None:
+    """Register a synchronous callback to run before the process exits or reboots."""
+    if hook not in _shutdown_hooks:
+        _shutdown_hooks.append(hook)
+
+
+def run_shutdown_hooks() -> None:
+    """Run every registered shutdown hook, logging (not raising) failures."""
+    for hook in list(_shutdown_hooks):
+        try:
+            hook()
+        except Exception as e:
+            print(f"Shutdown hook failed: {e}")
+
+
+def register_async_shutdown_hook(hook: Callable[[], Awaitable[None]]) -> None:
+    """Register a coroutine function to await while the event loop is still running at shutdown or reboot."""
+    if hook not in _async_shutdown_hooks:
+        _async_shutdown_hooks.append(hook)
+
+
+async def run_async_shutdown_hooks() -> None:
+    """Await every registered async shutdown hook, logging (not raising) failures."""
+    for hook in list(_async_shutdown_hooks):
+        try:
+            await hook()
+        except Exception as e:
+            print(f"Async shutdown hook failed: {e}")
+
+
+def write_atomic(path: Union[str, Path], text: str) -> None:
+    """
+    Replace `path` with `text` so readers see either the old or the new file, never a partial one.
+
+    The text goes to a temp file in the same directory, is fsynced, and is then
+    renamed over `path`; the temp file is removed if anything fails.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+atexit.register(run_shutdown_hooks)
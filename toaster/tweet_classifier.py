@@ -0,0 +1,121 @@
+"""
+Tweet Pre-Classifier
+Local naive-Bayes scorer that settles confident college-football yes/no cases
+before the tweet watcher pays for a Gemini classification.
+
+Training data is a JSON list dropped into the config folder:
+
+    [{"text": "Five-star QB commits to Georgia", "cfb": true}, ...]
+
+The model is rebuilt automatically whenever that file changes. Without
+enough labelled tweets of both kinds, nothing is settled locally and every
+tweet is escalated as before.
+"""
+
+import math
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from toaster.config import load_config_file
+
+TRAINING_FILE = "cfb_training_tweets.json"
+# Minimum labelled tweets per class before the local model makes decisions
+MIN_EXAMPLES_PER_CLASS = 10
+# Posterior probability bounds outside of which the local verdict is final
+CONFIDENT_YES = 0.97
+CONFIDENT_NO = 0.03
+
+_URL_RE = re.compile(r"https?://\S+")
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9'\-]*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word unigrams and bigrams with links removed."""
+    words = _TOKEN_RE.findall(_URL_RE.sub(" ", (text or "").lower()))
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+class NaiveBayesClassifier:
+    """Multinomial naive Bayes over unigram+bigram counts with Laplace smoothing."""
+
+    def __init__(self, examples: Iterable[Tuple[str, bool]]):
+        self.doc_counts = {True: 0, False: 0}
+        self.token_counts: Dict[bool, Dict[str, int]] = {True: {}, False: {}}
+        self.token_totals = {True: 0, False: 0}
+        vocabulary = set()
+        for text, label in examples:
+            label = bool(label)
+            self.doc_counts[label] += 1
+            counts = self.token_counts[label]
+            for token in tokenize(text):
+                counts[token] = counts.get(token, 0) + 1
+                self.token_totals[label] += 1
+                vocabulary.add(token)
+        self.vocabulary_size = len(vocabulary)
+
+    @property
+    def trained(self) -> bool:
+        return min(self.doc_counts.values()) >= MIN_EXAMPLES_PER_CLASS
+
+    def probability(self, text: str) -> float:
+        """Posterior probability that `text` is about college football."""
+        total_docs = self.doc_counts[True] + self.doc_counts[False]
+        log_odds = math.log((self.doc_counts[True] + 1) / (total_docs + 2)) - math.log((self.doc_counts[False] + 1) / (total_docs + 2))
+        yes_denominator = self.token_totals[True] + self.vocabulary_size + 1
+        no_denominator = self.token_totals[False] + self.vocabulary_size + 1
+        for token in tokenize(text):
+            log_odds += math.log((self.token_counts[True].get(token, 0) + 1) / yes_denominator)
+            log_odds -= math.log((self.token_counts[False].get(token, 0) + 1) / no_denominator)
+        if log_odds >= 0:
+            return 1.0 / (1.0 + math.exp(-log_odds))
+        odds = math.exp(log_odds)
+        return odds / (1.0 + odds)
+
+    def decide(self, text: str) -> Optional[bool]:
+        """True/False when confident, None when the tweet should be escalated."""
+        if not self.trained:
+            return None
+        probability = self.probability(text)
+        if probability >= CONFIDENT_YES:
+            return True
+        if probability <= CONFIDENT_NO:
+            return False
+        return None
+
+
+def examples_from_records(records: Sequence[Any]) -> List[Tuple[str, bool]]:
+    """Pull (text, label) pairs out of training-file records, skipping malformed ones."""
+    examples = []
+    for record in records or []:
+        if isinstance(record, dict) and isinstance(record.get("text"), str) and isinstance(record.get("cfb"), bool):
+            examples.append((record["text"], record["cfb"]))
+    return examples
+
+
+_model: Optional[NaiveBayesClassifier] = None
+_model_source: Any = None
+
+
+def get_model(config_path: str = "config") -> NaiveBayesClassifier:
+    """Return the model for the current training file, retraining when the file changed."""
+    global _model, _model_source
+    try:
+        records = load_config_file(TRAINING_FILE, config_path, default=[])
+    except Exception as e:
+        print(f"Failed to load {TRAINING_FILE}: {e}")
+        records = []
+    # load_config_file returns the same object until the file changes
+    if _model is None or records is not _model_source:
+        _model = NaiveBayesClassifier(examples_from_records(records))
+        _model_source = records
+    return _model
+
+
+def classify_college_football_locally(tweet_text: str, config_path: str = "config") -> Optional[bool]:
+    """
+    Settle a college-football classification without the LLM when the local model is confident.
+
+    Returns:
+        True/False for confident verdicts, None if the tweet needs the LLM
+    """
+    return get_model(config_path).decide(tweet_text)
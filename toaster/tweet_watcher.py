@@ -6,95 +6,136 @@ State persisted to: `config/twitter_watch_state.json` mapping username -> last_s
 
 import asyncio
 import json
+import random
 import re
+import time
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
-from toaster.config import load_config
-from toaster.modules.tweet_puller import get_latest_tweet_link, get_fixvx_equivalent
-import requests
 
+from toaster.http_client import HttpClient, get_http_client
+from toaster.intents import PhraseMatcher
+from toaster.llm_agents.result_cache import MISS, LLMResultCache
+from toaster.modules.tweet_puller import fetch_latest_tweet_link, get_fixvx_equivalent
+from toaster.tweet_classifier import classify_college_football_locally
 
-def _fixvx_has_video(url: str, timeout: int = 10) -> bool:
-    """Best-effort check if the given fixvx/front-end URL embeds a video.
 
-    Checks for <video> tags, common og:video meta tags, or player hints in HTML.
+# Seconds a fetched tweet page is reused before being downloaded again
+TWEET_PAGE_TTL_SECONDS = 600
+
+PAGE_HEADERS = {"User-Agent": "news-headlines-fetcher/1.0 (+https://example.com)"}
+
+
+class TweetPage:
+    """A provider (fxtwitter/fixvx/...) tweet page, downloaded and parsed once.
+
+    Answers every watch filter (`require_video`, `require_word`,
+    `require_ai_classification`) from a single fetch. Pages are cached by
+    status ID for TWEET_PAGE_TTL_SECONDS so reposts through several watched
+    accounts reuse the same download.
     """
-    try:
-        headers = {"User-Agent": "news-headlines-fetcher/1.0 (+https://example.com)"}
-        resp = requests.get(url, headers=headers, timeout=timeout)
-        resp.raise_for_status()
-        html = resp.text.lower()
+
+    _cache: Dict[str, Tuple[float, "TweetPage"]] = {}
+
+    def __init__(self, url: str, html: str):
+        self.url = url
+        self.html_lower = html.lower()
+        self.has_video = self._detect_video(self.html_lower)
+        self.text = self._extract_text(html)
+
+    @staticmethod
+    def _detect_video(html: str) -> bool:
+        """Check for <video> tags, common og:video meta tags, or player hints in HTML."""
         if "<video" in html:
             return True
         # OpenGraph video tags
-        if "og:video" in html or "property=\"og:video\"" in html:
+        if "og:video" in html:
             return True
         # common player hints
         if "data-video-id" in html or "player" in html and "video" in html:
             return True
         return False
-    except Exception:
-        return False
-
-
-def _fixvx_has_word(url: str, word: str, timeout: int = 10) -> bool:
-    """Check if the provider page contains `word` in tweet text or meta tags."""
-    if not word:
-        return False
-    try:
-        headers = {"User-Agent": "news-headlines-fetcher/1.0 (+https://example.com)"}
-        resp = requests.get(url, headers=headers, timeout=timeout)
-        resp.raise_for_status()
-        html = resp.text.lower()
-        w = word.lower()
-        # Check meta description / og:description first
-        if f"og:description" in html:
-            # quick substring search
-            if w in html:
-                return True
-        # Fallback: simple text search of page
-        if w in html:
-            return True
-        return False
-    except Exception:
-        return False
 
-
-def _extract_tweet_text(url: str, timeout: int = 10) -> Optional[str]:
-    """Extract tweet text from a fixvx/frontend URL.
-    
-    Attempts to parse og:description meta tag or fallback to text content.
-    """
-    if not url:
-        return None
-    try:
-        headers = {"User-Agent": "news-headlines-fetcher/1.0 (+https://example.com)"}
-        resp = requests.get(url, headers=headers, timeout=timeout)
-        resp.raise_for_status()
-        html = resp.text
-        
-        # Try to extract og:description (most reliable for tweet text)
+    @staticmethod
+    def _extract_text(html: str) -> Optional[str]:
+        """Extract tweet text from the og:description meta tag."""
         m = re.search(r'<meta[^>]+property=["\']og:description["\'][^>]+content=["\']([^"\']+)["\']', html)
         if m:
             return m.group(1).strip()
-        
-        # Fallback: look for content attribute
+
+        # Fallback: content attribute before property
         m = re.search(r'<meta[^>]+content=["\']([^"\']+)["\'][^>]*property=["\']og:description["\']', html)
         if m:
             return m.group(1).strip()
-        
-        return None
-    except Exception:
+
         return None
 
+    def has_word(self, word: str) -> bool:
+        """Check if the page contains `word` in tweet text or meta tags."""
+        return bool(word) and word.lower() in self.html_lower
+
+    def has_any_word(self, words: List[str]) -> bool:
+        return any(self.has_word(word) for word in words)
+
+    @classmethod
+    async def fetch(cls, url: str, client: HttpClient, timeout: int = 10) -> Optional["TweetPage"]:
+        """Return the parsed page for `url`, from cache when fresh; None if it can't be fetched."""
+        key = _extract_status_id(url) or url
+        now = time.monotonic()
+        cached = cls._cache.get(key)
+        if cached is not None and now - cached[0] < TWEET_PAGE_TTL_SECONDS:
+            return cached[1]
+
+        try:
+            html = await client.get_text(url, headers=PAGE_HEADERS, timeout=timeout)
+        except Exception:
+            return None
+
+        page = cls(url, html)
+        # Drop expired pages so the cache stays bounded by recent activity
+        for stale_key in [k for k, (fetched_at, _) in cls._cache.items() if now - fetched_at >= TWEET_PAGE_TTL_SECONDS]:
+            del cls._cache[stale_key]
+        cls._cache[key] = (now, page)
+        return page
+
+
+# Terms that indicate basketball, baseball, hockey, etc.
+NON_FOOTBALL_KEYWORDS = [
+    # Basketball
+    "basketball", "nba", "nit", "ncaa tournament", "march madness", "hoops", "three-pointer", "dunk", "slam dunk",
+    "jazz", "lakers", "celtics", "warriors", "nets", "76ers", "bucks", "heat", "mavericks", "nuggets",
+    "suns", "grizzlies", "kings", "pelicans", "spurs", "raptors", "bulls", "cavaliers", "pistons", "pacers",
+    "hawks", "hornets", "magic", "knicks", "rockets", "blazers", "clippers", "timberwolves",
+    # Baseball
+    "baseball", "mlb", "pitcher", "batter", "home run", "strikeout", "world series", "dugout",
+    # Hockey
+    "hockey", "nhl", "ice hockey", "puck", "goalie", "boarding", "hat trick", "zamboni",
+    # Other sports
+    "nfl pro", "professional football", "nba draft", "mlb draft", "nhl draft",
+    "nfl game", "nfl team", "nfl player", "nfl draft",
+    "soccer", "cricket", "rugby", "tennis", "golf", "boxing", "ufc", "mma",
+]
+
+_NON_FOOTBALL_MATCHER = PhraseMatcher()
+for _keyword in NON_FOOTBALL_KEYWORDS:
+    _NON_FOOTBALL_MATCHER.add(_keyword, "non_football")
+
+# College football verdicts by normalized tweet text, shared by every watched account and kept across restarts
+CFB_CLASSIFICATION_CACHE = LLMResultCache(
+    "college_football",
+    max_entries=4096,
+    ttl_seconds=7 * 24 * 60 * 60,
+    path=Path("config") / "cache" / "college_football_classifications.tsv",
+)
+
 
 def _is_college_football_related(tweet_text: str, timeout: int = 15) -> bool:
     """Use Gemini AI to classify if a tweet is college football related.
     
-    Uses a two-layer approach:
+    Uses a three-layer approach:
     1. Quick keyword filter to reject obvious non-football content
-    2. Gemini AI for nuanced cases
+    2. Local naive-Bayes model for high-confidence yes/no cases
+    3. Gemini AI for nuanced cases
     
     Args:
         tweet_text: The tweet text to classify
@@ -108,30 +149,21 @@ def _is_college_football_related(tweet_text: str, timeout: int = 15) -> bool:
     
     text_lower = tweet_text.lower()
     
-    # Layer 1: Quick keyword filters to reject obvious non-football sports
-    # These are terms that indicate basketball, baseball, hockey, etc.
-    non_football_keywords = [
-        # Basketball
-        "basketball", "nba", "nit", "ncaa tournament", "march madness", "hoops", "three-pointer", "dunk", "slam dunk",
-        "jazz", "lakers", "celtics", "warriors", "nets", "76ers", "bucks", "heat", "mavericks", "nuggets",
-        "suns", "grizzlies", "kings", "pelicans", "spurs", "raptors", "bulls", "cavaliers", "pistons", "pacers",
-        "hawks", "hornets", "magic", "knicks", "rockets", "blazers", "clippers", "timberwolves",
-        # Baseball
-        "baseball", "mlb", "pitcher", "batter", "home run", "strikeout", "world series", "dugout",
-        # Hockey
-        "hockey", "nhl", "ice hockey", "puck", "goalie", "boarding", "hat trick", "zamboni",
-        # Other sports
-        "nfl pro", "professional football", "nba draft", "mlb draft", "nhl draft",
-        "nfl game", "nfl team", "nfl player", "nfl draft",
-        "soccer", "cricket", "rugby", "tennis", "golf", "boxing", "ufc", "mma",
-    ]
-    
-    # Check if any non-football keyword appears in the tweet
-    for keyword in non_football_keywords:
-        if keyword in text_lower:
-            return False
-    
-    # Layer 2: Use Gemini for final classification
+    # Layer 1: Quick keyword filter (one pass) to reject obvious non-football sports
+    if _NON_FOOTBALL_MATCHER.labels(text_lower):
+        return False
+
+    # Layer 2: Local model settles confident cases without an LLM call
+    local_verdict = classify_college_football_locally(tweet_text)
+    if local_verdict is not None:
+        return local_verdict
+
+    # Layer 3: Use Gemini for the uncertain middle, once per distinct tweet text
+    cache_key = LLMResultCache.make_key("college_football", tweet_text)
+    cached = CFB_CLASSIFICATION_CACHE.get(cache_key)
+    if cached is not MISS:
+        return cached
+
     try:
         from toaster.llm_agents.gemini import get_gemini_response_with_key
         
@@ -173,7 +205,9 @@ If unsure, respond "no" (be conservative)."""
             return False
         
         # Check if response starts with "yes"
-        return response.strip().lower().startswith("yes")
+        is_cfb = response.strip().lower().startswith("yes")
+        CFB_CLASSIFICATION_CACHE.set(cache_key, is_cfb)
+        return is_cfb
     
     except Exception:
         # If Gemini is not available or errors occur, default to False
@@ -183,6 +217,11 @@ If unsure, respond "no" (be conservative)."""
 CONFIG_FILE = Path("config") / "twitter_watch.json"
 STATE_FILE = Path("config") / "twitter_watch_state.json"
 
+# Max account polls in flight at once across all watch entries
+MAX_CONCURRENT_POLLS = 4
+# Random jitter applied to each account's poll interval, as a fraction of it
+POLL_JITTER_FRACTION = 0.1
+
 
 def _load_watch_list():
     if not CONFIG_FILE.exists():
@@ -265,9 +304,113 @@ async def _tweet_already_posted(channel, tweet_url: str, lookback: int = 10) ->
     return False
 
 
+async def _check_account(bot, entry: Dict, state: Dict[str, str], client: HttpClient) -> None:
+    """Poll one watch entry once and post its newest tweet if it changed."""
+    username = entry.get("username")
+    channel_id = int(entry.get("channel_id"))
+    if not username:
+        return
+
+    link = await fetch_latest_tweet_link(username, client)
+    status_id = _extract_status_id(link) if link else None
+
+    last_id = state.get(username)
+    if last_id is None:
+        # First time seeing this account — record but don't post
+        if status_id:
+            state[username] = status_id
+            _save_state(state)
+        return
+
+    if status_id and status_id != last_id:
+        # New tweet — post to channel
+        try:
+            channel = bot.get_channel(channel_id)
+            if channel is None:
+                # try fetch
+                try:
+                    channel = await bot.fetch_channel(channel_id)
+                except Exception:
+                    channel = None
+            if channel is not None:
+                # Determine provider (per-entry override) and produce alternative link
+                provider = entry.get("provider", "fxtwitter")
+                alt = get_fixvx_equivalent(link, provider=provider) or link
+
+                # Check if this tweet has already been posted in recent history
+                already_posted = await _tweet_already_posted(channel, alt, lookback=10)
+                if already_posted:
+                    # Skip posting, but still update state so we don't check again
+                    state[username] = status_id
+                    _save_state(state)
+                    return
+
+                require_video = bool(entry.get("require_video", False))
+                require_word = entry.get("require_word")
+                require_ai_classification = entry.get("require_ai_classification")
+                can_post = True
+
+                # Content filters share one download and parse of the tweet page
+                if require_video or require_word or require_ai_classification:
+                    page = await TweetPage.fetch(alt, client)
+                    if page is None:
+                        can_post = False
+                    else:
+                        # If this watch entry requires a video embed, verify before posting
+                        if require_video and not page.has_video:
+                            can_post = False
+
+                        # If this watch entry requires a specific word (list or single string), verify before posting
+                        if require_word and can_post:
+                            words = require_word if isinstance(require_word, list) else [require_word]
+                            if not page.has_any_word(words):
+                                can_post = False
+
+                        # If this watch entry requires AI classification, verify before posting
+                        if require_ai_classification and can_post:
+                            if page.text:
+                                try:
+                                    classification_ok = await asyncio.to_thread(_is_college_football_related, page.text)
+                                except Exception:
+                                    classification_ok = False
+                                if not classification_ok:
+                                    can_post = False
+                            else:
+                                # If we can't extract text, don't post to be safe
+                                can_post = False
+
+                if can_post:
+                    await channel.send(alt)
+        except Exception:
+            # ignore failures and continue
+            pass
+
+        # update state
+        state[username] = status_id
+        _save_state(state)
+
+
+async def _watch_account(bot, entry: Dict, state: Dict[str, str], client: HttpClient, semaphore: asyncio.Semaphore, poll_interval_seconds: int) -> None:
+    """Poll a single watch entry forever on its own interval with jitter."""
+    interval = float(entry.get("poll_interval_seconds", poll_interval_seconds))
+    jitter = interval * POLL_JITTER_FRACTION
+    # Stagger start times so accounts sharing an interval don't poll in lockstep
+    await asyncio.sleep(random.uniform(0, jitter))
+    while True:
+        try:
+            async with semaphore:
+                await _check_account(bot, entry, state, client)
+        except Exception:
+            pass
+        await asyncio.sleep(max(1.0, interval + random.uniform(-jitter, jitter)))
+
+
 async def start_tweet_watcher(bot, poll_interval_seconds: int = 300):
     """Run indefinitely, polling accounts and posting new tweets.
 
+    - Each enabled watch entry runs as its own task on a per-account interval
+      (`poll_interval_seconds` in the entry overrides the default) with jitter.
+    - All tasks share the bot-wide HTTP client; at most MAX_CONCURRENT_POLLS polls run at once.
     - On first observation of an account (no stored state) do NOT post; just store.
     - When status id changes, post message to configured channel and update state.
     - Before posting, check recent channel history to avoid duplicate posts.
@@ -278,117 +421,13 @@ async def start_tweet_watcher(bot, poll_interval_seconds: int = 300):
         return
 
     state = _load_state()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_POLLS)
 
-    while True:
-        for entry in watch_list:
-            try:
-                if not entry.get("enabled", True):
-                    continue
-                username = entry.get("username")
-                channel_id = int(entry.get("channel_id"))
-                if not username:
-                    continue
-
-                link = get_latest_tweet_link(username)
-                status_id = _extract_status_id(link) if link else None
-
-                last_id = state.get(username)
-                if last_id is None:
-                    # First time seeing this account — record but don't post
-                    if status_id:
-                        state[username] = status_id
-                        _save_state(state)
-                    continue
-
-                if status_id and status_id != last_id:
-                    # New tweet — post to channel
-                    try:
-                        channel = bot.get_channel(channel_id)
-                        if channel is None:
-                            # try fetch
-                            try:
-                                channel = await bot.fetch_channel(channel_id)
-                            except Exception:
-                                channel = None
-                        if channel is not None:
-                            # Determine provider (per-entry override) and produce alternative link
-                            provider = entry.get("provider", "fxtwitter")
-                            alt = get_fixvx_equivalent(link, provider=provider) or link
-
-                            # Check if this tweet has already been posted in recent history
-                            already_posted = await _tweet_already_posted(channel, alt, lookback=10)
-                            if already_posted:
-                                # Skip posting, but still update state so we don't check again
-                                state[username] = status_id
-                                _save_state(state)
-                                continue
-
-                            # If this watch entry requires a video embed, verify before posting
-                            require_video = bool(entry.get("require_video", False))
-                            can_post = True
-                            if require_video:
-                                # run blocking check in thread
-                                try:
-                                    has_video = await asyncio.to_thread(_fixvx_has_video, alt)
-                                except Exception:
-                                    has_video = False
-                                if not has_video:
-                                    can_post = False
-
-                            # If this watch entry requires a specific word, verify before posting
-                            require_word = entry.get("require_word")
-                            if require_word and can_post:
-                                # support list or single string
-                                try:
-                                    if isinstance(require_word, list):
-                                        found = False
-                                        for w in require_word:
-                                            try:
-                                                ok = await asyncio.to_thread(_fixvx_has_word, alt, w)
-                                            except Exception:
-                                                ok = False
-                                            if ok:
-                                                found = True
-                                                break
-                                        if not found:
-                                            can_post = False
-                                    else:
-                                        try:
-                                            ok = await asyncio.to_thread(_fixvx_has_word, alt, require_word)
-                                        except Exception:
-                                            ok = False
-                                        if not ok:
-                                            can_post = False
-                                except Exception:
-                                    can_post = False
-
-                            # If this watch entry requires AI classification, verify before posting
-                            require_ai_classification = entry.get("require_ai_classification")
-                            if require_ai_classification and can_post:
-                                # Extract tweet text and run AI classification in thread
-                                try:
-                                    tweet_text = await asyncio.to_thread(_extract_tweet_text, alt)
-                                    if tweet_text:
-                                        classification_ok = await asyncio.to_thread(_is_college_football_related, tweet_text)
-                                        if not classification_ok:
-                                            can_post = False
-                                    else:
-                                        # If we can't extract text, don't post to be safe
-                                        can_post = False
-                                except Exception:
-                                    can_post = False
-
-                            if can_post:
-                                await channel.send(alt)
-                    except Exception:
-                        # ignore failures and continue
-                        pass
-
-                    # update state
-                    state[username] = status_id
-                    _save_state(state)
-
-            except Exception:
-                continue
-
-        await asyncio.sleep(poll_interval_seconds)
+    client = get_http_client()
+    tasks = [
+        asyncio.create_task(_watch_account(bot, entry, state, client, semaphore, poll_interval_seconds))
+        for entry in watch_list
+        if entry.get("enabled", True) and entry.get("username")
+    ]
+    if tasks:
+        await asyncio.gather(*tasks)